@@ -0,0 +1,115 @@
+#benchmarks/bench_chat_history.py
+#설명 : 대화가 길어질 때 턴당 체크포인트 비용(직렬화 바이트, 시간) 비교
+#       full   : 이전 방식 - chat_history 전체를 노드가 다시 쓰고 update_state로 두 번 더 덮어씀
+#       append : 추가 전용 리듀서 + 채널 추가분 저장 - 턴마다 새 메시지 2개만 기록
+#실행 : python benchmarks/bench_chat_history.py --turns 500
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from typing import Annotated, List, TypedDict
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.graph import END, StateGraph
+
+from graph.agent_state import append_chat_history
+from graph.checkpoint_store import SQLiteCheckpointSaver
+
+
+class CountingSerializer(JsonPlusSerializer):
+    """직렬화한 바이트 수 집계"""
+
+    def __init__(self):
+        super().__init__()
+        self.bytes = 0
+
+    def dumps_typed(self, obj):
+        type_, data = super().dumps_typed(obj)
+        self.bytes += len(data)
+        return type_, data
+
+
+class FullState(TypedDict):
+    input: str
+    chat_history: List[dict]
+
+
+class AppendState(TypedDict):
+    input: str
+    chat_history: Annotated[List[dict], append_chat_history]
+
+
+def _turn(query: str, answer: str) -> List[dict]:
+    return [{"role": "user", "content": query}, {"role": "assistant", "content": answer}]
+
+
+def build(mode: str, path: str, answer: str):
+    serde = CountingSerializer()
+    if mode == "full":
+        saver = SQLiteCheckpointSaver(path=path, append_only_channels=(), serde=serde)
+
+        def respond(state):
+            history = state.get("chat_history") or []
+            return {"chat_history": list(history)}
+
+        workflow = StateGraph(FullState)
+    else:
+        saver = SQLiteCheckpointSaver(path=path, serde=serde)
+
+        def respond(state):
+            return {"chat_history": _turn(state["input"], answer)}
+
+        workflow = StateGraph(AppendState)
+
+    workflow.add_node("respond", respond)
+    workflow.set_entry_point("respond")
+    workflow.add_edge("respond", END)
+    return workflow.compile(checkpointer=saver), saver, serde
+
+
+def run(mode: str, turns: int, message_bytes: int, report_every: int):
+    answer = "가" * (message_bytes // 3)
+    with tempfile.TemporaryDirectory() as tmp:
+        app, saver, serde = build(mode, os.path.join(tmp, "bench.sqlite"), answer)
+        config = {"configurable": {"thread_id": "bench"}}
+        window_bytes, window_time = 0, 0.0
+        rows = []
+        for turn in range(1, turns + 1):
+            query = f"질문 {turn}"
+            before = serde.bytes
+            started = time.perf_counter()
+            app.invoke({"input": query}, config=config)
+            if mode == "full":
+                # 이전 StockAnalysisGraph.run + ChatSession.update_chat_history의 두 번의 전체 덮어쓰기
+                history = app.get_state(config).values.get("chat_history") or []
+                app.update_state(config, {"chat_history": list(history)})
+                history = app.get_state(config).values.get("chat_history") or []
+                app.update_state(config, {"chat_history": history + _turn(query, answer)})
+            window_time += time.perf_counter() - started
+            window_bytes += serde.bytes - before
+            if turn % report_every == 0:
+                rows.append((turn, window_bytes / report_every, window_time / report_every * 1000))
+                window_bytes, window_time = 0, 0.0
+        saver.close()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="턴당 체크포인트 비용 비교")
+    parser.add_argument("--turns", type=int, default=500)
+    parser.add_argument("--message-bytes", type=int, default=600, help="답변 한 개의 크기 (UTF-8 바이트)")
+    parser.add_argument("--report-every", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'mode':<8}{'turn':>6}{'bytes/turn':>14}{'ms/turn':>10}")
+    for mode in ("full", "append"):
+        for turn, per_turn_bytes, per_turn_ms in run(mode, args.turns, args.message_bytes, args.report_every):
+            print(f"{mode:<8}{turn:>6}{per_turn_bytes:>14.0f}{per_turn_ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
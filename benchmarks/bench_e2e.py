@@ -0,0 +1,217 @@
+#benchmarks/bench_e2e.py
+#설명 : 오프라인 종단 간 벤치마크 - 가짜 LLM과 CSV 기반 시세로 StockAnalysisGraph.run을 시나리오별로 실행해
+#       p50/p95 지연 시간, 동시 실행 수별 처리량, 메모리 할당(tracemalloc)을 보고
+#실행 : python benchmarks/bench_e2e.py --iterations 20 --concurrency 1,4,16
+#       python benchmarks/bench_e2e.py --json after.json --baseline before.json   (p95가 기준보다 나빠지면 종료 코드 1)
+#       python benchmarks/bench_e2e.py --routing agent --baseline classifier.json  (라우팅 방식 A/B 비교)
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import sys
+import time
+import tracemalloc
+import uuid
+from typing import Dict, List
+
+import numpy as np
+
+from offline import fake_bedrock_client, offline_environment
+
+# (이름, 질문) - 일반 질문, 회사 정보, 기술적 분석, 종합 투자 추천
+SCENARIOS = [
+    ("general", "파스타 레시피 알려줘"),
+    ("company", "애플 회사 정보 알려줘"),
+    ("technical", "NVDA 기술적 분석 해줘"),
+    ("advisor", "TSLA 지금 매수해도 될까? 투자 추천해줘"),
+]
+
+
+async def run_once(graph, query: str, thread_id: str = None) -> float:
+    """
+    질문 하나를 처리하는 데 걸린 시간 (초)
+
+    도구가 오류를 돌려주면 오류 경로를 측정하게 되므로 RuntimeError로 실행을 중단합니다.
+    """
+    thread_id = thread_id or uuid.uuid4().hex
+    started = time.perf_counter()
+    async for _ in graph.run(query, thread_id):
+        pass
+    elapsed = time.perf_counter() - started
+    failed = [e for e in graph.get_tool_usage_log(thread_id) if e["status"] != "ok"]
+    if failed:
+        raise RuntimeError(
+            f"도구 실행 실패 ({query}): "
+            + "; ".join(f"{e['tool']} {e['status']}: {e['output']}" for e in failed)
+        )
+    return elapsed
+
+
+def _summary(latencies: List[float]) -> Dict[str, float]:
+    values = np.asarray(latencies) * 1000
+    return {
+        "n": len(values),
+        "p50_ms": round(float(np.percentile(values, 50)), 2),
+        "p95_ms": round(float(np.percentile(values, 95)), 2),
+        "mean_ms": round(float(values.mean()), 2),
+        "max_ms": round(float(values.max()), 2),
+    }
+
+
+async def measure_latency(graph, scenarios, iterations: int, warmup: int, cold: bool) -> Dict[str, dict]:
+    from tools.market_cache import market_cache
+    from tools.market_data_tool import get_market_refresher
+    from tools.news_service import get_news_service
+
+    results = {}
+    for name, query in scenarios:
+        for _ in range(warmup):
+            await run_once(graph, query)
+        latencies = []
+        for _ in range(iterations):
+            if cold:
+                market_cache.clear()
+                get_market_refresher().clear()
+                get_news_service().clear()
+            latencies.append(await run_once(graph, query))
+        results[name] = _summary(latencies)
+    return results
+
+
+async def measure_throughput(graph, scenarios, levels: List[int], requests: int) -> Dict[str, dict]:
+    """동시 실행 수별 처리량 (시나리오를 섞어 requests개 요청)"""
+    results = {}
+    for level in levels:
+        semaphore = asyncio.Semaphore(level)
+        latencies = []
+
+        async def one(i):
+            async with semaphore:
+                latencies.append(await run_once(graph, scenarios[i % len(scenarios)][1]))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        elapsed = time.perf_counter() - started
+        results[str(level)] = {"requests_per_s": round(requests / elapsed, 2), **_summary(latencies)}
+    return results
+
+
+async def measure_allocations(graph, scenarios, iterations: int) -> Dict[str, dict]:
+    """시나리오별 요청당 최대 추적 메모리와 요청 후 남은 메모리 (tracemalloc, KiB)"""
+    results = {}
+    tracemalloc.start()
+    try:
+        for name, query in scenarios:
+            await run_once(graph, query)
+            peaks, retained = [], []
+            for _ in range(iterations):
+                before, _ = tracemalloc.get_traced_memory()
+                tracemalloc.reset_peak()
+                await run_once(graph, query)
+                current, peak = tracemalloc.get_traced_memory()
+                peaks.append(peak - before)
+                retained.append(current - before)
+            results[name] = {
+                "peak_kib": round(float(np.median(peaks)) / 1024, 1),
+                "retained_kib": round(float(np.median(retained)) / 1024, 1),
+            }
+    finally:
+        tracemalloc.stop()
+    return results
+
+
+def compare(current: dict, baseline: dict, max_regression: float) -> List[str]:
+    """기준 결과보다 p95가 max_regression 비율 이상 나빠진 시나리오"""
+    failures = []
+    for name, stats in current["latency"].items():
+        base = baseline.get("latency", {}).get(name)
+        if base and stats["p95_ms"] > base["p95_ms"] * (1 + max_regression):
+            failures.append(f"{name}: p95 {base['p95_ms']}ms -> {stats['p95_ms']}ms")
+    return failures
+
+
+def print_report(report: dict):
+    print(f"\n지연 시간 (LLM {report['config']['llm_latency'] * 1000:.0f}ms/호출)")
+    print(f"{'scenario':<12}{'p50 ms':>10}{'p95 ms':>10}{'mean ms':>10}{'max ms':>10}")
+    for name, s in report["latency"].items():
+        print(f"{name:<12}{s['p50_ms']:>10.1f}{s['p95_ms']:>10.1f}{s['mean_ms']:>10.1f}{s['max_ms']:>10.1f}")
+
+    print("\n처리량 (시나리오 혼합)")
+    print(f"{'concurrency':<12}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for level, s in report["throughput"].items():
+        print(f"{level:<12}{s['requests_per_s']:>10.2f}{s['p50_ms']:>10.1f}{s['p95_ms']:>10.1f}")
+
+    if report.get("allocations"):
+        print("\n메모리 (요청당, tracemalloc)")
+        print(f"{'scenario':<12}{'peak KiB':>10}{'retained KiB':>14}")
+        for name, s in report["allocations"].items():
+            print(f"{name:<12}{s['peak_kib']:>10.1f}{s['retained_kib']:>14.1f}")
+
+
+async def main_async(args) -> dict:
+    from graph import StockAnalysisGraph
+    from langgraph.checkpoint.memory import MemorySaver
+
+    scenarios = [s for s in SCENARIOS if args.scenarios == "all" or s[0] in args.scenarios.split(",")]
+    checkpointer = MemorySaver() if args.checkpointer == "memory" else None
+    graph = StockAnalysisGraph(
+        fake_bedrock_client(args.llm_latency, args.output_tokens), checkpointer=checkpointer, routing=args.routing
+    )
+
+    report = {"config": vars(args)}
+    quiet = contextlib.redirect_stdout(io.StringIO()) if not args.verbose else contextlib.nullcontext()
+    with quiet:
+        report["latency"] = await measure_latency(graph, scenarios, args.iterations, args.warmup, args.cold)
+        levels = [int(x) for x in args.concurrency.split(",") if x]
+        report["throughput"] = await measure_throughput(graph, scenarios, levels, args.requests)
+        if not args.no_alloc:
+            report["allocations"] = await measure_allocations(graph, scenarios, args.alloc_iterations)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="오프라인 종단 간 벤치마크")
+    parser.add_argument("--iterations", type=int, default=20, help="시나리오별 측정 횟수")
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--scenarios", default="all", help="general,company,technical,advisor 중 쉼표 구분")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="가짜 LLM 호출당 지연 시간 (초)")
+    parser.add_argument("--output-tokens", type=int, default=120)
+    parser.add_argument("--data-latency", type=float, default=0.0, help="가짜 Yahoo 조회당 지연 시간 (초)")
+    parser.add_argument("--news-latency", type=float, default=0.0, help="가짜 뉴스 검색당 지연 시간 (초)")
+    parser.add_argument("--cold", action="store_true", help="요청마다 시세/뉴스 캐시와 시장 스냅샷을 비움")
+    parser.add_argument("--concurrency", default="1,4,16", help="처리량을 잴 동시 실행 수 (쉼표 구분)")
+    parser.add_argument("--requests", type=int, default=64, help="동시 실행 수별 요청 수")
+    parser.add_argument("--checkpointer", choices=("sqlite", "memory"), default="sqlite")
+    parser.add_argument("--routing", choices=("classifier", "agent"), default="classifier",
+                        help="그래프 라우팅 방식 (agent: 분류 단계 없이 단일 호출 라우팅)")
+    parser.add_argument("--no-alloc", action="store_true", help="tracemalloc 측정 생략")
+    parser.add_argument("--alloc-iterations", type=int, default=5)
+    parser.add_argument("--json", help="결과를 저장할 JSON 경로")
+    parser.add_argument("--baseline", help="비교할 이전 결과 JSON")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="허용하는 p95 증가 비율")
+    parser.add_argument("--verbose", action="store_true", help="그래프 실행 중 출력 표시")
+    args = parser.parse_args()
+
+    with offline_environment(data_latency=args.data_latency, news_latency=args.news_latency):
+        report = asyncio.run(main_async(args))
+
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            failures = compare(report, json.load(f), args.max_regression)
+        if failures:
+            print("\n성능 저하:")
+            for line in failures:
+                print(f"  {line}")
+            sys.exit(1)
+        print("\n기준 대비 성능 저하 없음")
+
+
+if __name__ == "__main__":
+    main()
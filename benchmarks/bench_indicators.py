@@ -0,0 +1,280 @@
+#benchmarks/bench_indicators.py
+#설명 : 기술적 지표 구현별 마이크로 벤치마크 - timescale/*.csv 8종목을 여러 기간 길이로 잘라
+#       봉당 계산 시간(ns/bar), 호출당 최대 메모리(tracemalloc), 기준 구현과의 수치 일치도를 보고
+#       pandas      : 기존 TechnicalAnalysisTool 메서드의 pandas 식 (기준, 단순 평균 RSI)
+#       tool        : 현재 TechnicalAnalysisTool의 _calculate_* 메서드 (메서드마다 파이프라인 실행)
+#       pipeline    : technical_pipeline().run() 한 번에 전체 지표
+#       engine      : 새 IndicatorEngine으로 전체 봉 재생 / engine_warm : 상태가 있는 엔진에 마지막 봉만 반영
+#       batch       : batch_indicators()에 1종목 행렬 (batch x8 은 8종목 행렬 한 번)
+#       ta          : TechnicalAnalysis 클래스 (ta 라이브러리, Wilder RSI, 모집단 표준편차 볼린저, 소수 둘째 자리 반올림)
+#       새 구현은 IMPLEMENTATIONS에 (준비 함수) 하나를 추가하면 같은 표에 포함됩니다
+#실행 : python benchmarks/bench_indicators.py --lengths 60,250,1000,all --repeat 50
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from tools.batch_technical_tool import batch_indicators
+from tools.indicator_engine import IndicatorEngine
+from tools.indicator_pipeline import technical_pipeline
+from tools.technical_tool import TechnicalAnalysis, TechnicalAnalysisTool
+
+CSV_DIR = ROOT / "timescale"
+REFERENCE = "pandas"
+# 일치도 표의 컬럼 (rsi_wilder는 기준 구현의 Wilder RSI와 각 구현의 rsi를 비교)
+INDICATORS = [
+    "ma5", "ma20", "ma60", "ma120", "rsi", "rsi_wilder", "macd", "macd_signal",
+    "bb_upper", "bb_middle", "bb_lower", "volume_ma5", "volume_ma20",
+]
+
+
+def load_frames(csv_dir: Path) -> Dict[str, pd.DataFrame]:
+    frames = {}
+    for path in sorted(csv_dir.glob("*_5years_daily.csv")):
+        df = pd.read_csv(path, parse_dates=["Date"], index_col="Date")
+        frames[path.name.split("_")[0].upper()] = df[["Open", "High", "Low", "Close", "Volume"]].astype("float64")
+    return frames
+
+
+def pandas_reference(df: pd.DataFrame, rsi_period: int, bb_period: int) -> Dict[str, float]:
+    """기존 TechnicalAnalysisTool 메서드의 pandas 식 + 비교용 Wilder RSI"""
+    close, volume = df["Close"], df["Volume"]
+    values = {f"ma{w}": float(close.rolling(window=w).mean().iloc[-1]) for w in (5, 20, 60, 120)}
+
+    delta = close.diff()
+    gain = delta.where(delta > 0, 0)
+    loss = -delta.where(delta < 0, 0)
+    values["rsi"] = float((100 - 100 / (1 + gain.rolling(window=rsi_period).mean() / loss.rolling(window=rsi_period).mean())).iloc[-1])
+    wilder_gain = gain.ewm(alpha=1 / rsi_period, min_periods=rsi_period, adjust=False).mean()
+    wilder_loss = loss.ewm(alpha=1 / rsi_period, min_periods=rsi_period, adjust=False).mean()
+    values["rsi_wilder"] = float((100 - 100 / (1 + wilder_gain / wilder_loss)).iloc[-1])
+
+    macd = close.ewm(span=12, adjust=False).mean() - close.ewm(span=26, adjust=False).mean()
+    values["macd"] = float(macd.iloc[-1])
+    values["macd_signal"] = float(macd.ewm(span=9, adjust=False).mean().iloc[-1])
+
+    ma, std = close.rolling(window=bb_period).mean(), close.rolling(window=bb_period).std()
+    values["bb_upper"] = float(ma.iloc[-1] + std.iloc[-1] * 2)
+    values["bb_middle"] = float(ma.iloc[-1])
+    values["bb_lower"] = float(ma.iloc[-1] - std.iloc[-1] * 2)
+
+    values["volume_ma5"] = float(volume.rolling(window=5).mean().iloc[-1])
+    values["volume_ma20"] = float(volume.rolling(window=20).mean().iloc[-1])
+    return values
+
+
+def setup_pandas(symbol, df, rsi_period, bb_period) -> Callable[[], Dict[str, float]]:
+    return lambda: pandas_reference(df, rsi_period, bb_period)
+
+
+def setup_tool(symbol, df, rsi_period, bb_period):
+    tool = TechnicalAnalysisTool()
+
+    def run():
+        ma = tool._calculate_moving_averages(df)
+        macd = tool._calculate_macd(df)
+        bb = tool._calculate_bollinger_bands(df, bb_period)
+        volume = tool._analyze_volume(df)
+        return {
+            "ma5": ma["MA5"], "ma20": ma["MA20"], "ma60": ma["MA60"], "ma120": ma["MA120"],
+            "rsi": tool._calculate_rsi(df, rsi_period),
+            "macd": macd["macd"], "macd_signal": macd["signal"],
+            "bb_upper": bb["upper"], "bb_middle": bb["middle"], "bb_lower": bb["lower"],
+            "volume_ma5": volume["avg_volume_5d"], "volume_ma20": volume["avg_volume_20d"],
+        }
+
+    return run
+
+
+def setup_pipeline(symbol, df, rsi_period, bb_period):
+    pipeline = technical_pipeline(rsi_period, bb_period)
+    return lambda: pipeline.run(df)
+
+
+def setup_engine(symbol, df, rsi_period, bb_period):
+    return lambda: IndicatorEngine().compute(symbol, df, rsi_period=rsi_period, bb_period=bb_period)
+
+
+def setup_engine_warm(symbol, df, rsi_period, bb_period):
+    engine = IndicatorEngine()
+    engine.compute(symbol, df, rsi_period=rsi_period, bb_period=bb_period)
+    return lambda: engine.compute(symbol, df, rsi_period=rsi_period, bb_period=bb_period)
+
+
+def setup_batch(symbol, df, rsi_period, bb_period):
+    def run():
+        close = np.ascontiguousarray(df["Close"].values[None, :])
+        volume = np.ascontiguousarray(df["Volume"].values[None, :])
+        return {k: float(v[0]) for k, v in batch_indicators(close, volume, rsi_period, bb_period).items()}
+
+    return run
+
+
+def setup_ta(symbol, df, rsi_period, bb_period):
+    analysis = TechnicalAnalysis()
+    loop = asyncio.new_event_loop()
+
+    async def indicators():
+        rsi = await analysis._calculate_rsi(df, rsi_period)
+        bb = await analysis._calculate_bollinger_bands(df, bb_period)
+        macd = await analysis._calculate_macd(df)
+        ma = await analysis._calculate_moving_averages(df, [5, 20, 60, 120])
+        return {
+            **{k: float(v) for k, v in ma.items()},
+            "rsi": float(rsi["value"]),
+            "macd": float(macd["macd"]), "macd_signal": float(macd["signal"]),
+            "bb_upper": float(bb["upper"]), "bb_middle": float(bb["middle"]), "bb_lower": float(bb["lower"]),
+        }
+
+    return lambda: loop.run_until_complete(indicators())
+
+
+IMPLEMENTATIONS = {
+    "pandas": setup_pandas,
+    "tool": setup_tool,
+    "pipeline": setup_pipeline,
+    "engine": setup_engine,
+    "engine_warm": setup_engine_warm,
+    "batch": setup_batch,
+    "ta": setup_ta,
+}
+
+
+def time_call(fn: Callable, repeat: int) -> float:
+    """호출당 시간의 중앙값 (ns)"""
+    fn()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter_ns()
+        fn()
+        samples.append(time.perf_counter_ns() - started)
+    return float(np.median(samples))
+
+
+def peak_memory(fn: Callable) -> int:
+    """호출 한 번 동안의 최대 추적 메모리 증가량 (bytes)"""
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+        return peak - before
+    finally:
+        tracemalloc.stop()
+
+
+def _relative_error(value: float, reference: float) -> float:
+    if np.isnan(value) and np.isnan(reference):
+        return 0.0
+    if np.isnan(value) or np.isnan(reference):
+        return float("inf")
+    return abs(value - reference) / max(abs(reference), 1e-12)
+
+
+def agreement(outputs: Dict[str, Dict[str, float]], reference: Dict[str, float]) -> Dict[str, float]:
+    """지표별 기준 대비 상대 오차 (구현이 계산하지 않는 지표는 제외)"""
+    errors = {}
+    for name in INDICATORS:
+        key = "rsi" if name == "rsi_wilder" else name
+        if key in outputs and name in reference:
+            errors[name] = _relative_error(outputs[key], reference[name])
+    return errors
+
+
+def run(frames: Dict[str, pd.DataFrame], lengths: List[int], implementations: List[str],
+        repeat: int, rsi_period: int, bb_period: int) -> dict:
+    report = {"timing": [], "agreement": {}}
+    worst: Dict[str, Dict[str, float]] = {name: {} for name in implementations}
+
+    for length in lengths:
+        tails = {symbol: df if not length else df.iloc[-length:] for symbol, df in frames.items()}
+        for name in implementations:
+            ns_per_bar, peaks = [], []
+            for symbol, df in tails.items():
+                fn = IMPLEMENTATIONS[name](symbol, df, rsi_period, bb_period)
+                ns_per_bar.append(time_call(fn, repeat) / len(df))
+                peaks.append(peak_memory(fn))
+
+                reference = pandas_reference(df, rsi_period, bb_period)
+                for indicator, error in agreement(fn(), reference).items():
+                    worst[name][indicator] = max(worst[name].get(indicator, 0.0), error)
+            report["timing"].append({
+                "impl": name,
+                "bars": int(np.median([len(df) for df in tails.values()])),
+                "ns_per_bar": round(float(np.median(ns_per_bar)), 1),
+                "peak_kib": round(max(peaks) / 1024, 1),
+            })
+
+        # 8종목을 한 행렬로 한 번에 계산할 때의 봉당 시간
+        aligned = pd.concat({s: df["Close"] for s, df in tails.items()}, axis=1, join="inner")
+        volumes = pd.concat({s: df["Volume"] for s, df in tails.items()}, axis=1, join="inner")
+        close = np.ascontiguousarray(aligned.values.T)
+        volume = np.ascontiguousarray(volumes.values.T)
+        fn = lambda: batch_indicators(close, volume, rsi_period, bb_period)
+        report["timing"].append({
+            "impl": f"batch x{close.shape[0]}",
+            "bars": close.shape[1],
+            "ns_per_bar": round(time_call(fn, repeat) / close.size, 1),
+            "peak_kib": round(peak_memory(fn) / 1024, 1),
+        })
+
+    report["agreement"] = worst
+    return report
+
+
+def print_report(report: dict):
+    print("\n속도 / 메모리 (종목별 중앙값, peak는 종목 중 최대)")
+    print(f"{'impl':<14}{'bars':>7}{'ns/bar':>12}{'peak KiB':>11}")
+    for row in report["timing"]:
+        print(f"{row['impl']:<14}{row['bars']:>7}{row['ns_per_bar']:>12.1f}{row['peak_kib']:>11.1f}")
+
+    print(f"\n{REFERENCE} 기준 최대 상대 오차 (모든 종목/길이, '-'는 계산하지 않는 지표, inf는 한쪽만 NaN)")
+    header = "".join(f"{name:>12}" for name in INDICATORS)
+    print(f"{'impl':<14}{header}")
+    for name, errors in report["agreement"].items():
+        cells = "".join(f"{errors[i]:>12.1e}" if i in errors else f"{'-':>12}" for i in INDICATORS)
+        print(f"{name:<14}{cells}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="기술적 지표 구현별 마이크로 벤치마크")
+    parser.add_argument("--lengths", default="60,250,1000,all", help="봉 개수 (all은 CSV 전체), 쉼표 구분")
+    parser.add_argument("--impl", default=",".join(IMPLEMENTATIONS), help="비교할 구현, 쉼표 구분")
+    parser.add_argument("--repeat", type=int, default=30, help="종목/길이별 측정 횟수")
+    parser.add_argument("--rsi-period", type=int, default=14)
+    parser.add_argument("--bb-period", type=int, default=20)
+    parser.add_argument("--csv-dir", default=os.getenv("PRICE_CSV_DIR", str(CSV_DIR)))
+    parser.add_argument("--json", help="결과를 저장할 JSON 경로")
+    args = parser.parse_args()
+
+    frames = load_frames(Path(args.csv_dir))
+    if not frames:
+        sys.exit(f"CSV 파일이 없습니다: {args.csv_dir}")
+    lengths = [0 if x == "all" else int(x) for x in args.lengths.split(",") if x]
+    implementations = [x for x in args.impl.split(",") if x]
+    unknown = set(implementations) - set(IMPLEMENTATIONS)
+    if unknown:
+        sys.exit(f"알 수 없는 구현: {', '.join(sorted(unknown))}")
+
+    report = run(frames, lengths, implementations, args.repeat, args.rsi_period, args.bb_period)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2, default=float)
+
+
+if __name__ == "__main__":
+    main()
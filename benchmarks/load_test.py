@@ -0,0 +1,193 @@
+#benchmarks/load_test.py
+#설명 : src/server.py 부하 테스트 - 동시 세션마다 여러 턴을 SSE로 보내 턴 지연 시간(p50/p95), 첫 토큰까지 시간,
+#       거절(429/503) 수, 초당 세션 수, 서버 CPU 초당 세션 수(= 코어당 처리 가능한 세션 수)를 보고
+#       서버의 /metrics에 있는 process_cpu_seconds_total 차이로 서버 CPU 사용량을 계산
+#실행 : python benchmarks/load_test.py --spawn --sessions 200 --concurrency 50      (가짜 LLM/CSV 시세 서버를 띄워서 측정)
+#       python benchmarks/load_test.py --url http://host:8080 --sessions 100        (실행 중인 서버 측정)
+#       python benchmarks/load_test.py --serve-offline --port 8080                 (가짜 LLM/CSV 시세로 서버만 실행)
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import uuid
+from typing import Dict, List, Optional
+
+import aiohttp
+import numpy as np
+
+from bench_e2e import SCENARIOS
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def serve_offline(args):
+    """가짜 LLM과 CSV 기반 시세로 서버 실행 (부하 테스트 대상)"""
+    from offline import fake_bedrock_client, offline_environment
+
+    with offline_environment(data_latency=args.data_latency, news_latency=args.news_latency):
+        import server
+        from aiohttp import web
+        from graph import StockAnalysisGraph
+
+        graph = StockAnalysisGraph(fake_bedrock_client(args.llm_latency))
+        web.run_app(server.create_app(graph, server.limits_from_args(args)), host=args.host, port=args.port, print=None)
+
+
+async def _cpu_seconds(client: aiohttp.ClientSession, url: str) -> Optional[float]:
+    try:
+        async with client.get(f"{url}/metrics") as resp:
+            for line in (await resp.text()).splitlines():
+                if line.startswith("process_cpu_seconds_total "):
+                    return float(line.split()[1])
+    except aiohttp.ClientError:
+        pass
+    return None
+
+
+async def _turn(client: aiohttp.ClientSession, url: str, thread_id: str, query: str, stats: Dict[str, list]):
+    started = time.perf_counter()
+    first_token = None
+    async with client.post(f"{url}/chat", json={"query": query, "thread_id": thread_id}) as resp:
+        if resp.status != 200:
+            stats["rejected"].append(resp.status)
+            await resp.read()
+            return
+        event = None
+        async for raw in resp.content:
+            line = raw.decode("utf-8").rstrip("\n")
+            if line.startswith("event: "):
+                event = line[7:]
+                if event == "token" and first_token is None:
+                    first_token = time.perf_counter() - started
+            elif line.startswith("data: ") and event == "error":
+                stats["errors"].append(json.loads(line[6:]).get("message"))
+    stats["latency"].append(time.perf_counter() - started)
+    if first_token is not None:
+        stats["first_token"].append(first_token)
+
+
+async def _session(client, url, turns, think_time, stats):
+    thread_id = str(uuid.uuid4())
+    for _ in range(turns):
+        await _turn(client, url, thread_id, random.choice(SCENARIOS)[1], stats)
+        if think_time:
+            await asyncio.sleep(random.uniform(0, 2 * think_time))
+    stats["sessions"].append(thread_id)
+
+
+async def load(url: str, sessions: int, concurrency: int, turns: int, think_time: float) -> dict:
+    stats = {"latency": [], "first_token": [], "rejected": [], "errors": [], "sessions": []}
+    semaphore = asyncio.Semaphore(concurrency)
+    timeout = aiohttp.ClientTimeout(total=None, sock_read=300)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+
+    async with aiohttp.ClientSession(timeout=timeout, connector=connector) as client:
+        cpu_before = await _cpu_seconds(client, url)
+
+        async def one():
+            async with semaphore:
+                try:
+                    await _session(client, url, turns, think_time, stats)
+                except aiohttp.ClientError as e:
+                    stats["errors"].append(str(e))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(sessions)))
+        elapsed = time.perf_counter() - started
+        cpu_after = await _cpu_seconds(client, url)
+
+    def percentiles(values: List[float]) -> Dict[str, float]:
+        if not values:
+            return {}
+        ms = np.asarray(values) * 1000
+        return {"p50_ms": round(float(np.percentile(ms, 50)), 1), "p95_ms": round(float(np.percentile(ms, 95)), 1)}
+
+    completed = len(stats["sessions"])
+    report = {
+        "sessions": completed,
+        "turns": len(stats["latency"]),
+        "rejected": {str(s): stats["rejected"].count(s) for s in sorted(set(stats["rejected"]))},
+        "errors": len(stats["errors"]),
+        "elapsed_s": round(elapsed, 2),
+        "sessions_per_s": round(completed / elapsed, 2),
+        "turns_per_s": round(len(stats["latency"]) / elapsed, 2),
+        "turn_latency": percentiles(stats["latency"]),
+        "first_token": percentiles(stats["first_token"]),
+    }
+    if cpu_before is not None and cpu_after is not None and cpu_after > cpu_before:
+        report["server_cpu_s"] = round(cpu_after - cpu_before, 2)
+        report["sessions_per_cpu_s"] = round(completed / (cpu_after - cpu_before), 2)
+    return report
+
+
+async def _wait_ready(url: str, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as client:
+        while time.monotonic() < deadline:
+            try:
+                async with client.get(f"{url}/health") as resp:
+                    if resp.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"서버가 {timeout}초 안에 준비되지 않았습니다: {url}")
+
+
+def spawn(args) -> subprocess.Popen:
+    command = [
+        sys.executable, os.path.abspath(__file__), "--serve-offline",
+        "--port", str(args.port), "--host", "127.0.0.1",
+        "--llm-latency", str(args.llm_latency),
+        "--data-latency", str(args.data_latency), "--news-latency", str(args.news_latency),
+        "--max-inflight", str(args.max_inflight), "--max-queue", str(args.max_queue),
+        "--per-session", str(args.per_session), "--queue-timeout", str(args.queue_timeout),
+    ]
+    return subprocess.Popen(command, cwd=BENCH_DIR, stdout=subprocess.DEVNULL)
+
+
+def main():
+    import server
+
+    parser = argparse.ArgumentParser(description="Stockelper 서버 부하 테스트")
+    server.add_arguments(parser)
+    parser.add_argument("--serve-offline", action="store_true", help="가짜 LLM/CSV 시세로 서버만 실행")
+    parser.add_argument("--spawn", action="store_true", help="가짜 서버를 하위 프로세스로 띄운 뒤 측정")
+    parser.add_argument("--url", help="측정할 서버 주소 (기본: http://127.0.0.1:<port>)")
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=25, help="동시에 진행하는 세션 수")
+    parser.add_argument("--turns", type=int, default=3, help="세션당 턴 수")
+    parser.add_argument("--think-time", type=float, default=0.0, help="턴 사이 평균 대기 시간 (초)")
+    parser.add_argument("--llm-latency", type=float, default=0.05)
+    parser.add_argument("--data-latency", type=float, default=0.0)
+    parser.add_argument("--news-latency", type=float, default=0.0)
+    parser.add_argument("--json", help="결과를 저장할 JSON 경로")
+    args = parser.parse_args()
+
+    if args.serve_offline:
+        serve_offline(args)
+        return
+
+    url = args.url or f"http://127.0.0.1:{args.port}"
+    process = spawn(args) if args.spawn else None
+    try:
+        asyncio.run(_wait_ready(url))
+        report = asyncio.run(load(url, args.sessions, args.concurrency, args.turns, args.think_time))
+    finally:
+        if process:
+            process.terminate()
+            process.wait()
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+#benchmarks/offline.py
+#설명 : AWS 자격 증명/인터넷 없이 그래프를 실행하기 위한 대체물
+#       ScriptedChatModel : 질문에 따라 정해진 도구 호출/답변을 돌려주는 결정적 채팅 모델 (지연 시간 설정 가능)
+#       CsvMarket         : timescale/*.csv로 yfinance Ticker/download를 흉내냄 (지수는 CSV 종목으로 합성)
+#       StaticNewsBackend : 뉴스 서비스를 네트워크 없이 고정 기사로 응답하게 함 (tools.news_service)
+#       offline_environment() : 위 대체물을 설치하고 캐시/저장소 경로를 임시 디렉터리로 돌림
+
+import asyncio
+import os
+import re
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+CSV_DIR = ROOT / "timescale"
+sys.path.insert(0, str(SRC))
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+# 합성 지수의 기준 수준 (CSV 종목 동일 가중 평균을 이 값으로 맞춤)
+INDEX_LEVELS = {
+    "^GSPC": 4500.0, "^IXIC": 14000.0, "^DJI": 35000.0, "^VIX": 18.0, "^KS11": 2500.0,
+    "XLK": 180.0, "XLF": 38.0, "XLE": 85.0, "XLV": 135.0, "XLY": 170.0,
+}
+
+COMPANY_TICKERS = {
+    "애플": "AAPL", "마이크로소프트": "MSFT", "아마존": "AMZN", "구글": "GOOGL", "메타": "META",
+    "넷플릭스": "NFLX", "엔비디아": "NVDA", "테슬라": "TSLA",
+}
+TICKER_PATTERN = re.compile(r"\b([A-Z]{2,5})\b")
+# 스크립트 모델이 주식 질문으로 보는 단어 (분류기 응답과 단일 호출 라우팅에 공통 사용)
+STOCK_WORDS = ("주가", "주식", "종목", "시장", "지수", "투자", "매수", "매도", "기술", "비교", "회사")
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text.encode("utf-8")) // 4)
+
+
+class ScriptedChatModel(BaseChatModel):
+    """
+    결정적 응답을 돌려주는 채팅 모델
+
+    - 도구가 바인딩된 호출(에이전트): 질문 키워드로 도구 하나를 고르고, 도구 결과가 오면 최종 답변
+    - 분류기 프롬프트: True/False
+    - 그 외(일반 답변, 대화 요약): 고정 문장
+    latency는 호출당 지연 시간(초)이며 output_tokens만큼 글자를 채운 답변을 만듭니다.
+    """
+
+    latency: float = 0.05
+    output_tokens: int = 120
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-fake"
+
+    def bind_tools(self, tools, **kwargs):
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], **kwargs)
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        if self.latency:
+            time.sleep(self.latency)
+        return self._result(messages, kwargs.get("tools"))
+
+    async def _agenerate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._result(messages, kwargs.get("tools"))
+
+    def _result(self, messages: List[BaseMessage], tools) -> ChatResult:
+        message = self._respond(messages, tools)
+        input_tokens = sum(_estimate_tokens(str(m.content)) for m in messages)
+        output_tokens = _estimate_tokens(str(message.content)) if message.content else 20
+        message.usage_metadata = {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _respond(self, messages: List[BaseMessage], tools) -> AIMessage:
+        system = next((str(m.content) for m in messages if isinstance(m, SystemMessage)), "")
+        query = next((str(m.content) for m in reversed(messages) if isinstance(m, HumanMessage)), "")
+
+        if tools:
+            tool_results = [m for m in messages if isinstance(m, ToolMessage)]
+            if tool_results:
+                return AIMessage(content=self._answer(f"{len(tool_results)}개 도구 결과를 바탕으로 분석한 결과입니다."))
+            if not self._is_stock_query(query):
+                # 단일 호출 라우팅: 주식과 무관한 질문은 도구 없이 바로 답변
+                return AIMessage(content=self._answer("일반 질문에 대한 답변입니다."))
+            name, args = self._choose_tool(query, {t["function"]["name"] for t in tools})
+            return AIMessage(content="", tool_calls=[{"name": name, "args": args, "id": f"call_{name}"}])
+        if "분류기" in system:
+            return AIMessage(content="True" if self._is_stock_query(query) else "False")
+        if "요약" in query[:200]:
+            return AIMessage(content="이전 대화에서 사용자는 미국 대형 기술주의 주가와 기술적 지표를 물었습니다.")
+        return AIMessage(content=self._answer("일반 질문에 대한 답변입니다."))
+
+    def _answer(self, head: str) -> str:
+        filler = "가" * max(0, self.output_tokens * 4 // 3 - len(head))
+        return f"{head} {filler}"
+
+    @staticmethod
+    def _symbols(query: str) -> List[str]:
+        symbols = [t for name, t in COMPANY_TICKERS.items() if name in query]
+        symbols += [t for t in TICKER_PATTERN.findall(query) if t not in symbols]
+        return symbols
+
+    def _is_stock_query(self, query: str) -> bool:
+        return bool(self._symbols(query)) or any(k in query for k in STOCK_WORDS)
+
+    def _choose_tool(self, query: str, available: set) -> tuple:
+        symbols = self._symbols(query) or ["AAPL"]
+        if "비교" in query and "get_batch_technical_analysis" in available:
+            return "get_batch_technical_analysis", {"symbols": symbols if len(symbols) > 1 else list(COMPANY_TICKERS.values())}
+        if "기술" in query:
+            return "get_technical_analysis", {"symbol": symbols[0]}
+        if any(k in query for k in ("추천", "매수", "매도", "투자")):
+            return "stock_advisor", {"symbol": symbols[0]}
+        if any(k in query for k in ("시장", "지수")):
+            return "get_market_data", {}
+        return "company_data", {"symbol": symbols[0]}
+
+
+class CsvMarket:
+    """timescale/*.csv를 읽어 yfinance처럼 돌려주는 시세 소스 (latency: 조회당 지연 시간)"""
+
+    PERIOD_DAYS = {"1d": 1, "5d": 5, "1mo": 31, "3mo": 92, "6mo": 183, "1y": 366, "2y": 731, "5y": 1827}
+
+    def __init__(self, csv_dir: Path = CSV_DIR, latency: float = 0.0):
+        self.csv_dir = Path(csv_dir)
+        self.latency = latency
+        self._frames: Dict[str, pd.DataFrame] = {}
+        for path in sorted(self.csv_dir.glob("*_daily.csv")):
+            symbol = path.name.split("_")[0].upper()
+            frame = pd.read_csv(path, index_col="Date")
+            # CSV는 UTC 자정 기준 일자, yfinance는 거래소 시간대 자정
+            dates = pd.to_datetime(frame.index, utc=True).tz_localize(None).normalize()
+            frame.index = pd.DatetimeIndex(dates, name="Date").tz_localize("America/New_York")
+            self._frames[symbol] = frame[["Open", "High", "Low", "Close", "Volume"]].astype("float64")
+        self._csv_symbols = list(self._frames)
+
+    def symbols(self) -> List[str]:
+        return list(self._csv_symbols)
+
+    def frame(self, symbol: str) -> pd.DataFrame:
+        symbol = symbol.upper()
+        if symbol not in self._frames and symbol in INDEX_LEVELS and self._frames:
+            self._frames[symbol] = self._synthetic(INDEX_LEVELS[symbol])
+        return self._frames.get(symbol, pd.DataFrame(columns=["Open", "High", "Low", "Close", "Volume"]))
+
+    def history(self, symbol: str, period: Optional[str] = None, start=None, interval: str = "1d", **kwargs) -> pd.DataFrame:
+        if self.latency:
+            time.sleep(self.latency)
+        frame = self.frame(symbol)
+        if frame.empty:
+            return frame.copy()
+        if start is not None:
+            return frame[frame.index >= pd.Timestamp(start).tz_localize(frame.index.tz)].copy()
+        days = self.PERIOD_DAYS.get(period or "1mo")
+        if period == "1d":
+            return frame.iloc[-1:].copy()
+        if days is None:
+            return frame.copy()
+        return frame[frame.index >= frame.index[-1] - pd.Timedelta(days=days)].copy()
+
+    def info(self, symbol: str) -> Dict[str, Any]:
+        if self.latency:
+            time.sleep(self.latency)
+        seed = sum(map(ord, symbol))
+        return {
+            "symbol": symbol,
+            "shortName": symbol,
+            "sector": "Technology",
+            "industry": "Consumer Electronics",
+            "marketCap": 1_000_000_000 * (100 + seed % 900),
+            "trailingPE": 15 + seed % 30,
+            "dividendYield": round((seed % 20) / 1000, 4),
+            "beta": round(0.8 + (seed % 10) / 10, 2),
+            "trailingEps": round(1 + (seed % 50) / 5, 2),
+        }
+
+    def download(self, tickers, period: str = "1mo", interval: str = "1d", group_by: str = "column", start=None, **kwargs) -> pd.DataFrame:
+        if isinstance(tickers, str):
+            tickers = tickers.replace(",", " ").split()
+        if self.latency:
+            time.sleep(self.latency)
+        latency, self.latency = self.latency, 0.0
+        try:
+            frames = {t: self.history(t, period=period, start=start, interval=interval) for t in tickers}
+        finally:
+            self.latency = latency
+        frame = pd.concat(frames, axis=1)
+        if group_by != "ticker":
+            frame = frame.swaplevel(0, 1, axis=1).sort_index(axis=1)
+        return frame
+
+    def _synthetic(self, level: float) -> pd.DataFrame:
+        """CSV 종목 동일 가중 평균을 지수 수준으로 맞춘 합성 시계열"""
+        closes = pd.concat({s: self._frames[s]["Close"] for s in self._csv_symbols}, axis=1).ffill().dropna()
+        normalized = (closes / closes.iloc[0]).mean(axis=1)
+        close = normalized / normalized.iloc[-1] * level
+        rng = np.random.default_rng(len(closes))
+        open_ = close.shift(1).fillna(close.iloc[0]) * (1 + rng.normal(0, 0.002, len(close)))
+        return pd.DataFrame({
+            "Open": open_,
+            "High": np.maximum(open_, close) * 1.004,
+            "Low": np.minimum(open_, close) * 0.996,
+            "Close": close,
+            "Volume": 1e9,
+        }, index=closes.index)
+
+
+class FakeTicker:
+    """yfinance.Ticker 대체물"""
+
+    def __init__(self, market: CsvMarket, symbol: str):
+        self._market = market
+        self.ticker = symbol.upper()
+
+    def history(self, period: Optional[str] = None, start=None, interval: str = "1d", **kwargs) -> pd.DataFrame:
+        return self._market.history(self.ticker, period=period, start=start, interval=interval)
+
+    @property
+    def info(self) -> Dict[str, Any]:
+        return self._market.info(self.ticker)
+
+
+@contextmanager
+def offline_environment(data_latency: float = 0.0, news_latency: float = 0.0, workdir: Optional[str] = None):
+    """
+    yfinance와 뉴스 서비스를 대체물로 바꾸고 가격 저장소, 지표 상태, 체크포인트, 도구 로그 경로를 임시 디렉터리로 돌림
+
+    CsvMarket을 돌려줍니다. 모든 src 모듈 import는 이 컨텍스트 안에서 하는 것을 권장합니다.
+    """
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        env = {
+            "PRICE_CSV_DIR": str(CSV_DIR),
+            "PRICE_STORE_DIR": os.path.join(tmp, "store"),
+            "INDICATOR_STATE_PATH": os.path.join(tmp, "indicator_state.json"),
+            "CHECKPOINT_DB_PATH": os.path.join(tmp, "checkpoints.sqlite"),
+        }
+        saved_env = {k: os.environ.get(k) for k in env}
+        os.environ.update(env)
+
+        import yfinance
+        from tools.news_service import NewsService, StaticNewsBackend, set_news_service
+
+        market = CsvMarket(latency=data_latency)
+        patches = [
+            (yfinance, "Ticker", lambda symbol, *args, **kwargs: FakeTicker(market, symbol)),
+            (yfinance, "download", market.download),
+        ]
+
+        originals = [(obj, name, getattr(obj, name)) for obj, name, _ in patches]
+        for obj, name, value in patches:
+            setattr(obj, name, value)
+        # 뉴스 검색은 고정 기사로 응답 (검색 속도 제한 없음)
+        set_news_service(NewsService(backend=StaticNewsBackend(latency=news_latency), rate=0))
+        try:
+            yield market
+        finally:
+            for obj, name, value in originals:
+                setattr(obj, name, value)
+            set_news_service(None)
+            for k, v in saved_env.items():
+                if v is None:
+                    os.environ.pop(k, None)
+                else:
+                    os.environ[k] = v
+
+
+def fake_bedrock_client(latency: float = 0.05, output_tokens: int = 120) -> SimpleNamespace:
+    """StockAnalysisGraph에 넘길 BedrockClient 대체물 (llm 속성만 사용됨)"""
+    return SimpleNamespace(llm=ScriptedChatModel(latency=latency, output_tokens=output_tokens))
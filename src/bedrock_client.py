@@ -1,45 +1,177 @@
 import os
+import threading
 import boto3
+from botocore.config import Config
 from dotenv import load_dotenv
 from langchain_aws import ChatBedrock
+from telemetry import LLMTelemetryHandler, telemetry
+
+# needs-retry 훅에서 스로틀로 집계할 오류 코드
+THROTTLE_CODES = {"ThrottlingException", "TooManyRequestsException", "ServiceUnavailableException", "ModelNotReadyException"}
+
+
+def create_bedrock_runtime(
+    session: boto3.Session,
+    region_name: str,
+    max_pool_connections: int = 32,
+    max_attempts: int = 6,
+    retry_mode: str = "adaptive",
+    connect_timeout: float = 5.0,
+    read_timeout: float = 120.0,
+):
+    """
+    연결 풀/재시도/keep-alive를 설정한 bedrock-runtime 클라이언트
+
+    max_pool_connections는 동시에 Bedrock을 호출하는 수(서버 동시 실행 수)보다 작으면 호출이 풀에서 대기합니다.
+    adaptive 재시도는 스로틀 응답을 받으면 클라이언트 쪽 전송 속도도 함께 줄입니다.
+    """
+    config = Config(
+        region_name=region_name,
+        max_pool_connections=max_pool_connections,
+        retries={"max_attempts": max_attempts, "mode": retry_mode},
+        connect_timeout=connect_timeout,
+        read_timeout=read_timeout,
+        tcp_keepalive=True,
+    )
+    return session.client(service_name="bedrock-runtime", region_name=region_name, config=config)
+
+
+class _RegionClient:
+    """리전 하나의 클라이언트와 진행 중인 호출 수"""
+
+    def __init__(self, region_name: str, client):
+        self.region_name = region_name
+        self.client = client
+        self.inflight = 0
+        self.calls = 0
+        self.throttles = 0
+        self._lock = threading.Lock()
+
+        events = client.meta.events
+        events.register("before-call.bedrock-runtime", self._before_call)
+        events.register("after-call.bedrock-runtime", self._after_call)
+        events.register("after-call-error.bedrock-runtime", self._after_call)
+        # 재시도 핸들러보다 먼저 실행되도록 맨 앞에 등록 (None을 반환하므로 재시도 판단에는 영향 없음)
+        events.register_first("needs-retry.bedrock-runtime", self._needs_retry)
+
+    def _before_call(self, **kwargs):
+        with self._lock:
+            self.inflight += 1
+            self.calls += 1
+            inflight = self.inflight
+        telemetry.metrics.set("bedrock_inflight", inflight, region=self.region_name)
+        telemetry.metrics.inc("bedrock_calls_total", region=self.region_name)
+
+    def _after_call(self, **kwargs):
+        # 스트리밍 호출은 응답 헤더를 받은 시점에 끝난 것으로 봄
+        with self._lock:
+            self.inflight -= 1
+            inflight = self.inflight
+        telemetry.metrics.set("bedrock_inflight", inflight, region=self.region_name)
+
+    def _needs_retry(self, response=None, caught_exception=None, **kwargs):
+        if response is not None:
+            code = (response[1] or {}).get("Error", {}).get("Code")
+            status = getattr(response[0], "status_code", None)
+            if code in THROTTLE_CODES or status == 429:
+                with self._lock:
+                    self.throttles += 1
+                telemetry.metrics.inc("bedrock_throttles_total", region=self.region_name, code=code or str(status))
+        elif caught_exception is not None:
+            telemetry.metrics.inc("bedrock_connection_errors_total", region=self.region_name,
+                                  error=type(caught_exception).__name__)
+        return None
+
+
+class LeastLoadedBedrockClient:
+    """
+    여러 리전의 bedrock-runtime 클라이언트를 하나처럼 쓰는 프록시
+
+    API 호출(invoke_model, converse 등)마다 진행 중인 호출이 가장 적은 리전을 고르고,
+    그 밖의 속성(meta, exceptions 등)은 첫 번째 리전 클라이언트의 것을 돌려줍니다.
+    """
+
+    def __init__(self, clients):
+        if not clients:
+            raise ValueError("리전 클라이언트가 하나 이상 필요합니다.")
+        self.clients = list(clients)
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def pick(self) -> _RegionClient:
+        with self._lock:
+            # 진행 중인 호출 수가 같으면 순서대로 돌아가며 선택
+            self._next = (self._next + 1) % len(self.clients)
+            order = self.clients[self._next:] + self.clients[:self._next]
+            return min(order, key=lambda c: c.inflight)
+
+    def __getattr__(self, name):
+        attr = getattr(self.clients[0].client, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            return getattr(self.pick().client, name)(*args, **kwargs)
+
+        return call
+
 
 class BedrockClient:
     def __init__(
         self,
-        model_id="amazon.nova-pro-v1:0"
+        model_id="amazon.nova-pro-v1:0",
+        regions=None,
+        max_pool_connections=None,
+        max_attempts=None,
+        retry_mode=None,
     ):
+        """
+        regions: 호출을 나눌 리전 목록 (기본: BEDROCK_REGIONS 또는 AWS_REGION)
+        max_pool_connections: 리전별 연결 풀 크기 (기본: BEDROCK_MAX_POOL 또는 서버 동시 실행 수)
+        """
         # 환경 변수 로드
         load_dotenv()
-        
+
         # AWS 자격 증명 설정
         self.aws_access_key_id = os.getenv('AWS_ACCESS_KEY_ID')
         self.aws_secret_access_key = os.getenv('AWS_SECRET_ACCESS_KEY')
         self.region_name = os.getenv('AWS_REGION', 'us-east-1')
-        
+
         if not all([self.aws_access_key_id, self.aws_secret_access_key]):
             raise ValueError("AWS 자격 증명이 환경 변수에 설정되어 있지 않습니다.")
 
+        if regions is None:
+            regions = [r.strip() for r in os.getenv('BEDROCK_REGIONS', self.region_name).split(',') if r.strip()]
+        if max_pool_connections is None:
+            max_pool_connections = int(os.getenv('BEDROCK_MAX_POOL', os.getenv('SERVER_MAX_INFLIGHT', '32')))
+        if max_attempts is None:
+            max_attempts = int(os.getenv('BEDROCK_MAX_ATTEMPTS', '6'))
+        if retry_mode is None:
+            retry_mode = os.getenv('BEDROCK_RETRY_MODE', 'adaptive')
+
         try:
-            # AWS 세션 생성
+            # AWS 세션 생성 (전역 기본 세션은 바꾸지 않음)
             session = boto3.Session(
                 aws_access_key_id=self.aws_access_key_id,
                 aws_secret_access_key=self.aws_secret_access_key,
                 region_name=self.region_name
             )
-            
-            # Bedrock 클라이언트 초기화
-            self.bedrock_runtime = session.client(
-                service_name='bedrock-runtime',
-                region_name=self.region_name
-            )
-            
-            # boto3 기본 자격 증명 설정
-            boto3.setup_default_session(
-                aws_access_key_id=self.aws_access_key_id,
-                aws_secret_access_key=self.aws_secret_access_key,
-                region_name=self.region_name
-            )
-            
+
+            # 리전별 Bedrock 클라이언트 초기화 (리전이 여럿이면 호출마다 가장 한가한 리전 선택)
+            self.region_clients = [
+                _RegionClient(region, create_bedrock_runtime(
+                    session, region,
+                    max_pool_connections=max_pool_connections,
+                    max_attempts=max_attempts,
+                    retry_mode=retry_mode,
+                ))
+                for region in regions
+            ]
+            if len(self.region_clients) == 1:
+                self.bedrock_runtime = self.region_clients[0].client
+            else:
+                self.bedrock_runtime = LeastLoadedBedrockClient(self.region_clients)
+
             # ChatBedrock 초기화
             self.llm = ChatBedrock(
                 model_id=model_id,
@@ -49,12 +181,20 @@ class BedrockClient:
                     "temperature": 0.7,
                     "max_tokens": 1000
                 },
-                region_name=self.region_name  # 리전 명시적 설정
+                region_name=regions[0],  # 리전 명시적 설정
+                callbacks=[LLMTelemetryHandler(model_id)]  # 호출별 지연 시간/토큰 수 기록
             )
-            
+
         except Exception as e:
             raise Exception(f"AWS 클라이언트 초기화 중 오류 발생: {str(e)}")
-    
+
+    def stats(self):
+        """리전별 진행 중인 호출 수, 누적 호출 수, 스로틀 수"""
+        return {
+            c.region_name: {"inflight": c.inflight, "calls": c.calls, "throttles": c.throttles}
+            for c in self.region_clients
+        }
+
     def chat(self, prompt: str):
         messages = [
             {
@@ -62,9 +202,9 @@ class BedrockClient:
                 "content": prompt
             }
         ]
-        
+
         try:
             response = self.llm.invoke(messages)
             return response.content
         except Exception as e:
-            return f"오류 발생: {str(e)}"
\ No newline at end of file
+            return f"오류 발생: {str(e)}"
@@ -1,10 +1,40 @@
 from typing import TypedDict, Annotated, Union, List
 from langchain_core.agents import AgentAction, AgentFinish
-import operator
+
+# chat_history에 이 값을 쓰면 기록이 비워짐
+CLEAR_CHAT_HISTORY = "__clear__"
+# intermediate_steps에 이 값을 쓰면 이전 턴의 도구 실행 기록이 비워짐 (턴 입력에 사용)
+CLEAR_INTERMEDIATE_STEPS = "__clear__"
+
+
+def append_chat_history(left: List[dict], right) -> List[dict]:
+    """chat_history 리듀서: 한 턴에 새로 생긴 메시지만 뒤에 붙임"""
+    if right == CLEAR_CHAT_HISTORY:
+        return []
+    if not isinstance(left, list):
+        # 이전 형식(포맷된 문자열)으로 저장된 상태
+        left = []
+    if not right:
+        return left
+    return left + list(right)
+
+
+def append_intermediate_steps(left: List[tuple], right) -> List[tuple]:
+    """intermediate_steps 리듀서: 같은 턴의 도구 실행 결과를 뒤에 붙이고, 새 턴은 비우고 시작"""
+    if right == CLEAR_INTERMEDIATE_STEPS:
+        return []
+    if not right:
+        return left or []
+    return (left or []) + list(right)
+
 
 class AgentState(TypedDict):
     input: str
-    chat_history: List[str]
+    chat_history: Annotated[List[dict], append_chat_history]  # 추가 전용 (턴마다 질문/답변 2개)
+    conversation_context: str  # 프롬프트에 넣을 요약 + 최근 대화 (포맷된 문자열)
     agent_outcome: Union[AgentAction, List, AgentFinish, None]
-    intermediate_steps: Annotated[List[tuple[AgentAction, str]], operator.add]
-    is_stock_related: bool
\ No newline at end of file
+    intermediate_steps: Annotated[List[tuple[AgentAction, str]], append_intermediate_steps]  # 턴마다 비움
+    is_stock_related: bool
+    classified_by: str  # 분류를 결정한 단계 (dictionary/keyword/model/llm)
+    context_summary: dict  # 오래된 대화의 누적 요약 ({"summary", "summarized_count"})
+    context_messages: List[dict]  # LLM에 그대로 보낼 요약 + 최근 대화 메시지
@@ -0,0 +1,628 @@
+import asyncio
+import atexit
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    WRITES_IDX_MAP,
+    get_checkpoint_id,
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    type TEXT,
+    checkpoint BLOB,
+    metadata_type TEXT,
+    metadata BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT,
+    value BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+CREATE TABLE IF NOT EXISTS blobs (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    channel TEXT NOT NULL,
+    version TEXT NOT NULL,
+    type TEXT,
+    blob BLOB,
+    base_version TEXT,
+    PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+);
+"""
+
+# new_versions에는 있지만 channel_values에는 없는 (비어 있는) 채널 표시
+_EMPTY = object()
+
+
+class _ThreadCache:
+    """메모리 계층에 올라와 있는 쓰레드 하나의 체크포인트 (직렬화된 상태로 보관)"""
+
+    def __init__(self):
+        # checkpoint_ns -> checkpoint_id -> (checkpoint, metadata, parent_checkpoint_id, channel_versions)
+        self.checkpoints: Dict[str, "OrderedDict[str, tuple]"] = {}
+        # (checkpoint_ns, checkpoint_id) -> (task_id, idx) -> (task_id, channel, value)
+        self.writes: Dict[Tuple[str, str], Dict[Tuple[str, int], tuple]] = {}
+        # (checkpoint_ns, channel, version) -> (value, base_version, size)
+        #   base_version가 있으면 value는 추가분이고, size는 (전체 값까지 이어진 추가분 바이트 합, 전체 값 바이트)
+        self.blobs: Dict[Tuple[str, str, str], tuple] = {}
+        # 추가 전용 채널의 마지막 값 (checkpoint_ns, channel) -> (version, value)
+        self.latest: Dict[Tuple[str, str], tuple] = {}
+        self.last_access = time.monotonic()
+
+
+class SQLiteCheckpointSaver(BaseCheckpointSaver):
+    """
+    SQLite에 저장하는 LangGraph 체크포인터
+
+    - 최근에 사용한 쓰레드만 메모리에 두고, 오래 쓰지 않은 쓰레드는 메모리에서 내립니다
+      (필요하면 SQLite에서 다시 읽음).
+    - 쓰레드/네임스페이스마다 최근 keep_last개의 체크포인트만 보관합니다.
+    - 쓰기는 모아서 batch_size개마다 또는 flush_interval초마다 한 트랜잭션으로 반영합니다.
+    - 채널 값은 체크포인트와 따로 버전별로 저장하며, 이번에 바뀐 채널(new_versions)만 씁니다.
+      append_only_channels(chat_history 등 operator.add 리듀서 채널)는 직전 버전 대비 추가분만 저장하므로
+      턴마다 추가분만 씁니다. 이어진 추가분의 바이트 합이 기준 전체 값의 max_delta_ratio배를 넘으면 전체 값을 다시
+      저장합니다. 기준 값 크기는 매번 (1 + max_delta_ratio)배씩 커지므로 전체 값을 다시 쓰는 비용을 턴에 나누면
+      턴당 저장 비용이 대화 길이와 무관하게 추가분의 약 (1 + 1/max_delta_ratio)배로 유지되고, 복원할 때 읽는 양도
+      전체 값의 (1 + max_delta_ratio)배 이하입니다. 남은 체크포인트가 닿지 않는 채널 값은 가지치기 때 삭제합니다.
+    - SQLite 읽기/쓰기는 메모리 계층 락 밖에서 하며, 비동기 메서드는 메모리에 없는 쓰레드만 스레드에서 읽습니다.
+    """
+
+    def __init__(
+        self,
+        path: str = "checkpoints.sqlite",
+        keep_last: int = 20,
+        max_threads_in_memory: int = 1000,
+        idle_ttl: float = 1800.0,
+        batch_size: int = 64,
+        flush_interval: float = 1.0,
+        append_only_channels: Iterable[str] = ("chat_history", "intermediate_steps"),
+        max_delta_ratio: float = 1.0,
+        serde=None,
+    ):
+        super().__init__(serde=serde)
+        self.path = path
+        self.keep_last = keep_last
+        self.max_threads_in_memory = max_threads_in_memory
+        self.idle_ttl = idle_ttl
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.append_only_channels = frozenset(append_only_channels)
+        self.max_delta_ratio = max_delta_ratio
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+        self._threads: "OrderedDict[str, _ThreadCache]" = OrderedDict()
+        self._pending: List[Tuple[str, tuple]] = []
+        # 메모리 계층과 대기 중인 쓰기 보호 (짧게만 잡음)
+        self._lock = threading.RLock()
+        # SQLite 연결 보호 - 배치를 꺼내서 반영할 때까지 잡아 배치가 쌓인 순서대로 반영 (항상 _lock보다 먼저 잡음)
+        self._db_lock = threading.Lock()
+        self._closed = threading.Event()
+        # 배치가 차면 flusher를 깨움
+        self._wake = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, name="checkpoint-flusher", daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+
+    # ------------------------------------------------------------------ 조회
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        with self._thread(thread_id) as cache:
+            checkpoints = cache.checkpoints.get(checkpoint_ns)
+            if not checkpoints:
+                return None
+            checkpoint_id = get_checkpoint_id(config)
+            if checkpoint_id:
+                saved = checkpoints.get(checkpoint_id)
+                if saved is None:
+                    return None
+            else:
+                checkpoint_id = max(checkpoints)
+                saved = checkpoints[checkpoint_id]
+                config = self._config(thread_id, checkpoint_ns, checkpoint_id)
+            writes = list(cache.writes.get((checkpoint_ns, checkpoint_id), {}).values())
+            return self._tuple(config, cache, thread_id, checkpoint_ns, saved, writes)
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        if config is not None:
+            thread_ids = [config["configurable"]["thread_id"]]
+            config_ns = config["configurable"].get("checkpoint_ns")
+            config_id = get_checkpoint_id(config)
+        else:
+            self.flush()
+            with self._db_lock:
+                thread_ids = [r[0] for r in self._conn.execute("SELECT DISTINCT thread_id FROM checkpoints")]
+            with self._lock:
+                # 아직 SQLite에 없는 쓰레드도 포함 (flush 후 새로 생긴 쓰레드)
+                thread_ids += [t for t in self._threads if t not in thread_ids]
+            config_ns, config_id = None, None
+        before_id = get_checkpoint_id(before) if before else None
+
+        for thread_id in thread_ids:
+            with self._thread(thread_id) as cache:
+                items = []
+                for checkpoint_ns, checkpoints in cache.checkpoints.items():
+                    if config_ns is not None and checkpoint_ns != config_ns:
+                        continue
+                    for checkpoint_id, saved in checkpoints.items():
+                        writes = list(cache.writes.get((checkpoint_ns, checkpoint_id), {}).values())
+                        items.append((checkpoint_ns, checkpoint_id, saved, writes))
+            items.sort(key=lambda item: item[1], reverse=True)
+            for checkpoint_ns, checkpoint_id, saved, writes in items:
+                if config_id and checkpoint_id != config_id:
+                    continue
+                if before_id and checkpoint_id >= before_id:
+                    continue
+                metadata = self.serde.loads_typed(saved[1])
+                if filter and not all(metadata.get(k) == v for k, v in filter.items()):
+                    continue
+                if limit is not None:
+                    if limit <= 0:
+                        return
+                    limit -= 1
+                with self._thread(thread_id) as cache:
+                    item = self._tuple(
+                        self._config(thread_id, checkpoint_ns, checkpoint_id),
+                        cache, thread_id, checkpoint_ns, saved, writes, metadata=metadata,
+                    )
+                yield item
+
+    # ------------------------------------------------------------------ 저장
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        parent_id = config["configurable"].get("checkpoint_id")
+        checkpoint = checkpoint.copy()
+        values = checkpoint.pop("channel_values", {})
+        saved = (
+            self.serde.dumps_typed(checkpoint),
+            self.serde.dumps_typed(metadata),
+            parent_id,
+            {channel: str(version) for channel, version in checkpoint["channel_versions"].items()},
+        )
+        with self._thread(thread_id) as cache:
+            for channel, version in new_versions.items():
+                self._put_blob(thread_id, cache, checkpoint_ns, channel, str(version), values.get(channel, _EMPTY))
+            checkpoints = cache.checkpoints.setdefault(checkpoint_ns, OrderedDict())
+            checkpoints[checkpoint["id"]] = saved
+            self._queue("checkpoint", (
+                thread_id, checkpoint_ns, checkpoint["id"], parent_id,
+                saved[0][0], saved[0][1], saved[1][0], saved[1][1],
+            ))
+            self._prune(thread_id, checkpoint_ns, cache)
+        return self._config(thread_id, checkpoint_ns, checkpoint["id"])
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        with self._thread(thread_id) as cache:
+            stored = cache.writes.setdefault((checkpoint_ns, checkpoint_id), {})
+            for idx, (channel, value) in enumerate(writes):
+                # 특수 채널(오류/인터럽트 등)은 고정 인덱스로 덮어쓰고, 일반 쓰기는 이미 있으면 유지
+                idx = WRITES_IDX_MAP.get(channel, idx)
+                if idx >= 0 and (task_id, idx) in stored:
+                    continue
+                typed = self.serde.dumps_typed(value)
+                stored[(task_id, idx)] = (task_id, channel, typed)
+                self._queue("write", (
+                    thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel, typed[0], typed[1],
+                ))
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            self._threads.pop(thread_id, None)
+            self._queue("delete_thread", (thread_id,))
+        self.flush()
+
+    # ------------------------------------------------------------------ 비동기
+    # 메모리에 있는 쓰레드는 짧은 락만 잡으므로 그대로 실행하고, SQLite를 읽어야 하면 스레드에서 실행
+
+    def _in_memory(self, config: Optional[RunnableConfig]) -> bool:
+        return config is not None and config["configurable"]["thread_id"] in self._threads
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        if self._in_memory(config):
+            return self.get_tuple(config)
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        if self._in_memory(config):
+            items = self.list(config, filter=filter, before=before, limit=limit)
+        else:
+            items = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        if self._in_memory(config):
+            return self.put(config, checkpoint, metadata, new_versions)
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        if self._in_memory(config):
+            return self.put_writes(config, writes, task_id, task_path)
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    # ------------------------------------------------------------------ 배치 쓰기
+
+    def flush(self) -> None:
+        """쌓인 쓰기를 한 트랜잭션으로 SQLite에 반영 (메모리 계층 락은 배치를 꺼낼 때만 잡음)"""
+        with self._db_lock:
+            with self._lock:
+                pending, self._pending = self._pending, []
+            if not pending or self._conn is None:
+                return
+            cur = self._conn.cursor()
+            cur.execute("BEGIN")
+            try:
+                for kind, row in pending:
+                    self._apply(cur, kind, row)
+                cur.execute("COMMIT")
+            except Exception:
+                cur.execute("ROLLBACK")
+                with self._lock:
+                    self._pending = pending + self._pending
+                raise
+
+    def close(self) -> None:
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self._wake.set()
+        self._flusher.join(self.flush_interval + 5.0)
+        self.flush()
+        with self._db_lock:
+            self._conn.close()
+            self._conn = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "threads_in_memory": len(self._threads),
+                "blobs_in_memory": sum(len(cache.blobs) for cache in self._threads.values()),
+                "pending_writes": len(self._pending),
+                "keep_last": self.keep_last,
+            }
+
+    def _flush_loop(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            if self._closed.is_set():
+                return
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"체크포인트 저장 실패: {str(e)}")
+            with self._lock:
+                # 요청이 없어도 유휴 쓰레드를 메모리에서 내림
+                self._evict()
+
+    def _queue(self, kind: str, row: tuple):
+        """self._lock을 잡은 상태에서 호출"""
+        if self._closed.is_set():
+            raise RuntimeError("닫힌 체크포인터에는 저장할 수 없습니다.")
+        self._pending.append((kind, row))
+        if len(self._pending) >= self.batch_size:
+            # 배치가 차면 호출한 쪽을 막지 않도록 flusher 스레드에서 반영
+            self._wake.set()
+
+    @staticmethod
+    def _apply(cur, kind: str, row: tuple):
+        if kind == "checkpoint":
+            cur.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)", row
+            )
+        elif kind == "write":
+            cur.execute(
+                "INSERT OR REPLACE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?)", row
+            )
+        elif kind == "prune":
+            thread_id, checkpoint_ns, checkpoint_id = row
+            cur.execute(
+                "DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?", row
+            )
+            cur.execute(
+                "DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?", row
+            )
+        elif kind == "blob":
+            cur.execute("INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?, ?, ?, ?)", row)
+        elif kind == "prune_blob":
+            cur.execute(
+                "DELETE FROM blobs WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?", row
+            )
+        elif kind == "delete_thread":
+            cur.execute("DELETE FROM checkpoints WHERE thread_id = ?", row)
+            cur.execute("DELETE FROM writes WHERE thread_id = ?", row)
+            cur.execute("DELETE FROM blobs WHERE thread_id = ?", row)
+
+    # ------------------------------------------------------------------ 메모리 계층
+
+    @contextmanager
+    def _thread(self, thread_id: str):
+        """
+        self._lock을 잡은 상태로 쓰레드 캐시를 제공 (없으면 락 밖에서 SQLite에서 읽어 올림)
+
+        self._lock을 잡은 상태에서 호출하면 안 됩니다 (SQLite를 읽는 동안 _db_lock을 잡음).
+        """
+        while True:
+            with self._lock:
+                cache = self._threads.get(thread_id)
+                if cache is not None:
+                    self._threads.move_to_end(thread_id)
+                    cache.last_access = time.monotonic()
+                    self._evict()
+                    yield cache
+                    return
+            loaded = self._load_thread(thread_id)
+            with self._lock:
+                # 읽는 동안 다른 호출이 먼저 올렸으면 그 캐시를 사용
+                self._threads.setdefault(thread_id, loaded)
+
+    def _load_thread(self, thread_id: str) -> _ThreadCache:
+        # 아직 반영되지 않은 쓰기가 있으면 먼저 반영해야 최신 상태를 읽을 수 있음
+        self.flush()
+        cache = _ThreadCache()
+        with self._db_lock:
+            if self._conn is None:
+                return cache
+            rows = self._conn.execute(
+                "SELECT checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata "
+                "FROM checkpoints WHERE thread_id = ? ORDER BY checkpoint_id",
+                (thread_id,),
+            ).fetchall()
+            write_rows = self._conn.execute(
+                "SELECT checkpoint_ns, checkpoint_id, task_id, idx, channel, type, value "
+                "FROM writes WHERE thread_id = ? ORDER BY task_id, idx",
+                (thread_id,),
+            ).fetchall()
+            blob_rows = self._conn.execute(
+                "SELECT checkpoint_ns, channel, version, type, blob, base_version FROM blobs WHERE thread_id = ?",
+                (thread_id,),
+            ).fetchall()
+        for ns, checkpoint_id, parent_id, type_, checkpoint, metadata_type, metadata in rows:
+            versions = self.serde.loads_typed((type_, checkpoint)).get("channel_versions", {})
+            cache.checkpoints.setdefault(ns, OrderedDict())[checkpoint_id] = (
+                (type_, checkpoint), (metadata_type, metadata), parent_id, {k: str(v) for k, v in versions.items()},
+            )
+        for ns, channel, version, type_, blob, base_version in blob_rows:
+            cache.blobs[(ns, channel, version)] = ((type_, blob), base_version, None)
+        for key in cache.blobs:
+            self._chain_size(cache, key)
+        for ns, checkpoint_id, task_id, idx, channel, type_, value in write_rows:
+            cache.writes.setdefault((ns, checkpoint_id), {})[(task_id, idx)] = (task_id, channel, (type_, value))
+        return cache
+
+    @staticmethod
+    def _chain_size(cache: _ThreadCache, key: Tuple[str, str, str]) -> Tuple[int, int]:
+        """
+        blob에서 전체 값까지 이어진 (추가분 바이트 합, 전체 값 바이트) - SQLite에서 읽은 blob은 처음 물을 때 계산
+
+        전체 값이 없는 끊긴 체인은 추가분 바이트 합을 무한대로 보아 다음 버전이 전체 값으로 저장되게 합니다.
+        """
+        chain = []
+        size = (0, 0)
+        while True:
+            entry = cache.blobs.get(key)
+            if entry is None:
+                size = (float("inf"), 0)
+                break
+            typed, base_version, cached = entry
+            if cached is not None:
+                size = cached
+                break
+            if base_version is None:
+                size = (0, len(typed[1]))
+                cache.blobs[key] = (typed, base_version, size)
+                break
+            chain.append(key)
+            key = (key[0], key[1], base_version)
+        for key in reversed(chain):
+            typed, base_version, _ = cache.blobs[key]
+            size = (size[0] + len(typed[1]), size[1])
+            cache.blobs[key] = (typed, base_version, size)
+        return size
+
+    def _prune(self, thread_id: str, checkpoint_ns: str, cache: _ThreadCache):
+        """최근 keep_last개만 남기고 오래된 체크포인트와 남은 체크포인트가 닿지 않는 채널 값 삭제"""
+        checkpoints = cache.checkpoints[checkpoint_ns]
+        if len(checkpoints) <= self.keep_last:
+            return
+        for checkpoint_id in sorted(checkpoints)[: len(checkpoints) - self.keep_last]:
+            checkpoints.pop(checkpoint_id)
+            cache.writes.pop((checkpoint_ns, checkpoint_id), None)
+            self._queue("prune", (thread_id, checkpoint_ns, checkpoint_id))
+
+        # 남은 체크포인트의 채널 버전에서 base를 따라가며 닿는 blob만 유지
+        reachable = set()
+        for saved in checkpoints.values():
+            for channel, version in saved[3].items():
+                key = (checkpoint_ns, channel, version)
+                while key not in reachable:
+                    entry = cache.blobs.get(key)
+                    if entry is None:
+                        break
+                    reachable.add(key)
+                    if entry[1] is None:
+                        break
+                    key = (checkpoint_ns, channel, entry[1])
+        for key in [key for key in cache.blobs if key[0] == checkpoint_ns and key not in reachable]:
+            del cache.blobs[key]
+            self._queue("prune_blob", (thread_id,) + key)
+
+    def _put_blob(self, thread_id: str, cache: _ThreadCache, checkpoint_ns: str, channel: str, version: str, value):
+        """
+        채널 값 한 버전 저장 (추가 전용 채널은 직전 버전 대비 추가분만)
+
+        이어진 추가분의 바이트 합이 기준 전체 값의 max_delta_ratio배를 넘게 되면 전체 값을 저장해 새 기준으로 삼습니다.
+        """
+        base_version, stored, size = None, value, None
+        if value is _EMPTY:
+            typed, size = ("empty", b""), (0, 0)
+        else:
+            if channel in self.append_only_channels and isinstance(value, list):
+                latest = cache.latest.get((checkpoint_ns, channel))
+                if latest is not None and latest[0] != version:
+                    previous = latest[1]
+                    n = len(previous)
+                    # 직전 값 전체가 앞부분으로 그대로 있을 때만 추가분으로 저장 (초기화/수정이면 전체 저장)
+                    # 리듀서가 이어 붙인 리스트는 같은 객체를 담고 있어 원소 비교가 동일성 확인으로 끝남
+                    base_key = (checkpoint_ns, channel, latest[0])
+                    if 0 < n <= len(value) and base_key in cache.blobs and value[:n] == previous:
+                        delta_bytes, base_bytes = self._chain_size(cache, base_key)
+                        delta = self.serde.dumps_typed(value[n:])
+                        if delta_bytes + len(delta[1]) <= base_bytes * self.max_delta_ratio:
+                            base_version, stored = latest[0], delta
+                            size = (delta_bytes + len(delta[1]), base_bytes)
+                cache.latest[(checkpoint_ns, channel)] = (version, value)
+            typed = stored if base_version is not None else self.serde.dumps_typed(stored)
+            if size is None:
+                size = (0, len(typed[1]))
+        cache.blobs[(checkpoint_ns, channel, version)] = (typed, base_version, size)
+        self._queue("blob", (thread_id, checkpoint_ns, channel, version, typed[0], typed[1], base_version))
+
+    def _load_blob(self, cache: _ThreadCache, checkpoint_ns: str, channel: str, version: str):
+        """채널 값 복원 (추가분이면 base 버전까지 따라가며 이어 붙임), 값이 없으면 _EMPTY"""
+        latest = cache.latest.get((checkpoint_ns, channel))
+        if latest is not None and latest[0] == version:
+            return list(latest[1])
+        deltas, start_version = [], version
+        while True:
+            entry = cache.blobs.get((checkpoint_ns, channel, version))
+            if entry is None:
+                return _EMPTY
+            typed, base_version, _ = entry
+            if typed[0] == "empty":
+                return _EMPTY
+            if base_version is None:
+                value = self.serde.loads_typed(typed)
+                break
+            deltas.append(self.serde.loads_typed(typed))
+            version = base_version
+        if deltas:
+            value = list(value)
+            for delta in reversed(deltas):
+                value.extend(delta)
+        if channel in self.append_only_channels and latest is None and isinstance(value, list):
+            # 다시 읽어 온 쓰레드도 다음 저장부터 추가분만 쓰도록 기준값으로 기억
+            cache.latest[(checkpoint_ns, channel)] = (start_version, value)
+            return list(value)
+        return value
+
+    def _evict(self):
+        """메모리 계층 크기 제한과 유휴 시간 초과 쓰레드 제거 (데이터는 SQLite에 남음)"""
+        now = time.monotonic()
+        while self._threads:
+            thread_id, cache = next(iter(self._threads.items()))
+            if len(self._threads) > self.max_threads_in_memory or now - cache.last_access > self.idle_ttl:
+                del self._threads[thread_id]
+            else:
+                break
+
+    # ------------------------------------------------------------------ 변환
+
+    @staticmethod
+    def _config(thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> RunnableConfig:
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint_id,
+            }
+        }
+
+    def _tuple(
+        self,
+        config: RunnableConfig,
+        cache: _ThreadCache,
+        thread_id: str,
+        checkpoint_ns: str,
+        saved: tuple,
+        writes: List[tuple],
+        metadata: Optional[CheckpointMetadata] = None,
+    ) -> CheckpointTuple:
+        checkpoint_typed, metadata_typed, parent_id, versions = saved
+        checkpoint = self.serde.loads_typed(checkpoint_typed)
+        values = checkpoint.setdefault("channel_values", {})
+        for channel, version in versions.items():
+            value = self._load_blob(cache, checkpoint_ns, channel, version)
+            if value is not _EMPTY:
+                values[channel] = value
+        return CheckpointTuple(
+            config=config,
+            checkpoint=checkpoint,
+            metadata=metadata if metadata is not None else self.serde.loads_typed(metadata_typed),
+            parent_config=self._config(thread_id, checkpoint_ns, parent_id) if parent_id else None,
+            pending_writes=[(task_id, channel, self.serde.loads_typed(value)) for task_id, channel, value in writes],
+        )
@@ -0,0 +1,145 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def estimate_tokens(text: str) -> int:
+    """토큰 수 추정 (UTF-8 바이트 4개당 1토큰, 한글은 글자당 약 0.75토큰)"""
+    return (len(text.encode("utf-8")) + 3) // 4
+
+
+class ConversationContextManager:
+    """
+    대화 기록을 프롬프트에 넣을 수 있는 크기로 제한
+
+    최근 max_recent_turns 턴은 그대로 두고, 그보다 오래된 메시지는 요약 하나로 접습니다.
+    요약 상태({"summary", "summarized_count"})는 쓰레드 상태에 저장되어 다음 턴에 재사용되며,
+    창 밖으로 밀려난 메시지가 summarize_every 턴 이상 쌓였을 때만 LLM으로 요약을 갱신합니다.
+    """
+
+    SUMMARY_PROMPT = """다음은 사용자와 주식 분석 AI의 대화입니다.
+기존 요약과 새 대화를 합쳐 이후 대화에 필요한 사실(언급된 종목, 수치, 사용자의 관심사와 결정)만 남긴 요약을 작성하세요.
+요약은 {max_tokens}토큰을 넘지 않아야 하며, 요약문만 출력하세요.
+
+기존 요약:
+{summary}
+
+새 대화:
+{conversation}"""
+
+    def __init__(
+        self,
+        llm=None,
+        max_recent_turns: int = 4,
+        token_budget: int = 2000,
+        max_summary_tokens: int = 400,
+        summarize_every: int = 2,
+    ):
+        self.llm = llm
+        self.max_recent_turns = max_recent_turns
+        self.token_budget = token_budget
+        self.max_summary_tokens = max_summary_tokens
+        self.summarize_every = summarize_every
+
+    def build(
+        self, chat_history: List[dict], summary_state: Optional[Dict[str, Any]] = None
+    ) -> Tuple[List[dict], Dict[str, Any]]:
+        """(그대로 보낼 최근 메시지, 갱신된 요약 상태)"""
+        recent, pending, state = self._split(chat_history, summary_state)
+        if pending:
+            state = self._fold(state, pending, self._summarize(state["summary"], pending))
+        return recent, state
+
+    async def abuild(
+        self, chat_history: List[dict], summary_state: Optional[Dict[str, Any]] = None
+    ) -> Tuple[List[dict], Dict[str, Any]]:
+        """build()의 비동기 버전"""
+        recent, pending, state = self._split(chat_history, summary_state)
+        if pending:
+            state = self._fold(state, pending, await self._asummarize(state["summary"], pending))
+        return recent, state
+
+    def to_messages(self, recent: List[dict], summary_state: Dict[str, Any]) -> List[dict]:
+        """LLM 메시지 형식 (요약은 system 메시지로 앞에 붙임)"""
+        messages = []
+        if summary_state.get("summary"):
+            messages.append({"role": "system", "content": f"이전 대화 요약: {summary_state['summary']}"})
+        return messages + list(recent)
+
+    def _split(
+        self, chat_history: List[dict], summary_state: Optional[Dict[str, Any]]
+    ) -> Tuple[List[dict], List[dict], Dict[str, Any]]:
+        """(최근 메시지, 이번에 요약할 메시지, 기존 요약 상태)로 분리"""
+        history = chat_history if isinstance(chat_history, list) else []
+        state = dict(summary_state or {"summary": "", "summarized_count": 0})
+        if state["summarized_count"] > len(history):
+            # 대화 기록이 초기화된 경우
+            state = {"summary": "", "summarized_count": 0}
+
+        unsummarized = history[state["summarized_count"]:]
+        keep = self.max_recent_turns * 2
+        # 토큰 예산을 넘으면 최근 창도 줄임 (최소 1턴은 유지)
+        budget = self.token_budget - estimate_tokens(state["summary"])
+        while keep > 2 and sum(estimate_tokens(m["content"]) for m in unsummarized[-keep:]) > budget:
+            keep -= 2
+
+        overflow = len(unsummarized) - keep
+        if overflow <= 0:
+            return unsummarized, [], state
+        if overflow < self.summarize_every * 2 and not self._over_budget(unsummarized, budget):
+            # 밀려난 메시지가 아직 적고 예산 안이면 요약을 미루고 그대로 보냄
+            return unsummarized, [], state
+        return unsummarized[overflow:], unsummarized[:overflow], state
+
+    def _over_budget(self, messages: List[dict], budget: int) -> bool:
+        return sum(estimate_tokens(m["content"]) for m in messages) > budget
+
+    def _fold(self, state: Dict[str, Any], pending: List[dict], summary: str) -> Dict[str, Any]:
+        return {"summary": summary, "summarized_count": state["summarized_count"] + len(pending)}
+
+    def _summary_messages(self, summary: str, pending: List[dict]) -> List[dict]:
+        conversation = "\n".join(
+            f"{'사용자' if m['role'] == 'user' else 'AI'}: {m['content']}" for m in pending
+        )
+        prompt = self.SUMMARY_PROMPT.format(
+            max_tokens=self.max_summary_tokens,
+            summary=summary or "없음",
+            conversation=conversation,
+        )
+        return [{"role": "user", "content": prompt}]
+
+    def _summarize(self, summary: str, pending: List[dict]) -> str:
+        if self.llm is None:
+            return self._fallback_summary(summary, pending)
+        try:
+            response = self.llm.invoke(self._summary_messages(summary, pending))
+            return self._clip(response.content if hasattr(response, "content") else str(response))
+        except Exception as e:
+            print(f"대화 요약 실패: {str(e)}")
+            return self._fallback_summary(summary, pending)
+
+    async def _asummarize(self, summary: str, pending: List[dict]) -> str:
+        if self.llm is None:
+            return self._fallback_summary(summary, pending)
+        try:
+            response = await self.llm.ainvoke(self._summary_messages(summary, pending))
+            return self._clip(response.content if hasattr(response, "content") else str(response))
+        except Exception as e:
+            print(f"대화 요약 실패: {str(e)}")
+            return self._fallback_summary(summary, pending)
+
+    def _fallback_summary(self, summary: str, pending: List[dict]) -> str:
+        """LLM 없이 만드는 요약 (메시지별 앞부분만 남김)"""
+        lines = [summary] if summary else []
+        for m in pending:
+            role = "사용자" if m["role"] == "user" else "AI"
+            lines.append(f"{role}: {m['content'][:80]}")
+        return self._clip("\n".join(lines), keep_tail=True)
+
+    def _clip(self, text: str, keep_tail: bool = False) -> str:
+        """요약을 max_summary_tokens 이내로 자름"""
+        text = text.strip()
+        max_bytes = self.max_summary_tokens * 4
+        encoded = text.encode("utf-8")
+        if len(encoded) <= max_bytes:
+            return text
+        clipped = encoded[-max_bytes:] if keep_tail else encoded[:max_bytes]
+        return clipped.decode("utf-8", errors="ignore").strip()
@@ -1,74 +1,117 @@
 from langchain_core.agents import AgentFinish, AgentAction
 from langgraph.prebuilt.tool_executor import ToolExecutor
-from typing import Dict, Any
-from datetime import datetime
+from typing import Dict, Any, Optional
+import asyncio
+import time
+from telemetry import telemetry, traced
+from .tool_usage_log import ToolUsageLog
 
 class Node:
-    def __init__(self, tool_runnable, toolkit, query_classifier):
+    def __init__(
+        self,
+        tool_runnable,
+        toolkit,
+        query_classifier,
+        max_tool_concurrency: int = 4,
+        tool_timeout: float = 30.0,
+        tool_timeouts: Optional[Dict[str, float]] = None,
+        tool_usage_log: Optional[ToolUsageLog] = None
+    ):
         self.tool_runnable = tool_runnable
         self.tool_executor = ToolExecutor(toolkit)
         self.query_classifier = query_classifier
-        self.tool_usage_log = []  # 도구 사용 로그 저장
-
-    def log_tool_usage(self, tool_name: str, input_data: str, output_data: str):
-        """도구 사용 로깅"""
-        log_entry = {
-            "timestamp": datetime.now().isoformat(),
-            "tool": tool_name,
-            "input": input_data,
-            "output": output_data
-        }
-        self.tool_usage_log.append(log_entry)
-        print(f"\n[도구 사용 로그]")
-        print(f"도구: {tool_name}")
-        print(f"입력: {input_data}")
-        print(f"출력: {output_data[:200]}..." if len(str(output_data)) > 200 else f"출력: {output_data}")
-        print("-" * 50)
+        self.tool_usage_log = tool_usage_log if tool_usage_log is not None else ToolUsageLog()  # 최근 도구 사용 기록
+        # 한 단계에서 동시에 실행할 도구 호출 수와 도구별 제한 시간(초)
+        self.max_tool_concurrency = max_tool_concurrency
+        self.tool_timeout = tool_timeout
+        self.tool_timeouts = tool_timeouts or {}
 
+    def log_tool_usage(
+        self,
+        tool_name: str,
+        input_data: str,
+        output_data: str,
+        thread_id: Optional[str] = None,
+        duration_ms: Optional[float] = None,
+        status: str = "ok"
+    ):
+        """도구 사용 로깅 (링 버퍼에 저장, 파일 기록은 백그라운드에서 처리)"""
+        self.tool_usage_log.record(tool_name, input_data, output_data, thread_id, duration_ms, status)
+
+    @traced("classifier", kind="node")
     def classify_query(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """쿼리를 분류하고 상태에 저장"""
-        is_stock_related = self.query_classifier.classify_query(state["input"])
-        return {"is_stock_related": is_stock_related}
+        result = self.query_classifier.classify(state["input"])
+        _record_classification(result)
+        return {"is_stock_related": result.is_stock_related, "classified_by": result.tier}
+
+    @traced("classifier", kind="node")
+    async def aclassify_query(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """classify_query의 비동기 버전"""
+        result = await self.query_classifier.aclassify(state["input"])
+        _record_classification(result)
+        return {"is_stock_related": result.is_stock_related, "classified_by": result.tier}
 
     def route_query(self, state: Dict[str, Any]) -> str:
         """분류 결과에 따라 다음 노드 결정"""
         return "STOCK" if state["is_stock_related"] else "GENERAL"
 
+    @traced("general_response", kind="node")
     def handle_general_query(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """일반 질문 처리"""
-        chat_history = state.get("chat_history", [])
         response = self.query_classifier.get_general_response(
-            state["input"], 
-            chat_history
+            state["input"],
+            state.get("context_messages", [])
         )
-        
-        return {
-            "agent_outcome": AgentFinish(return_values={"output": response}, log=""),
-            "chat_history": chat_history
-        }
 
+        return self._finish_turn(state, AgentFinish(return_values={"output": response}, log=""))
+
+    @traced("general_response", kind="node")
+    async def ahandle_general_query(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """handle_general_query의 비동기 버전"""
+        response = await self.query_classifier.aget_general_response(
+            state["input"],
+            state.get("context_messages", [])
+        )
+
+        return self._finish_turn(state, AgentFinish(return_values={"output": response}, log=""))
+
+    @traced("agent", kind="node")
     def run_tool_agent(self, state):
         """도구 사용 에이전트 실행"""
-        print("\n[에이전트 실행]")
-        print(f"입력: {state['input']}")
-        
-        chat_history = state.get("chat_history", [])
         agent_outcome = self.tool_runnable.invoke(state)
-        
-        return {
-            "agent_outcome": agent_outcome,
-            "chat_history": chat_history
-        }
 
-    def execute_tools(self, state):
+        return self._finish_turn(state, agent_outcome)
+
+    @traced("agent", kind="node")
+    async def arun_tool_agent(self, state):
+        """run_tool_agent의 비동기 버전"""
+        agent_outcome = await self.tool_runnable.ainvoke(state)
+
+        return self._finish_turn(state, agent_outcome)
+
+    @staticmethod
+    def _finish_turn(state: Dict[str, Any], agent_outcome) -> Dict[str, Any]:
+        """최종 답변이면 이번 턴의 질문/답변 두 메시지만 chat_history에 추가"""
+        update = {"agent_outcome": agent_outcome}
+        if isinstance(agent_outcome, AgentFinish):
+            update["chat_history"] = [
+                {"role": "user", "content": state["input"]},
+                {"role": "assistant", "content": agent_outcome.return_values.get("output", "")},
+            ]
+        return update
+
+    @traced("action", kind="node")
+    def execute_tools(self, state, config=None):
         agent_action = state["agent_outcome"]
         steps = []
+        thread_id = _thread_id(config)
         
         if not isinstance(agent_action, list):
             agent_action = [agent_action]
             
         for action in agent_action:
-            print(f"\n[도구 실행] {action.tool} 실행 시작")
+            started = time.perf_counter()
             output = self.tool_executor.invoke(action)
             steps.append((action, str(output)))
             
@@ -76,13 +119,81 @@ class Node:
             self.log_tool_usage(
                 tool_name=action.tool,
                 input_data=str(action.tool_input),
-                output_data=str(output)
+                output_data=str(output),
+                thread_id=thread_id,
+                duration_ms=(time.perf_counter() - started) * 1000,
+                status=_output_status(output)
             )
             
         return {"intermediate_steps": steps}
 
+    @traced("action", kind="node")
+    async def aexecute_tools(self, state, config=None):
+        """여러 도구 호출을 제한된 동시성으로 병렬 실행 (결과는 호출 순서대로 기록)"""
+        agent_action = state["agent_outcome"]
+        thread_id = _thread_id(config)
+        
+        if not isinstance(agent_action, list):
+            agent_action = [agent_action]
+            
+        semaphore = asyncio.Semaphore(self.max_tool_concurrency)
+        
+        async def run_action(action):
+            timeout = self.tool_timeouts.get(action.tool, self.tool_timeout)
+            async with semaphore:
+                started = time.perf_counter()
+                status = "ok"
+                try:
+                    output = await asyncio.wait_for(self.tool_executor.ainvoke(action), timeout=timeout)
+                    status = _output_status(output)
+                except asyncio.TimeoutError:
+                    output = {"error": f"{action.tool} 도구 실행 시간 초과 ({timeout}초)"}
+                    status = "timeout"
+                except Exception as e:
+                    output = {"error": f"{action.tool} 도구 실행 중 오류 발생: {str(e)}"}
+                    status = "error"
+                duration_ms = (time.perf_counter() - started) * 1000
+            output = str(output)
+            
+            # 도구 사용 로깅
+            self.log_tool_usage(
+                tool_name=action.tool,
+                input_data=str(action.tool_input),
+                output_data=output,
+                thread_id=thread_id,
+                duration_ms=duration_ms,
+                status=status
+            )
+            return action, output
+        
+        steps = await asyncio.gather(*(run_action(action) for action in agent_action))
+            
+        return {"intermediate_steps": list(steps)}
+
     @staticmethod
     def should_continue(data):
         if isinstance(data["agent_outcome"], AgentFinish):
             return "END"
-        return "CONTINUE"
\ No newline at end of file
+        return "CONTINUE"
+
+
+def _output_status(output) -> str:
+    """도구가 오류를 결과로 돌려준 경우({"error": ...})도 로그에는 error로 기록"""
+    return "error" if isinstance(output, dict) and "error" in output else "ok"
+
+
+def _record_classification(result):
+    """분류 결과를 classifier 구간 속성과 판단 단계별 카운터로 기록"""
+    span = telemetry.current_span()
+    if span is not None:
+        span.set(stock_related=result.is_stock_related, tier=result.tier, confidence=result.confidence)
+    telemetry.metrics.inc(
+        "query_classifications_total", tier=result.tier, stock_related=str(result.is_stock_related).lower()
+    )
+
+
+def _thread_id(config) -> Optional[str]:
+    """노드에 전달된 RunnableConfig의 thread_id"""
+    if not config:
+        return None
+    return config.get("configurable", {}).get("thread_id")
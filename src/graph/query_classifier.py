@@ -1,13 +1,180 @@
-from typing import List
+import re
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from .response_cache import ResponseCache
+
+
+# 한글 회사명 뒤에 붙을 수 있는 조사
+_PARTICLES = ("은", "는", "이", "가", "을", "를", "의", "에", "와", "과", "도", "만", "로", "으로", "랑", "처럼", "보다")
+
+
+def _name_pattern(name: str, suffixes: Iterable[str]) -> "re.Pattern":
+    """
+    회사명 매칭 패턴 - 앞은 단어 경계, 뒤는 영문이면 단어 경계이고 한글이면 조사나 suffixes(주가 등)만 허용
+
+    "intelligence", "pineapple", "메타버스"처럼 회사명을 포함한 다른 단어는 매칭하지 않습니다.
+    """
+    if name.isascii():
+        return re.compile(rf"(?<![a-z0-9가-힣]){re.escape(name)}(?![a-z0-9])")
+    allowed = "|".join(re.escape(s) for s in sorted({*_PARTICLES, *suffixes}, key=len, reverse=True))
+    return re.compile(rf"(?<![a-z0-9가-힣]){re.escape(name)}(?:(?![가-힣])|(?={allowed}))")
+
+
+def _count_keywords(text: str, keywords: Iterable[str]) -> int:
+    """키워드 등장 개수 (영문은 단어 경계, 한글은 조사가 붙으므로 부분 문자열로 비교)"""
+    count = 0
+    for keyword in keywords:
+        if keyword.isascii():
+            if re.search(rf"(?<![a-z0-9]){re.escape(keyword)}(?![a-z0-9])", text):
+                count += 1
+        elif keyword in text:
+            count += 1
+    return count
+
+
+class ClassificationResult(NamedTuple):
+    is_stock_related: bool
+    confidence: float
+    tier: str  # 판단한 단계: "dictionary", "keyword", "model", "llm"
+
+
+class LocalQueryClassifier:
+    """
+    LLM 호출 없이 프로세스 안에서 판단하는 분류기
+
+    1) 티커/회사명 사전 매칭 2) 금융 키워드 점수 3) (선택) 작은 분류 모델 순으로 시도하고,
+    확신도가 낮으면 confidence를 낮게 돌려 LLM 분류기로 넘기게 합니다.
+    키워드 점수는 금융 키워드가 두 개 이상일 때만 확신하며, 하나뿐이면("체질량지수" 등) LLM에 맡깁니다.
+    """
+
+    TICKERS = {
+        "AAPL", "MSFT", "AMZN", "GOOGL", "GOOG", "META", "NFLX", "NVDA", "TSLA",
+        "AMD", "INTC", "AVGO", "QCOM", "TSM", "ORCL", "CRM", "ADBE", "IBM",
+        "JPM", "BAC", "WFC", "GS", "V", "BRK.B", "KO", "PEP", "WMT",
+        "COST", "DIS", "NKE", "PLTR", "COIN", "UBER", "SPY", "QQQ", "DIA", "SOXL", "TQQQ",
+    }
+    COMPANY_NAMES = {
+        "애플": "AAPL", "apple": "AAPL",
+        "마이크로소프트": "MSFT", "microsoft": "MSFT",
+        "아마존": "AMZN", "amazon": "AMZN",
+        "구글": "GOOGL", "알파벳": "GOOGL", "google": "GOOGL", "alphabet": "GOOGL",
+        "메타": "META", "페이스북": "META", "facebook": "META",
+        "넷플릭스": "NFLX", "netflix": "NFLX",
+        "엔비디아": "NVDA", "nvidia": "NVDA",
+        "테슬라": "TSLA", "tesla": "TSLA",
+        "인텔": "INTC", "intel": "INTC",
+        "브로드컴": "AVGO", "broadcom": "AVGO",
+        "팔란티어": "PLTR", "palantir": "PLTR",
+        "삼성전자": "005930.KS", "sk하이닉스": "000660.KS",
+    }
+    STRONG_KEYWORDS = (
+        "주가", "주식", "종목", "매수", "매도", "시가총액", "배당", "per", "eps", "rsi", "macd",
+        "볼린저", "이동평균", "골든크로스", "데드크로스", "나스닥", "nasdaq", "s&p", "다우", "dow jones",
+        "코스피", "kospi", "코스닥", "지수", "증시", "stock", "ticker", "etf", "목표주가", "기술적 분석",
+        "m7", "빅테크", "상장", "공매도", "차트",
+    )
+    WEAK_KEYWORDS = (
+        "투자", "시장", "전망", "실적", "재무", "금리", "수익률", "거래량", "변동성", "포트폴리오",
+        "트레이딩", "단타", "장기투자", "손절", "익절", "상승", "하락", "market", "invest", "earnings",
+    )
+    GENERAL_KEYWORDS = (
+        "날씨", "레시피", "요리", "번역", "영화 추천", "노래", "여행", "맛집", "운동", "시 써", "농담",
+        "안녕", "고마워", "weather", "recipe", "translate", "poem", "joke",
+    )
+
+    TICKER_PATTERN = re.compile(r"(?<![A-Za-z])\$?([A-Z]{1,5}(?:\.[A-Z])?)(?![A-Za-z])")
+
+    def __init__(
+        self,
+        model: Optional[Callable[[str], Tuple[bool, float]]] = None,
+        extra_tickers: Iterable[str] = (),
+        extra_company_names: Optional[Dict[str, str]] = None,
+    ):
+        self.model = model
+        self.tickers = self.TICKERS | {t.upper() for t in extra_tickers}
+        self.company_names = {**self.COMPANY_NAMES, **{k.lower(): v for k, v in (extra_company_names or {}).items()}}
+        # "애플주가", "테슬라주식"처럼 한글 회사명 바로 뒤에 붙는 금융 키워드도 허용
+        suffixes = [k for k in self.STRONG_KEYWORDS + self.WEAK_KEYWORDS if not k.isascii()]
+        self._name_patterns = [_name_pattern(name, suffixes) for name in self.company_names]
+
+    def classify(self, query: str) -> ClassificationResult:
+        text = query.lower()
+
+        # 1) 티커/회사명 사전 매칭
+        for match in self.TICKER_PATTERN.finditer(query):
+            token = match.group(1)
+            if token in self.tickers and (len(token) > 1 or match.group(0).startswith("$")):
+                return ClassificationResult(True, 0.95, "dictionary")
+        for pattern in self._name_patterns:
+            if pattern.search(text):
+                return ClassificationResult(True, 0.9, "dictionary")
+
+        # 2) 금융 키워드 점수
+        strong = _count_keywords(text, self.STRONG_KEYWORDS)
+        weak = _count_keywords(text, self.WEAK_KEYWORDS)
+        general = _count_keywords(text, self.GENERAL_KEYWORDS)
+        score = 0.45 * strong + 0.2 * weak - 0.4 * general
+        if strong and strong + weak >= 2 and score >= 0.45:
+            return ClassificationResult(True, round(min(0.6 + score / 2, 0.95), 2), "keyword")
+        if general and not strong and not weak:
+            return ClassificationResult(False, round(min(0.7 + 0.1 * general, 0.9), 2), "keyword")
+
+        # 3) 선택적 분류 모델
+        if self.model is not None:
+            try:
+                label, probability = self.model(query)
+                return ClassificationResult(bool(label), float(probability), "model")
+            except Exception as e:
+                print(f"로컬 분류 모델 실행 실패: {str(e)}")
+
+        # 판단 근거가 약하면 낮은 확신도로 반환 (LLM으로 넘어감)
+        return ClassificationResult(score > 0, round(min(abs(score), 0.5), 2), "keyword")
+
 
 class QueryClassifier:
-    def __init__(self, llm):
+    def __init__(
+        self,
+        llm,
+        local_classifier: Optional[LocalQueryClassifier] = None,
+        confidence_threshold: float = 0.8,
+        response_cache: Optional[ResponseCache] = None,
+    ):
         self.llm = llm
+        self.local_classifier = local_classifier if local_classifier is not None else LocalQueryClassifier()
+        self.confidence_threshold = confidence_threshold
+        # 일반 질문 답변 캐시 (None이면 매번 LLM 호출)
+        self.response_cache = response_cache
         
+    def classify(self, query: str) -> ClassificationResult:
+        """
+        로컬 분류기로 먼저 판단하고, 확신도가 낮을 때만 LLM 분류기를 호출합니다.
+        """
+        if self.local_classifier is not None:
+            result = self.local_classifier.classify(query)
+            if result.confidence >= self.confidence_threshold:
+                return result
+        return ClassificationResult(self._classify_with_llm(query), 1.0, "llm")
+
     def classify_query(self, query: str) -> bool:
         """
         쿼리가 주식 관련 질문인지 판단합니다.
         """
+        return self.classify(query).is_stock_related
+
+    async def aclassify(self, query: str) -> ClassificationResult:
+        """
+        classify()의 비동기 버전 (LLM 호출 시 이벤트 루프를 막지 않음)
+        """
+        if self.local_classifier is not None:
+            result = self.local_classifier.classify(query)
+            if result.confidence >= self.confidence_threshold:
+                return result
+        return ClassificationResult(await self._aclassify_with_llm(query), 1.0, "llm")
+
+    async def aclassify_query(self, query: str) -> bool:
+        return (await self.aclassify(query)).is_stock_related
+
+    def _classification_messages(self, query: str) -> List[dict]:
         system_prompt = """당신은 사용자의 질문이 주식/금융 시장 관련 질문인지 판단하는 분류기입니다.
         다음과 같은 주제들이 포함되면 주식 관련 질문으로 판단하세요:
         - 특정 회사의 주가나 정보 요청
@@ -19,20 +186,23 @@ class QueryClassifier:
         True 또는 False로만 답변하세요.
         """
         
-        messages = [
+        return [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": f"다음 질문이 주식/금융 시장 관련 질문인가요?: {query}"}
         ]
-        
-        response = self.llm.invoke(messages)
-        # AIMessage 객체에서 content 추출
-        response_text = response.content if hasattr(response, 'content') else str(response)
-        return 'true' in response_text.lower()
 
-    def get_general_response(self, query: str, chat_history: List[dict] = None) -> str:
+    def _classify_with_llm(self, query: str) -> bool:
         """
-        일반적인 질문에 대한 응답을 생성합니다.
+        LLM으로 쿼리가 주식 관련 질문인지 판단합니다.
         """
+        response = self.llm.invoke(self._classification_messages(query))
+        return _parse_classification(response)
+
+    async def _aclassify_with_llm(self, query: str) -> bool:
+        response = await self.llm.ainvoke(self._classification_messages(query))
+        return _parse_classification(response)
+
+    def _general_messages(self, query: str, chat_history: List[dict] = None) -> List[dict]:
         messages = [
             {"role": "system", "content": "당신은 친절하고 지식이 풍부한 AI 어시스턴트입니다. 이전 대화 내용을 참고하여 일관성 있게 답변해주세요."},
         ]
@@ -42,7 +212,41 @@ class QueryClassifier:
             messages.extend(chat_history)
             
         messages.append({"role": "user", "content": query})
-        
-        response = self.llm.invoke(messages)
+        return messages
+
+    def get_general_response(self, query: str, chat_history: List[dict] = None) -> str:
+        """
+        일반적인 질문에 대한 응답을 생성합니다.
+
+        같은 질문/이전 대화/모델 설정의 답변이 캐시에 있으면 LLM을 호출하지 않습니다.
+        """
+        if self.response_cache is not None:
+            cached = self.response_cache.get(query, chat_history, self.llm)
+            if cached is not None:
+                return cached
+        response = self.llm.invoke(self._general_messages(query, chat_history))
         # AIMessage 객체에서 content 추출
-        return response.content if hasattr(response, 'content') else str(response)
\ No newline at end of file
+        content = response.content if hasattr(response, 'content') else str(response)
+        if self.response_cache is not None:
+            self.response_cache.put(query, chat_history, self.llm, content)
+        return content
+
+    async def aget_general_response(self, query: str, chat_history: List[dict] = None) -> str:
+        """
+        get_general_response()의 비동기 버전
+        """
+        if self.response_cache is not None:
+            cached = self.response_cache.get(query, chat_history, self.llm)
+            if cached is not None:
+                return cached
+        response = await self.llm.ainvoke(self._general_messages(query, chat_history))
+        content = response.content if hasattr(response, 'content') else str(response)
+        if self.response_cache is not None:
+            self.response_cache.put(query, chat_history, self.llm, content)
+        return content
+
+
+def _parse_classification(response) -> bool:
+    # AIMessage 객체에서 content 추출
+    response_text = response.content if hasattr(response, 'content') else str(response)
+    return 'true' in response_text.lower()
@@ -0,0 +1,204 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from telemetry import telemetry
+
+_SPACES = re.compile(r"\s+")
+_TRAILING = re.compile(r"[\s?!.。,~]+$")
+
+
+def normalize_query(query: str) -> str:
+    """대소문자/전각 문자/공백/끝 문장부호 차이를 없앤 질문"""
+    text = unicodedata.normalize("NFKC", query).lower().strip()
+    return _TRAILING.sub("", _SPACES.sub(" ", text))
+
+
+def history_digest(messages: Optional[List[dict]]) -> str:
+    """프롬프트에 들어가는 이전 대화(요약 포함)의 해시 - 대화가 없으면 빈 문자열"""
+    if not messages:
+        return ""
+    data = json.dumps(
+        [(m.get("role"), m.get("content")) for m in messages], ensure_ascii=False, separators=(",", ":")
+    )
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()[:32]
+
+
+def model_signature(llm) -> str:
+    """응답에 영향을 주는 모델 설정 (모델 ID와 생성 파라미터)"""
+    params = {
+        "model": getattr(llm, "model_id", None) or getattr(llm, "model_name", None) or type(llm).__name__,
+        "kwargs": getattr(llm, "model_kwargs", None) or {},
+    }
+    return json.dumps(params, sort_keys=True, default=str)
+
+
+def _trigrams(text: str) -> Set[str]:
+    text = f"  {text} "
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class ResponseCache:
+    """
+    일반 질문 답변 캐시 (정규화한 질문 + 이전 대화 해시 + 모델 설정을 키로 사용)
+
+    메모리에는 TTL과 LRU 한도로 최근 항목만 두고, path를 주면 SQLite에도 기록해 재시작 후에도 재사용합니다.
+    similarity_threshold를 주면 키가 정확히 같지 않아도 이전 대화/모델이 같고 질문의 글자 3-gram
+    Jaccard 유사도가 기준 이상인 항목을 답변으로 사용합니다 (메모리 항목만 비교).
+    """
+
+    KIND = "llm_response"
+
+    def __init__(
+        self,
+        capacity: int = 1000,
+        ttl: float = 3600.0,
+        path: Optional[str] = None,
+        similarity_threshold: Optional[float] = None,
+    ):
+        self.capacity = capacity
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        # key -> (response, expires_at, normalized query, bucket)
+        self._entries: "OrderedDict[str, Tuple[str, float, str, Tuple[str, str]]]" = OrderedDict()
+        # 유사도 검색용: (이전 대화 해시, 모델 설정) -> 3-gram -> keys
+        self._index: Dict[Tuple[str, str], Dict[str, Set[str]]] = {}
+        self._lock = threading.Lock()
+        self._stats = Counter()
+        self._conn = None
+        if path:
+            self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, query TEXT, history TEXT, model TEXT, response TEXT, expires_at REAL)"
+            )
+            self._conn.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+
+    @staticmethod
+    def key(query: str, messages: Optional[List[dict]], llm) -> Tuple[str, str, Tuple[str, str]]:
+        """(캐시 키, 정규화한 질문, (이전 대화 해시, 모델 설정))"""
+        normalized = normalize_query(query)
+        bucket = (history_digest(messages), model_signature(llm))
+        key = hashlib.sha256("\x1f".join((normalized,) + bucket).encode("utf-8")).hexdigest()
+        return key, normalized, bucket
+
+    def get(self, query: str, messages: Optional[List[dict]], llm) -> Optional[str]:
+        key, normalized, bucket = self.key(query, messages, llm)
+        with self._lock:
+            response = self._get_memory(key)
+            if response is None and self.similarity_threshold:
+                response = self._get_similar(normalized, bucket)
+            if response is None and self._conn is not None:
+                response = self._get_persistent(key, normalized, bucket)
+            self._count("hits" if response is not None else "misses")
+        return response
+
+    def put(self, query: str, messages: Optional[List[dict]], llm, response: str):
+        if not response or self.ttl <= 0:
+            return
+        key, normalized, bucket = self.key(query, messages, llm)
+        with self._lock:
+            self._store(key, response, time.time() + self.ttl, normalized, bucket)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, normalized, bucket[0], bucket[1], response, time.time() + self.ttl),
+                )
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._index.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM responses")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits, misses = self._stats["hits"], self._stats["misses"]
+            return {
+                "entries": len(self._entries),
+                "capacity": self.capacity,
+                "hit_rate": round(hits / (hits + misses), 4) if (hits + misses) else 0.0,
+                **self._stats,
+            }
+
+    def _get_memory(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= time.time():
+            self._remove(key)
+            self._count("expired")
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def _get_similar(self, normalized: str, bucket: Tuple[str, str]) -> Optional[str]:
+        index = self._index.get(bucket)
+        if not index:
+            return None
+        grams = _trigrams(normalized)
+        overlap = Counter()
+        for gram in grams:
+            for key in index.get(gram, ()):
+                overlap[key] += 1
+        best_key, best_score = None, 0.0
+        for key, shared in overlap.items():
+            other = _trigrams(self._entries[key][2])
+            score = shared / (len(grams) + len(other) - shared)
+            if score > best_score:
+                best_key, best_score = key, score
+        if best_key is None or best_score < self.similarity_threshold:
+            return None
+        response = self._get_memory(best_key)
+        if response is not None:
+            self._count("similar")
+        return response
+
+    def _get_persistent(self, key: str, normalized: str, bucket: Tuple[str, str]) -> Optional[str]:
+        row = self._conn.execute(
+            "SELECT response, expires_at FROM responses WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        if row is None:
+            return None
+        # 다음 조회부터는 메모리에서 응답
+        self._store(key, row[0], row[1], normalized, bucket)
+        self._count("persistent")
+        return row[0]
+
+    def _store(self, key: str, response: str, expires_at: float, normalized: str, bucket: Tuple[str, str]):
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (response, expires_at, normalized, bucket)
+        if self.similarity_threshold:
+            index = self._index.setdefault(bucket, {})
+            for gram in _trigrams(normalized):
+                index.setdefault(gram, set()).add(key)
+        while len(self._entries) > self.capacity:
+            self._remove(next(iter(self._entries)))
+            self._count("evictions")
+
+    def _remove(self, key: str):
+        _, _, normalized, bucket = self._entries.pop(key)
+        index = self._index.get(bucket)
+        if index is None:
+            return
+        for gram in _trigrams(normalized):
+            keys = index.get(gram)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del index[gram]
+        if not index:
+            del self._index[bucket]
+
+    def _count(self, name: str):
+        self._stats[name] += 1
+        telemetry.count_cache(self.KIND, name)
@@ -1,52 +1,111 @@
 from langgraph.graph import StateGraph, END
 from langchain.agents import create_tool_calling_agent
-from typing import List, Dict, Any
-from langgraph.checkpoint.memory import MemorySaver
+import os
+from typing import List, Dict, Any, Optional
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langchain_core.agents import AgentFinish
+from langchain_core.runnables import RunnableLambda
 
 from tools.company_data_tool import CompanyDataTool
 from tools.market_data_tool import MarketDataTool 
 from tools.technical_tool import TechnicalAnalysisTool
+from tools.batch_technical_tool import BatchTechnicalAnalysisTool
 from tools.stock_advisor_tool import StockAdvisorTool
-from .agent_state import AgentState
+from tools.company_news_tool import CompanyNewsTool
+from .agent_state import AgentState, CLEAR_CHAT_HISTORY, CLEAR_INTERMEDIATE_STEPS
 from .prompt import create_prompt_template
 from .node import Node
 from .query_classifier import QueryClassifier
+from .response_cache import ResponseCache
+from .context_manager import ConversationContextManager
+from .checkpoint_store import SQLiteCheckpointSaver
+from .tool_usage_log import ToolUsageLog
+from telemetry import telemetry, format_trace
+
+def create_toolkit() -> list:
+    """에이전트에 등록하는 도구 목록"""
+    return [CompanyDataTool(), MarketDataTool(), TechnicalAnalysisTool(), BatchTechnicalAnalysisTool(), StockAdvisorTool(), CompanyNewsTool()]
+
 
 class StockAnalysisGraph:
-    def __init__(self, bedrock_client):
+    def __init__(
+        self,
+        bedrock_client,
+        max_recent_turns: int = 4,
+        context_token_budget: int = 2000,
+        checkpointer: Optional[BaseCheckpointSaver] = None,
+        routing: Optional[str] = None,
+    ):
+        # 라우팅 방식 - "classifier": 분류 후 에이전트/일반 응답 (기본)
+        #               "agent": 분류 단계 없이 에이전트가 첫 호출에서 도구 사용 여부를 정함 (턴당 LLM 왕복 1회 절약)
+        self.routing = routing or os.getenv("GRAPH_ROUTING", "classifier")
+        if self.routing not in ("classifier", "agent"):
+            raise ValueError(f"지원하지 않는 라우팅 방식입니다: {self.routing}")
         self.llm = bedrock_client.llm
-        self.toolkit = [CompanyDataTool(), MarketDataTool(), TechnicalAnalysisTool(), StockAdvisorTool()]
-        self.query_classifier = QueryClassifier(self.llm)
+        self.toolkit = create_toolkit()
+        # 반복되는 일반 질문은 LLM 호출 없이 캐시에서 답변 (RESPONSE_CACHE_PATH를 지정하면 재시작 후에도 유지)
+        similarity = os.getenv("RESPONSE_CACHE_SIMILARITY")
+        self.response_cache = ResponseCache(
+            capacity=int(os.getenv("RESPONSE_CACHE_SIZE", "1000")),
+            ttl=float(os.getenv("RESPONSE_CACHE_TTL", "3600")),
+            path=os.getenv("RESPONSE_CACHE_PATH"),
+            similarity_threshold=float(similarity) if similarity else None,
+        )
+        self.query_classifier = QueryClassifier(self.llm, response_cache=self.response_cache)
+        # 최근 대화만 그대로 보내고 오래된 대화는 요약으로 압축
+        self.context_manager = ConversationContextManager(
+            self.llm,
+            max_recent_turns=max_recent_turns,
+            token_budget=context_token_budget
+        )
         self.node_functions = None
-        self.memory = MemorySaver()
+        # 최근 도구 호출만 메모리에 보관 (TOOL_USAGE_LOG_PATH를 지정하면 JSON Lines 파일로도 기록)
+        self.tool_usage_log = ToolUsageLog(sink_path=os.getenv("TOOL_USAGE_LOG_PATH"))
+        # 대화 상태는 SQLite에 저장되어 프로세스를 재시작해도 이어집니다 (다른 체크포인터로 교체 가능)
+        self.memory = checkpointer if checkpointer is not None else SQLiteCheckpointSaver(
+            path=os.getenv("CHECKPOINT_DB_PATH", "checkpoints.sqlite"),
+            keep_last=int(os.getenv("CHECKPOINT_KEEP_LAST", "20")),
+        )
         self.app = self._build_graph()
 
     def _build_graph(self):
-        tool_calling_prompt = create_prompt_template()
+        tool_calling_prompt = create_prompt_template(single_call=self.routing == "agent")
         tool_runnable = create_tool_calling_agent(self.llm, self.toolkit, prompt=tool_calling_prompt)
-        self.node_functions = Node(tool_runnable, self.toolkit, self.query_classifier)
+        self.node_functions = Node(
+            tool_runnable, self.toolkit, self.query_classifier, tool_usage_log=self.tool_usage_log
+        )
         
         workflow = StateGraph(AgentState)
         
-        # 쿼리 분류 노드 추가
-        workflow.add_node("classifier", self.node_functions.classify_query)
-        workflow.add_node("agent", self.node_functions.run_tool_agent)
-        workflow.add_node("action", self.node_functions.execute_tools)
-        workflow.add_node("general_response", self.node_functions.handle_general_query)
-        
-        # 시작점을 classifier로 변경
-        workflow.set_entry_point("classifier")
-        
-        # 조건부 엣지 추가
-        workflow.add_conditional_edges(
-            "classifier",
-            self.node_functions.route_query,
-            {
-                "STOCK": "agent",
-                "GENERAL": "general_response"
-            }
-        )
+        # 모든 노드는 동기/비동기 실행을 모두 지원 (ainvoke에서는 LLM 호출이 이벤트 루프를 막지 않고,
+        # 도구 호출은 병렬 실행)
+        nodes = self.node_functions
+        workflow.add_node("agent", RunnableLambda(nodes.run_tool_agent, afunc=nodes.arun_tool_agent))
+        workflow.add_node("action", RunnableLambda(nodes.execute_tools, afunc=nodes.aexecute_tools))
+
+        if self.routing == "agent":
+            # 에이전트가 바로 시작 (도구 호출 없이 답하면 일반 질문으로 끝남)
+            workflow.set_entry_point("agent")
+        else:
+            # 쿼리 분류 노드 추가
+            workflow.add_node("classifier", RunnableLambda(nodes.classify_query, afunc=nodes.aclassify_query))
+            workflow.add_node("general_response", RunnableLambda(nodes.handle_general_query, afunc=nodes.ahandle_general_query))
+
+            # 시작점을 classifier로 변경
+            workflow.set_entry_point("classifier")
+
+            # 조건부 엣지 추가
+            workflow.add_conditional_edges(
+                "classifier",
+                self.node_functions.route_query,
+                {
+                    "STOCK": "agent",
+                    "GENERAL": "general_response"
+                }
+            )
+
+            # 일반 응답 노드에서 종료
+            workflow.add_edge("general_response", END)
         
         workflow.add_edge("action", "agent")
         
@@ -59,97 +118,164 @@ class StockAnalysisGraph:
             }
         )
         
-        # 일반 응답 노드에서 종료
-        workflow.add_edge("general_response", END)
-        
-        # MemorySaver를 체크포인터로 설정하여 그래프 컴파일
+        # 체크포인터를 설정하여 그래프 컴파일
         return workflow.compile(checkpointer=self.memory)
 
-    def get_tool_usage_log(self):
-        """도구 사용 로그를 반환하는 메서드"""
-        if self.node_functions:
-            return self.node_functions.tool_usage_log
-        return []
+    def get_tool_usage_log(self, thread_id: str = None, limit: int = None) -> List[Dict[str, Any]]:
+        """도구 사용 로그를 반환하는 메서드 (thread_id를 주면 해당 대화의 기록만)"""
+        return self.tool_usage_log.entries(thread_id=thread_id, limit=limit)
+
+    def get_traces(self, thread_id: str = None, limit: int = None) -> List[Dict[str, Any]]:
+        """최근 턴별 실행 구간 트리 (thread_id를 주면 해당 대화의 턴만)"""
+        return telemetry.recent_traces(limit=limit, thread_id=thread_id)
+
+    def format_traces(self, thread_id: str = None, limit: int = 3) -> str:
+        """최근 턴의 구간 트리를 텍스트로 표시"""
+        return "\n\n".join(format_trace(trace) for trace in self.get_traces(thread_id, limit))
+
+    def get_metrics(self) -> str:
+        """Prometheus 텍스트 형식의 지표 (구간별 지연 시간 히스토그램, 토큰 수, 캐시 hit/miss)"""
+        return telemetry.render_prometheus()
 
-    def format_chat_history(self, chat_history):
-        """채팅 기록을 문자열로 포맷팅"""
+    def get_metrics_summary(self) -> Dict[str, Any]:
+        """지표 요약 (카운터 값, 히스토그램별 호출 수/합계/평균)"""
+        return telemetry.metrics.snapshot()
+
+    def format_chat_history(self, chat_history, summary: str = ""):
+        """채팅 기록을 문자열로 포맷팅 (요약이 있으면 앞에 붙임)"""
         if not isinstance(chat_history, list):
             # 문자열이 들어온 경우 그대로 반환
             return chat_history
         
-        if not chat_history:
+        if not chat_history and not summary:
             return "이전 대화 없음"
         
-        formatted = []
+        formatted = [f"이전 대화 요약: {summary}"] if summary else []
         for msg in chat_history:
             role = "사용자" if msg["role"] == "user" else "AI"
             formatted.append(f"{role}: {msg['content']}")
         return "\n".join(formatted)
 
     async def run(self, query: str, thread_id: str, stream: bool = False):
-        config = {"configurable": {"thread_id": thread_id}}
+        """
+        질문을 처리하고 응답을 생성합니다.
+
+        stream=False이면 최종 응답 문자열 하나를 yield합니다.
+        stream=True이면 진행 상황을 dict 이벤트로 yield합니다:
+            {"type": "node", "node": 노드 이름}                        노드 실행 시작
+            {"type": "tool", "tool": 도구 이름, "status": "start"|"end"}  도구 실행
+            {"type": "token", "node": 노드 이름, "content": 토큰}        답변 토큰 (도착하는 대로)
+            {"type": "reset", "node": 노드 이름}                       직전에 보낸 이 노드 토큰 취소
+                (에이전트 단계가 도구 호출로 밝혀진 경우 - 그 단계의 토큰은 답변이 아님)
+            {"type": "final", "content": 최종 응답}
+        """
+        # 턴 전체를 추적 (노드/도구/LLM/외부 조회 구간이 하위 span으로 기록됨)
+        with telemetry.turn(thread_id, query):
+            config = {"configurable": {"thread_id": thread_id}}
         
-        try:
-            current_state = self.app.get_state(config).values
-            chat_history = current_state.get("chat_history", [])
-        except:
-            chat_history = []
+            try:
+                current_state = (await self.app.aget_state(config)).values
+                chat_history = current_state.get("chat_history", [])
+                context_summary = current_state.get("context_summary")
+            except:
+                chat_history = []
+                context_summary = None
 
-        input_state = {
-            "input": query,
-            "chat_history": self.format_chat_history(chat_history),
-            "is_stock_related": False,
-            "agent_outcome": None,
-            "intermediate_steps": []
-        }
+            # 최근 대화 + 누적 요약으로 프롬프트 크기 제한 (요약은 쓰레드 상태에 캐시)
+            with telemetry.span("context", "internal"):
+                recent_messages, context_summary = await self.context_manager.abuild(chat_history, context_summary)
 
-        try:
-            result = await self.app.ainvoke(input_state, config=config)
+            # chat_history는 추가 전용 채널이므로 입력에 넣지 않음 (답변 노드가 이번 턴 메시지만 추가)
+            input_state = {
+                "input": query,
+                "conversation_context": self.format_chat_history(recent_messages, context_summary["summary"]),
+                "context_summary": context_summary,
+                "context_messages": self.context_manager.to_messages(recent_messages, context_summary),
+                "is_stock_related": False,
+                "agent_outcome": None,
+                "intermediate_steps": CLEAR_INTERMEDIATE_STEPS
+            }
+
+            try:
+                if stream:
+                    # 진행 중인 에이전트 단계의 상태 (토큰을 보냈는지, 도구 호출 단계인지)
+                    step: Dict[str, bool] = {}
+                    async for event in self.app.astream_events(input_state, config=config, version="v2"):
+                        for progress in self._progress_events(event, step):
+                            yield progress
+                    result = (await self.app.aget_state(config)).values
+                else:
+                    result = await self.app.ainvoke(input_state, config=config)
             
-            if isinstance(result, dict):
-                # agent_outcome이 최상위에 있는 경우
-                if 'agent_outcome' in result:
-                    agent_outcome = result['agent_outcome']
-                    if isinstance(agent_outcome, AgentFinish):
-                        response = agent_outcome.return_values.get('output', '')
-                        if response:
-                            # 직렬화 가능한 형태로 상태 업데이트
-                            updated_state = {
-                                "input": query,
-                                "chat_history": chat_history if isinstance(chat_history, list) else [],
-                                "is_stock_related": False,
-                                "agent_outcome": {
-                                    "return_values": {"output": response}
-                                }
-                            }
-                            self.app.update_state(config, updated_state)
-                            yield response
-                            return
-                
-                # general_response에 있는 경우
-                if 'general_response' in result:
-                    agent_outcome = result['general_response'].get('agent_outcome')
-                    if isinstance(agent_outcome, AgentFinish):
-                        response = agent_outcome.return_values.get('output', '')
-                        if response:
-                            # 직렬화 가능한 형태로 상태 업데이트
-                            updated_state = {
-                                "input": query,
-                                "chat_history": chat_history if isinstance(chat_history, list) else [],
-                                "is_stock_related": False,
-                                "agent_outcome": {
-                                    "return_values": {"output": response}
-                                }
-                            }
-                            self.app.update_state(config, updated_state)
-                            yield response
-                            return
+                response = self._extract_response(result)
+                if response:
+                    yield {"type": "final", "content": response} if stream else response
                     
-        except Exception as e:
-            print(f"\nDEBUG - Error in run: {str(e)}")
-            raise e
+            except Exception as e:
+                print(f"\nDEBUG - Error in run: {str(e)}")
+                raise e
+
+    @staticmethod
+    def _extract_response(result) -> str:
+        """그래프 실행 결과에서 최종 응답 추출"""
+        if not isinstance(result, dict):
+            return ""
+        # agent_outcome이 최상위에 있는 경우
+        agent_outcome = result.get('agent_outcome')
+        # general_response에 있는 경우
+        if not isinstance(agent_outcome, AgentFinish) and isinstance(result.get('general_response'), dict):
+            agent_outcome = result['general_response'].get('agent_outcome')
+        if isinstance(agent_outcome, AgentFinish):
+            return agent_outcome.return_values.get('output', '')
+        return ""
+
+    # 답변 토큰을 스트리밍하는 노드 (classifier의 LLM 출력은 True/False이므로 제외)
+    STREAMING_NODES = ("agent", "general_response")
+    # 도구 호출 단계일 수 있는 노드 (토큰은 바로 보내고, 도구 호출로 밝혀지면 reset 이벤트로 취소)
+    TOOL_CALLING_NODES = ("agent",)
+
+    def _progress_events(self, event: Dict[str, Any], step: Dict[str, bool]):
+        """
+        astream_events 이벤트를 run(stream=True)의 진행 이벤트로 변환 (0개 이상)
 
-    def get_chat_history(self, thread_id: str) -> List[str]:
+        에이전트 단계의 토큰도 도착하는 대로 보냅니다. 단계에 도구 호출 조각(tool_call_chunks)이 나오거나
+        단계가 AgentFinish가 아닌 결과로 끝나면 이미 보낸 토큰을 reset 이벤트로 취소하고, 그 단계의 나머지 텍스트는 보내지 않습니다.
+        step은 run() 한 번 동안 유지하는 상태 ({"streamed", "tool_call"}).
+        """
+        kind = event.get("event")
+        metadata = event.get("metadata", {})
+        node = metadata.get("langgraph_node")
+        is_node = bool(node) and event.get("name") == node
+
+        if kind == "on_chain_start" and is_node:
+            if node in self.TOOL_CALLING_NODES:
+                step.clear()
+            yield {"type": "node", "node": node}
+        elif kind == "on_chain_end" and is_node and node in self.TOOL_CALLING_NODES:
+            output = event.get("data", {}).get("output")
+            finished = isinstance(output, dict) and isinstance(output.get("agent_outcome"), AgentFinish)
+            if not finished and step.get("streamed") and not step.get("tool_call"):
+                yield {"type": "reset", "node": node}
+            step.clear()
+        elif kind == "on_tool_start":
+            yield {"type": "tool", "tool": event.get("name"), "status": "start"}
+        elif kind == "on_tool_end":
+            yield {"type": "tool", "tool": event.get("name"), "status": "end"}
+        elif kind == "on_chat_model_stream" and node in self.STREAMING_NODES:
+            chunk = event["data"].get("chunk")
+            if node in self.TOOL_CALLING_NODES:
+                if getattr(chunk, "tool_call_chunks", None) and not step.get("tool_call"):
+                    step["tool_call"] = True
+                    if step.get("streamed"):
+                        yield {"type": "reset", "node": node}
+                if step.get("tool_call"):
+                    return
+            content = _chunk_text(chunk)
+            if content:
+                step["streamed"] = True
+                yield {"type": "token", "node": node, "content": content}
+
+    def get_chat_history(self, thread_id: str) -> List[dict]:
         """특정 쓰레드의 대화 기록 조회"""
         config = {"configurable": {"thread_id": thread_id}}
         try:
@@ -163,47 +289,49 @@ class StockAnalysisGraph:
         config = {"configurable": {"thread_id": thread_id}}
         empty_state = {
             "input": "",
-            "chat_history": [],
+            "chat_history": CLEAR_CHAT_HISTORY,
+            "context_summary": None,
             "is_stock_related": False,
             "agent_outcome": None,
-            "intermediate_steps": []
+            "intermediate_steps": CLEAR_INTERMEDIATE_STEPS
         }
         self.app.update_state(config, empty_state)
 
-    def stream(self, query: str, chat_history: List[str] = None):
-        if chat_history is None:
-            chat_history = []
+    def stream(self, query: str, chat_history: List[dict] = None):
         return self.app.stream({
             "input": query,
-            "chat_history": chat_history,
+            "conversation_context": self.format_chat_history(chat_history or []),
             "is_stock_related": False,
             "agent_outcome": None,
-            "intermediate_steps": []
+            "intermediate_steps": CLEAR_INTERMEDIATE_STEPS
         })
 
     def update_chat_history(self, thread_id: str, query: str, response: str):
-        """채팅 기록 업데이트"""
+        """
+        그래프 밖에서 만든 질문/답변을 대화 기록에 추가
+
+        run()은 답변 노드에서 이미 기록을 추가하므로 run() 결과에 대해 다시 호출하지 않습니다.
+        """
         config = {"configurable": {"thread_id": thread_id}}
         try:
-            current_state = self.app.get_state(config).values
-            chat_history = current_state.get("chat_history", [])
-            
-            # 리스트가 아닌 경우 새로운 리스트 생성
-            if not isinstance(chat_history, list):
-                chat_history = []
-            
-            # 새로운 메시지 추가
-            chat_history.extend([
-                {"role": "user", "content": query},
-                {"role": "assistant", "content": response}
-            ])
-            
-            updated_state = {
-                "input": query,
-                "chat_history": chat_history,  # 리스트 형태의 채팅 기록
-                "is_stock_related": False,
-                "agent_outcome": {"return_values": {"output": response}}
-            }
-            self.app.update_state(config, updated_state)
+            self.app.update_state(config, {
+                "chat_history": [
+                    {"role": "user", "content": query},
+                    {"role": "assistant", "content": response}
+                ]
+            })
         except Exception as e:
-            print(f"채팅 기록 업데이트 중 오류 발생: {e}")
\ No newline at end of file
+            print(f"채팅 기록 업데이트 중 오류 발생: {e}")
+
+
+def _chunk_text(chunk) -> str:
+    """AIMessageChunk의 텍스트 (content가 블록 리스트인 모델도 처리)"""
+    content = getattr(chunk, "content", "")
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(
+            block.get("text", "") if isinstance(block, dict) else str(block)
+            for block in content
+        )
+    return ""
@@ -0,0 +1,126 @@
+import atexit
+import hashlib
+import json
+import queue
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+
+def _truncate(text: str, limit: int) -> str:
+    if limit is None or len(text) <= limit:
+        return text
+    return f"{text[:limit]}... ({len(text) - limit}자 생략)"
+
+
+class JsonlSink:
+    """
+    로그 항목을 백그라운드 스레드에서 JSON Lines 파일에 기록
+
+    put()은 큐에 넣기만 하며, 큐가 가득 차면 기다리지 않고 항목을 버립니다 (dropped로 집계).
+    """
+
+    def __init__(self, path: str, max_queue: int = 10000, flush_interval: float = 1.0):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._queue: "queue.Queue[Optional[dict]]" = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, name="tool-usage-sink", daemon=True)
+        self._thread.start()
+
+    def put(self, entry: dict):
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self, timeout: float = 5.0):
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _run(self):
+        with open(self.path, "a", encoding="utf-8") as f:
+            while True:
+                try:
+                    entry = self._queue.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    f.flush()
+                    continue
+                if entry is None:
+                    break
+                try:
+                    f.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+                except Exception as e:
+                    print(f"도구 사용 로그 기록 실패: {str(e)}")
+            f.flush()
+
+
+class ToolUsageLog:
+    """
+    최근 capacity개의 도구 호출만 보관하는 링 버퍼
+
+    출력은 max_output_chars까지만 남기고 전체 길이와 해시(sha256 앞 16자리)를 함께 기록합니다.
+    sink_path를 주면 모든 항목을 JSON Lines 파일로도 내보냅니다.
+    """
+
+    def __init__(self, capacity: int = 500, max_output_chars: int = 500, sink_path: Optional[str] = None):
+        self.max_output_chars = max_output_chars
+        self._entries: deque = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self.sink = JsonlSink(sink_path) if sink_path else None
+        if self.sink is not None:
+            # 종료 시 큐에 남은 항목까지 파일에 기록
+            atexit.register(self.close)
+
+    def record(
+        self,
+        tool_name: str,
+        input_data: Any,
+        output_data: Any,
+        thread_id: Optional[str] = None,
+        duration_ms: Optional[float] = None,
+        status: str = "ok",
+    ) -> Dict[str, Any]:
+        output = str(output_data)
+        entry = {
+            "timestamp": datetime.now().isoformat(),
+            "thread_id": thread_id,
+            "tool": tool_name,
+            "status": status,
+            "duration_ms": None if duration_ms is None else round(duration_ms, 1),
+            "input": _truncate(str(input_data), self.max_output_chars),
+            "output": _truncate(output, self.max_output_chars),
+            "output_chars": len(output),
+            "output_sha256": hashlib.sha256(output.encode("utf-8")).hexdigest()[:16],
+        }
+        with self._lock:
+            self._entries.append(entry)
+        if self.sink is not None:
+            self.sink.put(entry)
+        return entry
+
+    def entries(self, thread_id: Optional[str] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """기록된 항목 (thread_id를 주면 해당 쓰레드만, limit을 주면 최근 limit개)"""
+        with self._lock:
+            entries = list(self._entries)
+        if thread_id is not None:
+            entries = [e for e in entries if e["thread_id"] == thread_id]
+        return entries[-limit:] if limit else entries
+
+    def clear(self, thread_id: Optional[str] = None):
+        with self._lock:
+            if thread_id is None:
+                self._entries.clear()
+            else:
+                kept = [e for e in self._entries if e["thread_id"] != thread_id]
+                self._entries.clear()
+                self._entries.extend(kept)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def close(self):
+        sink, self.sink = self.sink, None
+        if sink is not None:
+            sink.close()
@@ -1,19 +1,22 @@
 from bedrock_client import BedrockClient
 from graph import StockAnalysisGraph
+from tools.market_data_tool import get_market_refresher
 from pprint import pprint
 import uuid
 from langchain_core.agents import AgentFinish
 
 class ChatSession:
-    def __init__(self, graph, thread_id=None):
+    def __init__(self, graph, thread_id=None, stream=True):
         self.graph = graph
         self.thread_id = thread_id or str(uuid.uuid4())
+        self.stream = stream  # True이면 답변 토큰을 도착하는 대로 출력
     
     async def run(self):
         print(f"\n=== 새로운 채팅 세션 시작 (Thread ID: {self.thread_id}) ===")
         print("AI 챗봇입니다. 주식 관련 질문과 일반적인 질문 모두 답변 가능합니다.")
         print("'종료'를 입력하면 대화가 종료됩니다.")
         print("'로그'를 입력하면 도구 사용 기록을 확인할 수 있습니다.")
+        print("'성능'을 입력하면 최근 답변의 단계별 소요 시간과 지표를 확인할 수 있습니다.")
         print("'기록'을 입력하면 현재 대화 기록을 확인할 수 있습니다.")
         print("'초기화'를 입력하면 대화 기록이 초기화됩니다.")
         
@@ -26,7 +29,14 @@ class ChatSession:
                 
             if user_input.lower() == '로그':
                 print("\n=== 도구 사용 로그 ===")
-                pprint(self.graph.get_tool_usage_log())
+                pprint(self.graph.get_tool_usage_log(self.thread_id))
+                continue
+                
+            if user_input.lower() == '성능':
+                print("\n=== 최근 답변 추적 ===")
+                print(self.graph.format_traces(self.thread_id) or "아직 기록된 답변이 없습니다.")
+                print("\n=== 지표 ===")
+                pprint(self.graph.get_metrics_summary())
                 continue
                 
             if user_input.lower() == '기록':
@@ -47,24 +57,52 @@ class ChatSession:
             
             print("\n응답: ", end="")
             try:
-                response_text = ""
-                async for response in self.graph.run(user_input, self.thread_id):
-                    if response:
-                        response_text = response
-                
-                if response_text:
-                    print(response_text)
-                    self.graph.update_chat_history(self.thread_id, user_input, response_text)
+                if self.stream:
+                    response_text = await self._stream_response(user_input)
                 else:
+                    response_text = ""
+                    async for response in self.graph.run(user_input, self.thread_id):
+                        if response:
+                            response_text = response
+                    if response_text:
+                        print(response_text)
+                
+                # 대화 기록은 그래프 실행 중 답변 노드에서 추가됨
+                if not response_text:
                     print("응답을 생성하지 못했습니다.")
                     
             except Exception as e:
                 print(f"\n오류 발생: {e}")
                 continue
 
+    async def _stream_response(self, user_input):
+        """토큰과 노드/도구 진행 상황을 도착하는 대로 출력하고 최종 응답을 반환"""
+        response_text = ""
+        streamed = False
+        async for event in self.graph.run(user_input, self.thread_id, stream=True):
+            if event["type"] == "token":
+                print(event["content"], end="", flush=True)
+                streamed = True
+            elif event["type"] == "reset":
+                # 도구 호출 단계의 머리말이었음 - 답변은 다음 단계에서 다시 출력
+                print(flush=True)
+                streamed = False
+            elif event["type"] == "tool" and event["status"] == "start":
+                print(f"\n[{event['tool']} 실행 중...]", flush=True)
+            elif event["type"] == "final":
+                response_text = event["content"]
+        
+        if response_text and not streamed:
+            print(response_text)
+        else:
+            print()
+        return response_text
+
 async def main():
     client = BedrockClient()
     graph = StockAnalysisGraph(client)
+    # 시장 지수/뉴스를 백그라운드에서 갱신 (시장 질문은 조회를 기다리지 않음)
+    get_market_refresher().start()
     
     while True:
         print("\n=== 메인 메뉴 ===")
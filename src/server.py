@@ -0,0 +1,332 @@
+#src/server.py
+#설명 : StockAnalysisGraph.run을 HTTP(SSE)/WebSocket으로 제공하는 서버 - thread_id를 세션 키로 쓰고,
+#       그래프/도구/캐시는 모든 요청이 공유. 전체 동시 실행 수와 대기열 길이(초과 시 503), 세션별 동시 실행 수(초과 시 429)를 제한
+#실행 : python src/server.py --port 8080 --max-inflight 32
+#       curl -N -X POST localhost:8080/chat -d '{"query": "AAPL 기술적 분석 해줘"}'
+
+import argparse
+import asyncio
+import json
+import os
+import time
+import uuid
+from typing import Any, AsyncIterator, Dict, Optional
+
+from aiohttp import WSMsgType, web
+
+from graph import StockAnalysisGraph
+from telemetry import telemetry
+from tools.market_data_tool import get_market_refresher
+
+GRAPH_KEY = "graph"
+LIMITS_KEY = "limits"
+
+
+class Busy(Exception):
+    """요청을 지금 처리할 수 없음 (status: 429 세션 사용 중, 503 서버 포화)"""
+
+    def __init__(self, status: int, message: str, retry_after: float = 1.0):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.retry_after = retry_after
+
+
+class RequestLimits:
+    """
+    전체 동시 실행 수 + 대기열 길이 + 세션별 동시 실행 수 제한
+
+    실행 슬롯이 없으면 최대 max_queue개 요청이 queue_timeout초까지 기다리고, 그 이상은 바로 거절합니다.
+    같은 thread_id의 턴은 체크포인트 순서가 섞이지 않도록 기본적으로 하나씩만 실행합니다.
+    """
+
+    def __init__(self, max_inflight: int = 32, max_queue: int = 128, per_session: int = 1, queue_timeout: float = 30.0):
+        self.max_inflight = max_inflight
+        self.max_queue = max_queue
+        self.per_session = per_session
+        self.queue_timeout = queue_timeout
+        self._slots = asyncio.Semaphore(max_inflight)
+        self._sessions: Dict[str, int] = {}
+        self.inflight = 0
+        self.waiting = 0
+
+    def acquire(self, thread_id: str) -> "_Permit":
+        return _Permit(self, thread_id)
+
+    async def _enter(self, thread_id: str):
+        if self._sessions.get(thread_id, 0) >= self.per_session:
+            telemetry.metrics.inc("server_rejected_total", reason="session_busy")
+            raise Busy(429, "이 대화에서 처리 중인 질문이 있습니다.")
+        if self._slots.locked() and self.waiting >= self.max_queue:
+            telemetry.metrics.inc("server_rejected_total", reason="queue_full")
+            raise Busy(503, "서버가 처리 가능한 요청 수를 초과했습니다.", retry_after=self.queue_timeout / 4)
+
+        self._sessions[thread_id] = self._sessions.get(thread_id, 0) + 1
+        self.waiting += 1
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._release_session(thread_id)
+            telemetry.metrics.inc("server_rejected_total", reason="queue_timeout")
+            raise Busy(503, "대기 시간이 초과되었습니다.", retry_after=self.queue_timeout / 4)
+        except BaseException:
+            self._release_session(thread_id)
+            raise
+        finally:
+            self.waiting -= 1
+        telemetry.metrics.observe("server_queue_seconds", time.perf_counter() - started)
+        self.inflight += 1
+
+    def _exit(self, thread_id: str):
+        self.inflight -= 1
+        self._slots.release()
+        self._release_session(thread_id)
+
+    def _release_session(self, thread_id: str):
+        count = self._sessions.get(thread_id, 0) - 1
+        if count > 0:
+            self._sessions[thread_id] = count
+        else:
+            self._sessions.pop(thread_id, None)
+
+    def render_prometheus(self, prefix: str = "stockelper") -> str:
+        gauges = {
+            "server_inflight": self.inflight,
+            "server_waiting": self.waiting,
+            "server_active_sessions": len(self._sessions),
+            "server_max_inflight": self.max_inflight,
+        }
+        lines = []
+        for name, value in gauges.items():
+            lines += [f"# TYPE {prefix}_{name} gauge", f"{prefix}_{name} {value}"]
+        # 부하 테스트에서 코어당 세션 수를 계산할 수 있도록 프로세스 CPU 시간을 함께 내보냄
+        lines += ["# TYPE process_cpu_seconds_total counter", f"process_cpu_seconds_total {time.process_time():.6f}"]
+        return "\n".join(lines) + "\n"
+
+
+class _Permit:
+    def __init__(self, limits: RequestLimits, thread_id: str):
+        self.limits = limits
+        self.thread_id = thread_id
+
+    async def __aenter__(self):
+        await self.limits._enter(self.thread_id)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.limits._exit(self.thread_id)
+
+
+async def _turn_events(graph: StockAnalysisGraph, query: str, thread_id: str) -> AsyncIterator[Dict[str, Any]]:
+    """한 턴의 진행 이벤트 (실패하면 error 이벤트로 끝남)"""
+    started = time.perf_counter()
+    status = "ok"
+    try:
+        async for event in graph.run(query, thread_id, stream=True):
+            yield event
+    except Exception as e:
+        status = "error"
+        yield {"type": "error", "message": str(e)}
+    finally:
+        telemetry.metrics.observe("server_turn_seconds", time.perf_counter() - started, status=status)
+        telemetry.metrics.inc("server_turns_total", status=status)
+
+
+async def _read_request(request: web.Request) -> Dict[str, Any]:
+    try:
+        body = await request.json()
+    except Exception:
+        raise web.HTTPBadRequest(text="JSON 본문이 필요합니다.")
+    if not isinstance(body, dict) or not str(body.get("query") or "").strip():
+        raise web.HTTPBadRequest(text="query가 필요합니다.")
+    return body
+
+
+def _busy_response(e: Busy) -> web.Response:
+    return web.json_response(
+        {"error": e.message}, status=e.status, headers={"Retry-After": str(max(1, round(e.retry_after)))}
+    )
+
+
+async def chat(request: web.Request) -> web.StreamResponse:
+    """
+    POST /chat {"query": ..., "thread_id": 선택, "stream": 기본 true}
+
+    stream=true이면 text/event-stream으로 session/node/tool/token/reset/final/error 이벤트를 보내고,
+    false이면 {"thread_id", "response"} JSON 하나를 돌려줍니다.
+    """
+    body = await _read_request(request)
+    graph = request.app[GRAPH_KEY]
+    limits: RequestLimits = request.app[LIMITS_KEY]
+    thread_id = str(body.get("thread_id") or uuid.uuid4())
+
+    try:
+        async with limits.acquire(thread_id):
+            if not body.get("stream", True):
+                response = ""
+                async for event in _turn_events(graph, body["query"], thread_id):
+                    if event["type"] == "final":
+                        response = event["content"]
+                    elif event["type"] == "error":
+                        return web.json_response({"thread_id": thread_id, "error": event["message"]}, status=500)
+                return web.json_response({"thread_id": thread_id, "response": response})
+
+            stream = web.StreamResponse(headers={
+                "Content-Type": "text/event-stream",
+                "Cache-Control": "no-cache",
+                "X-Thread-Id": thread_id,
+            })
+            await stream.prepare(request)
+            await _send_sse(stream, {"type": "session", "thread_id": thread_id})
+            # write()는 클라이언트가 받아 갈 때까지 기다리므로 느린 클라이언트는 자기 턴만 늦춤
+            try:
+                async for event in _turn_events(graph, body["query"], thread_id):
+                    await _send_sse(stream, event)
+                await stream.write_eof()
+            except ConnectionResetError:
+                # 클라이언트가 연결을 끊으면 턴 실행도 중단
+                telemetry.metrics.inc("server_disconnects_total")
+            return stream
+    except Busy as e:
+        return _busy_response(e)
+
+
+async def _send_sse(stream: web.StreamResponse, event: Dict[str, Any]):
+    data = json.dumps(event, ensure_ascii=False, default=str)
+    await stream.write(f"event: {event['type']}\ndata: {data}\n\n".encode("utf-8"))
+
+
+async def websocket(request: web.Request) -> web.WebSocketResponse:
+    """
+    GET /ws?thread_id=... - 메시지마다 {"query": ...}를 받아 진행 이벤트를 JSON으로 보냄
+
+    연결 하나가 세션 하나이며, 이전 턴이 끝나기 전에 온 질문은 429 error 이벤트로 거절합니다.
+    """
+    graph = request.app[GRAPH_KEY]
+    limits: RequestLimits = request.app[LIMITS_KEY]
+    thread_id = request.query.get("thread_id") or str(uuid.uuid4())
+    ws = web.WebSocketResponse(heartbeat=30.0)
+    await ws.prepare(request)
+    await ws.send_json({"type": "session", "thread_id": thread_id})
+
+    tasks = set()
+
+    async def answer(query: str):
+        try:
+            async with limits.acquire(thread_id):
+                async for event in _turn_events(graph, query, thread_id):
+                    await ws.send_json(event, dumps=lambda o: json.dumps(o, ensure_ascii=False, default=str))
+        except Busy as e:
+            await ws.send_json({"type": "error", "status": e.status, "message": e.message})
+        except ConnectionResetError:
+            pass
+
+    async for message in ws:
+        if message.type != WSMsgType.TEXT:
+            continue
+        try:
+            query = str(json.loads(message.data).get("query") or "").strip()
+        except Exception:
+            query = ""
+        if not query:
+            await ws.send_json({"type": "error", "status": 400, "message": "query가 필요합니다."})
+            continue
+        task = asyncio.create_task(answer(query))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    for task in tasks:
+        task.cancel()
+    return ws
+
+
+async def history(request: web.Request) -> web.Response:
+    """GET /sessions/{thread_id}/history - 대화 기록, DELETE - 초기화"""
+    graph = request.app[GRAPH_KEY]
+    thread_id = request.match_info["thread_id"]
+    if request.method == "DELETE":
+        await asyncio.to_thread(graph.clear_chat_history, thread_id)
+        return web.json_response({"thread_id": thread_id, "cleared": True})
+    return web.json_response({"thread_id": thread_id, "chat_history": await asyncio.to_thread(graph.get_chat_history, thread_id)})
+
+
+async def tool_log(request: web.Request) -> web.Response:
+    """GET /sessions/{thread_id}/tools - 도구 사용 기록"""
+    graph = request.app[GRAPH_KEY]
+    entries = graph.get_tool_usage_log(request.match_info["thread_id"], limit=int(request.query.get("limit", 50)))
+    return web.json_response(entries, dumps=lambda o: json.dumps(o, ensure_ascii=False, default=str))
+
+
+async def metrics(request: web.Request) -> web.Response:
+    """GET /metrics - 그래프 지표 + 서버 상태 (Prometheus 텍스트 형식)"""
+    text = request.app[GRAPH_KEY].get_metrics() + request.app[LIMITS_KEY].render_prometheus()
+    return web.Response(text=text, content_type="text/plain")
+
+
+async def health(request: web.Request) -> web.Response:
+    limits: RequestLimits = request.app[LIMITS_KEY]
+    return web.json_response({
+        "status": "ok",
+        "inflight": limits.inflight,
+        "waiting": limits.waiting,
+        "market_snapshot": get_market_refresher().status(),
+    })
+
+
+async def _start_market_refresher(app: web.Application):
+    # 시장 지수/뉴스는 백그라운드에서 갱신하고 요청은 스냅샷만 읽음
+    get_market_refresher().start()
+
+
+async def _stop_market_refresher(app: web.Application):
+    await asyncio.to_thread(get_market_refresher().stop)
+
+
+def create_app(graph: StockAnalysisGraph, limits: Optional[RequestLimits] = None) -> web.Application:
+    """그래프 하나를 공유하는 aiohttp 애플리케이션"""
+    app = web.Application()
+    app[GRAPH_KEY] = graph
+    if limits is None:
+        limits = RequestLimits()
+    app[LIMITS_KEY] = limits
+    app.add_routes([
+        web.post("/chat", chat),
+        web.get("/ws", websocket),
+        web.get("/sessions/{thread_id}/history", history),
+        web.delete("/sessions/{thread_id}/history", history),
+        web.get("/sessions/{thread_id}/tools", tool_log),
+        web.get("/metrics", metrics),
+        web.get("/health", health),
+    ])
+    app.on_startup.append(_start_market_refresher)
+    app.on_cleanup.append(_stop_market_refresher)
+    return app
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--host", default=os.getenv("SERVER_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("SERVER_PORT", "8080")))
+    parser.add_argument("--max-inflight", type=int, default=int(os.getenv("SERVER_MAX_INFLIGHT", "32")), help="동시에 실행하는 턴 수")
+    parser.add_argument("--max-queue", type=int, default=int(os.getenv("SERVER_MAX_QUEUE", "128")), help="실행 슬롯을 기다릴 수 있는 요청 수")
+    parser.add_argument("--per-session", type=int, default=int(os.getenv("SERVER_PER_SESSION", "1")), help="thread_id별 동시 실행 수")
+    parser.add_argument("--queue-timeout", type=float, default=float(os.getenv("SERVER_QUEUE_TIMEOUT", "30")), help="대기 최대 시간 (초)")
+
+
+def limits_from_args(args) -> RequestLimits:
+    return RequestLimits(args.max_inflight, args.max_queue, args.per_session, args.queue_timeout)
+
+
+def main():
+    from bedrock_client import BedrockClient
+
+    parser = argparse.ArgumentParser(description="Stockelper HTTP/WebSocket 서버")
+    add_arguments(parser)
+    args = parser.parse_args()
+    # Bedrock 연결 풀을 서버 동시 실행 수에 맞춤
+    graph = StockAnalysisGraph(BedrockClient(max_pool_connections=args.max_inflight))
+    web.run_app(create_app(graph, limits_from_args(args)), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
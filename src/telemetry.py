@@ -0,0 +1,398 @@
+#src/telemetry.py
+#설명 : 턴 단위 지연 시간 추적(span)과 Prometheus 형식 지표 (노드, 도구, LLM 호출, 외부 데이터 조회, 캐시)
+
+import contextvars
+import functools
+import inspect
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from langchain_core.callbacks import BaseCallbackHandler
+
+# 지연 시간 히스토그램 구간 (초)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+
+
+def _labels_key(labels: Dict[str, Any]) -> Tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: Tuple, extra: str = "") -> str:
+    parts = [f'{k}="{v}"' for k, v in key]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Metrics:
+    """프로세스 안에서 집계하는 카운터/게이지/히스토그램 (Prometheus 텍스트 형식으로 내보냄)"""
+
+    def __init__(self, prefix: str = "stockelper", buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.prefix = prefix
+        self.buckets = buckets
+        self._counters: Dict[str, Dict[Tuple, float]] = defaultdict(lambda: defaultdict(float))
+        self._gauges: Dict[str, Dict[Tuple, float]] = defaultdict(dict)
+        self._histograms: Dict[str, Dict[Tuple, list]] = defaultdict(dict)
+        self._lock = threading.Lock()
+
+    def inc(self, metric: str, value: float = 1.0, **labels):
+        with self._lock:
+            self._counters[metric][_labels_key(labels)] += value
+
+    def set(self, metric: str, value: float, **labels):
+        """게이지 값 설정 (진행 중인 호출 수처럼 오르내리는 값)"""
+        with self._lock:
+            self._gauges[metric][_labels_key(labels)] = value
+
+    def observe(self, metric: str, value: float, **labels):
+        key = _labels_key(labels)
+        with self._lock:
+            hist = self._histograms[metric].get(key)
+            if hist is None:
+                # [구간별 개수..., 합계, 전체 개수]
+                hist = self._histograms[metric][key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    hist[i] += 1
+                    break
+            hist[-2] += value
+            hist[-1] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """카운터/게이지 값과 히스토그램 요약 (개수, 합계, 평균)"""
+        with self._lock:
+            counters = {
+                name: {_format_labels(k): v for k, v in values.items()}
+                for name, values in self._counters.items()
+            }
+            gauges = {
+                name: {_format_labels(k): v for k, v in values.items()}
+                for name, values in self._gauges.items()
+            }
+            histograms = {
+                name: {
+                    _format_labels(k): {"count": h[-1], "sum": round(h[-2], 6), "avg": round(h[-2] / h[-1], 6) if h[-1] else 0.0}
+                    for k, h in values.items()
+                }
+                for name, values in self._histograms.items()
+            }
+        return {"counters": counters, "gauges": gauges, "histograms": histograms}
+
+    def render_prometheus(self) -> str:
+        lines = []
+        with self._lock:
+            for name, values in sorted(self._counters.items()):
+                metric = f"{self.prefix}_{name}"
+                lines.append(f"# TYPE {metric} counter")
+                for key, value in values.items():
+                    lines.append(f"{metric}{_format_labels(key)} {value:g}")
+            for name, values in sorted(self._gauges.items()):
+                metric = f"{self.prefix}_{name}"
+                lines.append(f"# TYPE {metric} gauge")
+                for key, value in values.items():
+                    lines.append(f"{metric}{_format_labels(key)} {value:g}")
+            for name, values in sorted(self._histograms.items()):
+                metric = f"{self.prefix}_{name}"
+                lines.append(f"# TYPE {metric} histogram")
+                for key, hist in values.items():
+                    cumulative = 0
+                    for bound, count in zip(self.buckets, hist):
+                        cumulative += count
+                        le = 'le="%g"' % bound
+                        lines.append(f"{metric}_bucket{_format_labels(key, le)} {cumulative}")
+                    le = 'le="+Inf"'
+                    lines.append(f"{metric}_bucket{_format_labels(key, le)} {hist[-1]}")
+                    lines.append(f"{metric}_sum{_format_labels(key)} {hist[-2]:.6f}")
+                    lines.append(f"{metric}_count{_format_labels(key)} {hist[-1]}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+
+class Span:
+    """실행 구간 하나 (이름, 종류, 소요 시간, 속성, 하위 구간)"""
+
+    __slots__ = ("name", "kind", "attrs", "start", "end", "status", "children")
+
+    def __init__(self, name: str, kind: str, **attrs):
+        self.name = name
+        self.kind = kind
+        self.attrs: Dict[str, Any] = attrs
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.status = "ok"
+        self.children: List["Span"] = []
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end or time.perf_counter()) - self.start) * 1000
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def add(self, key: str, value: float = 1):
+        self.attrs[key] = self.attrs.get(key, 0) + value
+
+    def to_dict(self, origin: Optional[float] = None) -> Dict[str, Any]:
+        origin = self.start if origin is None else origin
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "status": self.status,
+            "offset_ms": round((self.start - origin) * 1000, 1),
+            "duration_ms": round(self.duration_ms, 1),
+            "attrs": dict(self.attrs),
+            "children": [c.to_dict(origin) for c in sorted(self.children, key=lambda c: c.start)],
+        }
+
+
+class Telemetry:
+    """
+    턴 단위 추적기
+
+    turn()으로 질문 하나의 처리를 감싸면 그 안에서 열린 span()들이 트리로 기록되고,
+    끝난 턴은 최근 max_traces개까지 보관됩니다. 모든 구간은 종류/이름별 지연 시간 히스토그램에도 집계됩니다.
+    """
+
+    def __init__(self, max_traces: int = 20):
+        self.metrics = Metrics()
+        self._traces: deque = deque(maxlen=max_traces)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def turn(self, thread_id: Optional[str] = None, query: str = ""):
+        root = Span("turn", "turn", thread_id=thread_id, query=query[:100])
+        token = _current_span.set(root)
+        try:
+            yield root
+        except BaseException:
+            root.status = "error"
+            raise
+        finally:
+            self._reset(token)
+            self._finish(root)
+            trace = root.to_dict()
+            trace["trace_id"] = uuid.uuid4().hex[:12]
+            trace["timestamp"] = datetime.now().isoformat()
+            with self._lock:
+                self._traces.append(trace)
+
+    @contextmanager
+    def span(self, name: str, kind: str = "internal", **attrs):
+        parent = _current_span.get()
+        span = Span(name, kind, **attrs)
+        if parent is not None:
+            parent.children.append(span)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException:
+            span.status = "error"
+            raise
+        finally:
+            self._reset(token)
+            self._finish(span)
+
+    def record_span(
+        self,
+        name: str,
+        kind: str,
+        start: float,
+        parent: Optional[Span] = None,
+        status: str = "ok",
+        **attrs,
+    ) -> Span:
+        """이미 끝난 구간 기록 (콜백처럼 시작/종료가 다른 곳에서 관찰되는 경우)"""
+        span = Span(name, kind, **attrs)
+        span.start = start
+        span.status = status
+        if parent is not None:
+            parent.children.append(span)
+        self._finish(span)
+        return span
+
+    def current_span(self) -> Optional[Span]:
+        return _current_span.get()
+
+    def add(self, key: str, value: float = 1):
+        """현재 구간의 속성 값 증가 (캐시 hit 수 등)"""
+        span = _current_span.get()
+        if span is not None:
+            span.add(key, value)
+
+    def count_cache(self, kind: str, result: str):
+        self.metrics.inc("cache_requests_total", kind=kind, result=result)
+        if result in ("hits", "misses", "coalesced"):
+            self.add(f"cache_{result}")
+
+    def count_tokens(self, model: str, input_tokens: int, output_tokens: int):
+        if input_tokens:
+            self.metrics.inc("llm_tokens_total", input_tokens, model=model, type="input")
+        if output_tokens:
+            self.metrics.inc("llm_tokens_total", output_tokens, model=model, type="output")
+
+    def recent_traces(self, limit: Optional[int] = None, thread_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            traces = list(self._traces)
+        if thread_id is not None:
+            traces = [t for t in traces if t["attrs"].get("thread_id") == thread_id]
+        return traces[-limit:] if limit else traces
+
+    def render_prometheus(self) -> str:
+        return self.metrics.render_prometheus()
+
+    def _finish(self, span: Span):
+        if span.end is None:
+            span.end = time.perf_counter()
+        duration = span.end - span.start
+        self.metrics.observe("span_duration_seconds", duration, kind=span.kind, name=span.name)
+        self.metrics.inc("spans_total", kind=span.kind, name=span.name, status=span.status)
+
+    @staticmethod
+    def _reset(token):
+        try:
+            _current_span.reset(token)
+        except ValueError:
+            # 다른 컨텍스트에서 종료된 경우 (비동기 제너레이터 정리 등)
+            pass
+
+
+telemetry = Telemetry()
+
+
+def traced(name: Optional[str] = None, kind: str = "internal"):
+    """함수 실행을 span으로 기록하는 데코레이터 (동기/비동기 함수 모두 지원)"""
+
+    def decorator(func):
+        span_name = name or func.__name__
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with telemetry.span(span_name, kind):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with telemetry.span(span_name, kind):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+def traced_tool(func):
+    """
+    도구 _run/_arun을 span으로 기록 (이름은 도구 이름)
+
+    _arun이 같은 도구의 _run을 호출하는 경우에는 구간을 한 번만 기록합니다.
+    """
+
+    def _is_nested(self) -> bool:
+        current = _current_span.get()
+        return current is not None and current.kind == "tool" and current.name == self.name
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(self, *args, **kwargs):
+            if _is_nested(self):
+                return await func(self, *args, **kwargs)
+            with telemetry.span(self.name, "tool") as span:
+                result = await func(self, *args, **kwargs)
+                if isinstance(result, dict) and "error" in result:
+                    span.status = "error"
+                return result
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        if _is_nested(self):
+            return func(self, *args, **kwargs)
+        with telemetry.span(self.name, "tool") as span:
+            result = func(self, *args, **kwargs)
+            if isinstance(result, dict) and "error" in result:
+                span.status = "error"
+            return result
+    return wrapper
+
+
+class LLMTelemetryHandler(BaseCallbackHandler):
+    """LLM 호출마다 소요 시간, 첫 토큰까지의 시간, 입력/출력 토큰 수를 기록하는 콜백"""
+
+    # 호출한 쪽의 컨텍스트에서 실행되어야 현재 span 아래에 기록됨
+    run_inline = True
+
+    def __init__(self, model_id: str):
+        self.model_id = model_id
+        self._runs: Dict[Any, list] = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._runs[run_id] = [time.perf_counter(), _current_span.get(), None]
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._runs[run_id] = [time.perf_counter(), _current_span.get(), None]
+
+    def on_llm_new_token(self, token, *, run_id, **kwargs):
+        run = self._runs.get(run_id)
+        if run is not None and run[2] is None:
+            run[2] = time.perf_counter()
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        start, parent, first_token = run
+        input_tokens, output_tokens = _token_usage(response)
+        telemetry.count_tokens(self.model_id, input_tokens, output_tokens)
+        attrs = {"model": self.model_id, "input_tokens": input_tokens, "output_tokens": output_tokens}
+        if first_token is not None:
+            attrs["first_token_ms"] = round((first_token - start) * 1000, 1)
+        telemetry.record_span("llm", "llm", start, parent=parent, **attrs)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        telemetry.record_span("llm", "llm", run[0], parent=run[1], status="error", model=self.model_id, error=str(error)[:200])
+
+
+def _token_usage(response) -> Tuple[int, int]:
+    """LLMResult에서 (입력, 출력) 토큰 수 추출"""
+    usage = (getattr(response, "llm_output", None) or {}).get("usage") or {}
+    input_tokens = usage.get("prompt_tokens") or usage.get("input_tokens") or 0
+    output_tokens = usage.get("completion_tokens") or usage.get("output_tokens") or 0
+    if not (input_tokens or output_tokens):
+        for generations in getattr(response, "generations", []) or []:
+            for generation in generations:
+                metadata = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                input_tokens += metadata.get("input_tokens", 0)
+                output_tokens += metadata.get("output_tokens", 0)
+    return int(input_tokens), int(output_tokens)
+
+
+def format_trace(trace: Dict[str, Any]) -> str:
+    """span 트리를 들여쓰기한 텍스트로 표시"""
+    lines = []
+
+    def walk(span, depth):
+        attrs = ", ".join(f"{k}={v}" for k, v in span["attrs"].items() if v not in (None, ""))
+        status = "" if span["status"] == "ok" else f" [{span['status']}]"
+        lines.append(
+            f"{'  ' * depth}{span['kind']}:{span['name']} {span['duration_ms']:.1f}ms "
+            f"(+{span['offset_ms']:.1f}ms){status}{f' {attrs}' if attrs else ''}"
+        )
+        for child in span["children"]:
+            walk(child, depth + 1)
+
+    walk(trace, 0)
+    return "\n".join(lines)
@@ -0,0 +1,204 @@
+#src/tools/batch_technical_tool.py
+#설명 : 여러 종목의 기술적 지표를 (종목 x 날짜) 가격 행렬 위에서 한 번에 계산하는 도구
+
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Type
+import numpy as np
+from langchain_core.tools import BaseTool
+from pydantic import BaseModel, Field
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForToolRun,
+    CallbackManagerForToolRun,
+)
+from .price_store import get_price_source, period_for_days
+from telemetry import traced_tool
+
+# 결과 테이블의 컬럼 순서
+COLUMNS = [
+    "symbol", "close", "MA5", "MA20", "MA60", "MA120", "rsi",
+    "macd", "signal", "histogram", "bb_upper", "bb_middle", "bb_lower",
+    "volume", "avg_volume_5d", "avg_volume_20d",
+    "rsi_analysis", "macd_analysis", "trend_summary",
+]
+
+
+class BatchTechnicalAnalysisInput(BaseModel):
+    symbols: List[str] = Field(..., description="분석할 주식 심볼 리스트 (예: ['AAPL', 'MSFT', 'NVDA'])")
+    period_days: int = Field(default=180, description="데이터 조회 기간 (일)")
+    rsi_period: int = Field(default=14, description="RSI 계산 기간")
+    bb_period: int = Field(default=20, description="볼린저 밴드 계산 기간")
+
+
+def _rolling_last(matrix: np.ndarray, window: int, ddof: Optional[int] = None) -> np.ndarray:
+    """각 행의 마지막 window개 값의 평균 (ddof를 주면 표준편차), 값이 부족하면 NaN"""
+    if matrix.shape[1] < window:
+        return np.full(matrix.shape[0], np.nan)
+    tail = matrix[:, -window:]
+    if ddof is None:
+        return tail.mean(axis=1)
+    return tail.std(axis=1, ddof=ddof)
+
+
+def _ema(matrix: np.ndarray, span: int) -> np.ndarray:
+    """행별 지수이동평균 (pandas ewm(span, adjust=False)와 동일, 앞쪽 NaN은 건너뜀)"""
+    alpha = 2.0 / (span + 1.0)
+    out = np.empty_like(matrix)
+    value = np.full(matrix.shape[0], np.nan)
+    for t in range(matrix.shape[1]):
+        x = matrix[:, t]
+        value = np.where(np.isnan(value), x, alpha * x + (1.0 - alpha) * value)
+        out[:, t] = value
+    return out
+
+
+def _price_matrix(symbols: List[str], period: str) -> tuple:
+    """
+    종목별 일봉의 마지막 봉을 오른쪽 끝에 맞춘 (종가, 거래량) 행렬
+
+    거래일이 다른 종목(휴장일이 다른 시장 등)도 각자 자기 봉만으로 지표를 계산하도록 날짜 축을 합치지 않고,
+    봉이 적은 종목은 앞쪽을 NaN으로 채웁니다.
+    """
+    source = get_price_source()
+    closes, volumes, errors = {}, {}, {}
+    for symbol in symbols:
+        try:
+            hist = source.get_history(symbol, period=period)
+        except Exception as e:
+            errors[symbol] = f"데이터 조회 중 오류 발생: {str(e)}"
+            continue
+        if hist.empty:
+            errors[symbol] = "기술적 분석을 위한 데이터를 가져올 수 없습니다."
+            continue
+        closes[symbol] = hist["Close"].to_numpy(dtype="float64")
+        volumes[symbol] = hist["Volume"].to_numpy(dtype="float64")
+
+    if not closes:
+        return [], np.empty((0, 0)), np.empty((0, 0)), errors
+
+    names = list(closes)
+    width = max(len(values) for values in closes.values())
+    close = np.full((len(names), width), np.nan)
+    volume = np.full((len(names), width), np.nan)
+    for i, symbol in enumerate(names):
+        n = len(closes[symbol])
+        close[i, width - n:] = closes[symbol]
+        volume[i, width - n:] = volumes[symbol]
+    return names, close, volume, errors
+
+
+def batch_indicators(close: np.ndarray, volume: np.ndarray, rsi_period: int = 14, bb_period: int = 20) -> Dict[str, np.ndarray]:
+    """
+    (종목 x 날짜) 종가/거래량 행렬의 마지막 봉 지표 (종목별 1차원 배열)
+
+    출력 이름은 technical_pipeline()/IndicatorEngine.values()와 같습니다.
+    """
+    values = {"close": close[:, -1], "volume": volume[:, -1]}
+    for w in (5, 20, 60, 120):
+        values[f"ma{w}"] = _rolling_last(close, w)
+
+    # RSI (TechnicalAnalysisTool._calculate_rsi와 같은 단순 평균 방식, 첫 변화량은 0)
+    delta = np.diff(close, axis=1, prepend=close[:, :1])
+    delta[np.isnan(delta)] = 0.0
+    avg_gain = _rolling_last(np.clip(delta, 0, None), rsi_period)
+    avg_loss = _rolling_last(np.clip(-delta, 0, None), rsi_period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        values["rsi"] = 100 - (100 / (1 + avg_gain / avg_loss))
+
+    macd_line = _ema(close, 12) - _ema(close, 26)
+    values["macd"] = macd_line[:, -1]
+    values["macd_signal"] = _ema(macd_line, 9)[:, -1]
+
+    bb_mid = _rolling_last(close, bb_period)
+    bb_std = _rolling_last(close, bb_period, ddof=1)
+    values["bb_upper"] = bb_mid + bb_std * 2
+    values["bb_middle"] = bb_mid
+    values["bb_lower"] = bb_mid - bb_std * 2
+
+    values["volume_ma5"] = _rolling_last(volume, 5)
+    values["volume_ma20"] = _rolling_last(volume, 20)
+    return values
+
+
+def batch_technical_analysis(
+    symbols: List[str],
+    period_days: int = 180,
+    rsi_period: int = 14,
+    bb_period: int = 20,
+) -> Dict[str, Any]:
+    """
+    여러 종목의 기술적 지표를 한 번에 계산
+
+    TechnicalAnalysisTool과 같은 지표를 (종목 x 날짜) 행렬에 대한 벡터 연산으로 구하고,
+    종목당 한 행인 테이블로 반환합니다.
+    """
+    symbols = list(dict.fromkeys(s.upper() for s in symbols))
+    names, close, volume, errors = _price_matrix(symbols, period_for_days(period_days))
+    result = {"columns": COLUMNS, "rows": [], "errors": errors, "timestamp": datetime.now().isoformat()}
+    if not names:
+        return result
+
+    values = batch_indicators(close, volume, rsi_period, bb_period)
+    last_close, rsi = values["close"], values["rsi"]
+    ma = {w: values[f"ma{w}"] for w in (5, 20, 60, 120)}
+    macd_last, signal = values["macd"], values["macd_signal"]
+    bb_upper, bb_mid, bb_lower = values["bb_upper"], values["bb_middle"], values["bb_lower"]
+    vol_5, vol_20 = values["volume_ma5"], values["volume_ma20"]
+
+    for i, symbol in enumerate(names):
+        r = float(rsi[i])
+        histogram = float(macd_last[i] - signal[i])
+        price, ma20, ma60 = float(last_close[i]), float(ma[20][i]), float(ma[60][i])
+        result["rows"].append([
+            symbol,
+            price,
+            float(ma[5][i]), ma20, ma60, float(ma[120][i]),
+            r,
+            float(macd_last[i]), float(signal[i]), histogram,
+            float(bb_upper[i]), float(bb_mid[i]), float(bb_lower[i]),
+            float(volume[i, -1]), float(vol_5[i]), float(vol_20[i]),
+            "과매수" if r > 70 else "과매도" if r < 30 else "중립",
+            "상승신호" if histogram > 0 else "하락신호",
+            "강세" if price > ma20 > ma60 else "약세",
+        ])
+    return result
+
+
+class BatchTechnicalAnalysisTool(BaseTool):
+    name: str = "get_batch_technical_analysis"
+    description: str = "여러 종목의 RSI, 볼린저 밴드, MACD, 이동평균 등 기술적 지표를 한 번에 계산해 비교 테이블로 반환합니다."
+    args_schema: Type[BaseModel] = BatchTechnicalAnalysisInput
+
+    @traced_tool
+    def _run(
+        self,
+        symbols: List[str],
+        period_days: int = 180,
+        rsi_period: int = 14,
+        bb_period: int = 20,
+        run_manager: Optional[CallbackManagerForToolRun] = None,
+    ) -> Dict[str, Any]:
+        """동기 실행을 위한 메서드"""
+        try:
+            return batch_technical_analysis(symbols, period_days, rsi_period, bb_period)
+        except Exception as e:
+            return {"error": f"기술적 분석 중 오류 발생: {str(e)}"}
+
+    @traced_tool
+    async def _arun(
+        self,
+        symbols: List[str],
+        period_days: int = 180,
+        rsi_period: int = 14,
+        bb_period: int = 20,
+        run_manager: Optional[AsyncCallbackManagerForToolRun] = None,
+    ) -> Dict[str, Any]:
+        """비동기 실행을 위한 메서드"""
+        return await asyncio.to_thread(
+            lambda: self._run(
+                symbols=symbols,
+                period_days=period_days,
+                rsi_period=rsi_period,
+                bb_period=bb_period
+            )
+        )
@@ -1,6 +1,5 @@
 #src/function/company_data.py
 #설명 : 회사의 주식 데이터와 기본 정보를 가져오는 클래스
-import yfinance as yf
 from typing import Dict, Any, Optional
 from datetime import datetime
 import asyncio
@@ -11,6 +10,9 @@ from langchain_core.callbacks import (
     AsyncCallbackManagerForToolRun,
     CallbackManagerForToolRun,
 )
+from .market_cache import get_ticker_info
+from .price_store import get_price_source
+from telemetry import traced_tool
 
 class CompanyDataInput(BaseModel):
     symbol: str = Field(description="회사의 주식 심볼 (예: 'AAPL')")
@@ -25,6 +27,7 @@ class CompanyDataTool(BaseTool):
     args_schema: Type[BaseModel] = CompanyDataInput
     return_direct: bool = False
 
+    @traced_tool
     def _run(
         self,
         symbol: str,
@@ -33,52 +36,70 @@ class CompanyDataTool(BaseTool):
     ) -> Dict[str, Any]:
         """동기 실행을 위한 메서드"""
         try:
-            ticker = yf.Ticker(symbol)
-            info = ticker.info
-            hist = ticker.history(period="1d")
-            
-            if hist.empty:
-                return {"error": "주가 데이터를 가져올 수 없습니다."}
-            
-            current_price = float(hist['Close'].iloc[-1])
-            open_price = float(hist['Open'].iloc[-1])
-            
-            return {
-                "basic_info": {
-                    "symbol": symbol,
-                    "company_name": company_name,
-                    "sector": info.get('sector', 'N/A'),
-                    "industry": info.get('industry', 'N/A'),
-                    "market_cap": info.get('marketCap', 'N/A'),
-                },
-                "stock_data": {
-                    "current_price": current_price,
-                    "open": open_price,
-                    "high": float(hist['High'].iloc[-1]),
-                    "low": float(hist['Low'].iloc[-1]),
-                    "volume": int(hist['Volume'].iloc[-1]),
-                    "day_change": float(((current_price - open_price) / open_price) * 100),
-                    "timestamp": datetime.now().isoformat()
-                },
-                "financial_metrics": {
-                    "pe_ratio": info.get('trailingPE', 'N/A'),
-                    "dividend_yield": info.get('dividendYield', 'N/A'),
-                    "beta": info.get('beta', 'N/A'),
-                    "eps": info.get('trailingEps', 'N/A'),
-                }
-            }
+            info = get_ticker_info(symbol)
+            hist = get_price_source().get_history(symbol, period="1d")
+            return self.build_result(symbol, company_name, info, hist)
         except Exception as e:
             return {"error": f"데이터 조회 중 오류 발생: {str(e)}"}
 
+    def build_result(self, symbol: str, company_name: Optional[str], info: Dict[str, Any], hist) -> Dict[str, Any]:
+        """
+        조회한 기업 정보와 일봉(마지막 봉 사용)으로 결과 구성 - 다른 도구가 이미 받은 데이터를 재사용할 때도 사용
+
+        hist가 None이면(일봉을 받지 못한 경우) 시세 없이 기업 정보만으로 구성합니다.
+        """
+        if hist is None:
+            return self._result(symbol, company_name, info, {})
+        if hist.empty:
+            return {"error": "주가 데이터를 가져올 수 없습니다."}
+
+        current_price = float(hist['Close'].iloc[-1])
+        open_price = float(hist['Open'].iloc[-1])
+        stock_data = {
+            "current_price": current_price,
+            "open": open_price,
+            "high": float(hist['High'].iloc[-1]),
+            "low": float(hist['Low'].iloc[-1]),
+            "volume": int(hist['Volume'].iloc[-1]),
+            "day_change": float(((current_price - open_price) / open_price) * 100),
+            "timestamp": datetime.now().isoformat()
+        }
+        if hist.attrs.get("stale"):
+            # 시세를 보충하지 못해 저장된 마지막 봉을 사용 (현재가가 아님)
+            stock_data["stale"] = True
+            stock_data["as_of"] = hist.attrs.get("as_of")
+
+        return self._result(symbol, company_name, info, stock_data)
+
+    @staticmethod
+    def _result(symbol: str, company_name: Optional[str], info: Dict[str, Any], stock_data: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "basic_info": {
+                "symbol": symbol,
+                "company_name": company_name,
+                "sector": info.get('sector', 'N/A'),
+                "industry": info.get('industry', 'N/A'),
+                "market_cap": info.get('marketCap', 'N/A'),
+            },
+            "stock_data": stock_data,
+            "financial_metrics": {
+                "pe_ratio": info.get('trailingPE', 'N/A'),
+                "dividend_yield": info.get('dividendYield', 'N/A'),
+                "beta": info.get('beta', 'N/A'),
+                "eps": info.get('trailingEps', 'N/A'),
+            }
+        }
+
+    @traced_tool
     async def _arun(
         self,
         symbol: str,
-        company_name: str,
+        company_name: Optional[str] = "",
         run_manager: Optional[AsyncCallbackManagerForToolRun] = None,
     ) -> Dict[str, Any]:
         """비동기 실행을 위한 메서드"""
         # 비동기 컨텍스트에서 동기 메서드 실행
-        return await asyncio.get_event_loop().run_in_executor(
-            None, self._run, symbol, company_name, run_manager
+        return await asyncio.to_thread(
+            self._run, symbol, company_name, run_manager
         )
 
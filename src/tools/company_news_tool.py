@@ -0,0 +1,65 @@
+#src/tools/company_news_tool.py
+#설명 : 여러 종목의 최신 뉴스를 한 번에 조회하는 도구 (뉴스 서비스의 검색어별 캐시 사용)
+
+from typing import Any, Dict, List, Optional, Type
+from langchain_core.tools import BaseTool
+from pydantic import BaseModel, Field
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForToolRun,
+    CallbackManagerForToolRun,
+)
+from .news_service import get_company_news, get_news_service
+from telemetry import traced_tool
+
+# 도구 결과에 넣는 기사 항목
+ARTICLE_FIELDS = ("title", "media", "date", "desc", "link")
+
+
+class CompanyNewsInput(BaseModel):
+    symbols: List[str] = Field(..., description="뉴스를 조회할 주식 심볼 리스트 (예: ['AAPL', 'MSFT'])")
+    limit: int = Field(default=5, description="종목별 기사 수")
+
+
+class CompanyNewsTool(BaseTool):
+    name: str = "company_news"
+    description: str = "여러 종목의 최신 뉴스(제목, 언론사, 날짜, 요약, 링크)를 한 번에 조회합니다."
+    args_schema: Type[BaseModel] = CompanyNewsInput
+
+    @staticmethod
+    def build_result(news: Dict[str, List[dict]], limit: int) -> Dict[str, Any]:
+        result = {}
+        for symbol, articles in news.items():
+            if not articles:
+                result[symbol] = {"error": f"{symbol} 관련 뉴스를 찾을 수 없습니다."}
+                continue
+            result[symbol] = [
+                {field: article.get(field) for field in ARTICLE_FIELDS}
+                for article in articles[:limit]
+            ]
+        return result
+
+    @traced_tool
+    def _run(
+        self,
+        symbols: List[str],
+        limit: int = 5,
+        run_manager: Optional[CallbackManagerForToolRun] = None,
+    ) -> Dict[str, Any]:
+        """동기 실행을 위한 메서드"""
+        try:
+            return self.build_result(get_news_service().company_news(symbols), limit)
+        except Exception as e:
+            return {"error": f"뉴스 조회 중 오류 발생: {str(e)}"}
+
+    @traced_tool
+    async def _arun(
+        self,
+        symbols: List[str],
+        limit: int = 5,
+        run_manager: Optional[AsyncCallbackManagerForToolRun] = None,
+    ) -> Dict[str, Any]:
+        """비동기 실행을 위한 메서드"""
+        try:
+            return self.build_result(await get_company_news(symbols), limit)
+        except Exception as e:
+            return {"error": f"뉴스 조회 중 오류 발생: {str(e)}"}
@@ -0,0 +1,323 @@
+#src/tools/indicator_engine.py
+#설명 : 봉 하나를 추가할 때마다 상수 시간에 갱신되는 기술적 지표 상태 (이동평균, RSI, MACD, 볼린저 밴드)
+
+import os
+import json
+import math
+import atexit
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, Hashable, Optional, Tuple
+import pandas as pd
+
+NAN = float("nan")
+
+# TechnicalAnalysisTool이 보고하는 이동평균 기간
+MA_WINDOWS = (5, 20, 60, 120)
+VOLUME_WINDOWS = (5, 20)
+
+DEFAULT_STATE_PATH = Path(__file__).resolve().parents[2] / "timescale" / ".store" / "indicator_state.json"
+
+
+class RollingWindow:
+    """고정 길이 창의 누적합/제곱합 (pandas rolling(window).mean()/std()와 동일한 값)"""
+
+    # 부동소수점 오차 누적을 막기 위해 주기적으로 누적합을 다시 계산
+    RESUM_EVERY = 4096
+
+    def __init__(self, window: int):
+        self.window = window
+        self.values: deque = deque(maxlen=window)
+        self.total = 0.0
+        self.total_sq = 0.0
+        self._pushes = 0
+
+    def push(self, x: float):
+        if len(self.values) == self.window:
+            old = self.values[0]
+            self.total -= old
+            self.total_sq -= old * old
+        self.values.append(x)
+        self.total += x
+        self.total_sq += x * x
+        self._pushes += 1
+        if self._pushes % self.RESUM_EVERY == 0:
+            self.total = math.fsum(self.values)
+            self.total_sq = math.fsum(v * v for v in self.values)
+
+    def _moments(self, x: Optional[float]) -> Tuple[int, float, float]:
+        """x를 추가했다고 가정했을 때의 (개수, 합, 제곱합) - 상태는 바꾸지 않음"""
+        n, total, total_sq = len(self.values), self.total, self.total_sq
+        if x is None:
+            return n, total, total_sq
+        if n == self.window:
+            old = self.values[0]
+            return n, total - old + x, total_sq - old * old + x * x
+        return n + 1, total + x, total_sq + x * x
+
+    def mean(self, x: Optional[float] = None) -> float:
+        n, total, _ = self._moments(x)
+        return total / n if n == self.window else NAN
+
+    def std(self, x: Optional[float] = None) -> float:
+        n, total, total_sq = self._moments(x)
+        if n != self.window or n < 2:
+            return NAN
+        return math.sqrt(max((total_sq - total * total / n) / (n - 1), 0.0))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"window": self.window, "values": list(self.values)}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RollingWindow":
+        rolling = cls(data["window"])
+        for x in data["values"]:
+            rolling.push(x)
+        return rolling
+
+
+class EMA:
+    """지수이동평균 (pandas ewm(span=..., adjust=False).mean()과 동일한 값)"""
+
+    def __init__(self, span: int, value: Optional[float] = None):
+        self.span = span
+        self.alpha = 2.0 / (span + 1.0)
+        self.value = value
+
+    def push(self, x: float):
+        self.value = self.peek(x)
+
+    def peek(self, x: Optional[float] = None) -> float:
+        if x is None:
+            return NAN if self.value is None else self.value
+        if self.value is None:
+            return x
+        return self.alpha * x + (1.0 - self.alpha) * self.value
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"span": self.span, "value": self.value}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "EMA":
+        return cls(data["span"], data["value"])
+
+
+class IndicatorState:
+    """종목/파라미터 조합 하나의 지표 상태"""
+
+    def __init__(self, rsi_period: int = 14, bb_period: int = 20):
+        self.rsi_period = rsi_period
+        self.bb_period = bb_period
+        self.ma = {w: RollingWindow(w) for w in MA_WINDOWS}
+        self.bb = RollingWindow(bb_period)
+        self.volume = {w: RollingWindow(w) for w in VOLUME_WINDOWS}
+        self.gain = RollingWindow(rsi_period)
+        self.loss = RollingWindow(rsi_period)
+        self.ema_fast = EMA(12)
+        self.ema_slow = EMA(26)
+        self.signal = EMA(9)
+        self.last_close: Optional[float] = None
+        self.last_volume: Optional[float] = None
+        self.first_date: Optional[pd.Timestamp] = None
+        self.last_date: Optional[pd.Timestamp] = None
+        self.count = 0
+
+    def update(self, date: pd.Timestamp, close: float, volume: float):
+        """확정된 봉 하나를 추가 (상수 시간)"""
+        gain, loss = self._gain_loss(close)
+        for rolling in self.ma.values():
+            rolling.push(close)
+        self.bb.push(close)
+        for rolling in self.volume.values():
+            rolling.push(volume)
+        self.gain.push(gain)
+        self.loss.push(loss)
+        self.ema_fast.push(close)
+        self.ema_slow.push(close)
+        self.signal.push(self.ema_fast.value - self.ema_slow.value)
+        self.last_close = close
+        self.last_volume = volume
+        self.last_date = pd.Timestamp(date)
+        if self.first_date is None:
+            self.first_date = self.last_date
+        self.count += 1
+
+    def values(self, close: Optional[float] = None, volume: Optional[float] = None) -> Dict[str, float]:
+        """
+        현재 지표 값
+
+        close/volume을 주면 그 봉을 추가했다고 가정한 값을 상태 변경 없이 계산합니다
+        (아직 확정되지 않은 오늘 봉에 사용).
+        """
+        gain, loss = self._gain_loss(close) if close is not None else (None, None)
+        avg_gain, avg_loss = self.gain.mean(gain), self.loss.mean(loss)
+        if math.isnan(avg_gain) or math.isnan(avg_loss) or (avg_gain == 0 and avg_loss == 0):
+            rsi = NAN
+        elif avg_loss == 0:
+            rsi = 100.0
+        else:
+            rsi = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+        fast, slow = self.ema_fast.peek(close), self.ema_slow.peek(close)
+        macd = fast - slow
+        signal = self.signal.peek(macd) if close is not None else self.signal.peek()
+        bb_mid, bb_std = self.bb.mean(close), self.bb.std(close)
+
+        current_close = close if close is not None else self.last_close
+        current_volume = volume if volume is not None else self.last_volume
+        result = {f"ma{w}": rolling.mean(close) for w, rolling in self.ma.items()}
+        result.update({f"volume_ma{w}": rolling.mean(volume) for w, rolling in self.volume.items()})
+        result.update({
+            "close": NAN if current_close is None else current_close,
+            "volume": NAN if current_volume is None else current_volume,
+            "rsi": rsi,
+            "macd": macd,
+            "macd_signal": signal,
+            "bb_upper": bb_mid + bb_std * 2,
+            "bb_middle": bb_mid,
+            "bb_lower": bb_mid - bb_std * 2,
+        })
+        return result
+
+    def _gain_loss(self, close: float) -> Tuple[float, float]:
+        # pandas 구현과 같이 첫 봉의 변화량은 0으로 취급
+        delta = 0.0 if self.last_close is None else close - self.last_close
+        return max(delta, 0.0), max(-delta, 0.0)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "rsi_period": self.rsi_period,
+            "bb_period": self.bb_period,
+            "ma": [r.to_dict() for r in self.ma.values()],
+            "bb": self.bb.to_dict(),
+            "volume": [r.to_dict() for r in self.volume.values()],
+            "gain": self.gain.to_dict(),
+            "loss": self.loss.to_dict(),
+            "ema_fast": self.ema_fast.to_dict(),
+            "ema_slow": self.ema_slow.to_dict(),
+            "signal": self.signal.to_dict(),
+            "last_close": self.last_close,
+            "last_volume": self.last_volume,
+            "first_date": self.first_date.isoformat() if self.first_date is not None else None,
+            "last_date": self.last_date.isoformat() if self.last_date is not None else None,
+            "count": self.count,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "IndicatorState":
+        state = cls(data["rsi_period"], data["bb_period"])
+        state.ma = {r["window"]: RollingWindow.from_dict(r) for r in data["ma"]}
+        state.bb = RollingWindow.from_dict(data["bb"])
+        state.volume = {r["window"]: RollingWindow.from_dict(r) for r in data["volume"]}
+        state.gain = RollingWindow.from_dict(data["gain"])
+        state.loss = RollingWindow.from_dict(data["loss"])
+        state.ema_fast = EMA.from_dict(data["ema_fast"])
+        state.ema_slow = EMA.from_dict(data["ema_slow"])
+        state.signal = EMA.from_dict(data["signal"])
+        state.last_close = data["last_close"]
+        state.last_volume = data["last_volume"]
+        # first_date가 없는 예전 스냅샷은 이어 쓰지 않고 다시 계산됨
+        state.first_date = pd.Timestamp(data["first_date"]) if data.get("first_date") else None
+        state.last_date = pd.Timestamp(data["last_date"]) if data["last_date"] else None
+        state.count = data["count"]
+        return state
+
+
+class IndicatorEngine:
+    """
+    (종목, RSI 기간, 볼린저 기간)별 지표 상태를 관리
+
+    compute()는 상태에 아직 반영되지 않은 확정 봉만 추가하고, 마지막 봉은 미확정으로 보고
+    상태 변경 없이 반영한 값을 돌려줍니다. 상태가 반영한 봉이 hist의 앞부분과 정확히 같을 때만
+    이어 쓰므로 결과는 항상 hist만으로 정해집니다. 상태는 JSON으로 저장/복원할 수 있습니다.
+    """
+
+    def __init__(self):
+        self._states: Dict[Hashable, IndicatorState] = {}
+        self._locks: Dict[Hashable, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def compute(self, symbol: str, hist: pd.DataFrame, rsi_period: int = 14, bb_period: int = 20) -> Dict[str, float]:
+        key = (symbol.upper(), rsi_period, bb_period)
+        with self._lock:
+            lock = self._locks.setdefault(key, threading.Lock())
+        with lock:
+            state = self._states.get(key)
+            start = self._resume_position(state, hist)
+            if start is None:
+                state = IndicatorState(rsi_period, bb_period)
+                self._states[key] = state
+                start = 0
+
+            closes = hist["Close"].values
+            volumes = hist["Volume"].values
+            index = hist.index
+            for i in range(start, len(hist) - 1):
+                state.update(index[i], float(closes[i]), float(volumes[i]))
+            return state.values(float(closes[-1]), float(volumes[-1]))
+
+    @staticmethod
+    def _resume_position(state: Optional[IndicatorState], hist: pd.DataFrame) -> Optional[int]:
+        """
+        상태를 이어서 쓸 수 있으면 다음에 추가할 봉의 위치, 아니면 None
+
+        상태의 봉이 hist의 앞부분(같은 첫 날짜부터 같은 개수, 같은 마지막 봉)일 때만 이어 씁니다.
+        시작 날짜가 다른 창으로 만든 상태를 쓰면 EMA/이동평균이 hist에 없는 봉을 반영하게 됩니다.
+        """
+        if state is None or state.first_date is None or len(hist) == 0:
+            return None
+        pos = state.count - 1
+        if hist.index[0] != state.first_date or pos >= len(hist) - 1:
+            return None
+        if hist.index[pos] != state.last_date or float(hist["Close"].iloc[pos]) != state.last_close:
+            return None
+        return pos + 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            items = list(self._states.items())
+        return {
+            "version": 1,
+            "states": [{"key": list(key), "state": state.to_dict()} for key, state in items],
+        }
+
+    def restore(self, snapshot: Dict[str, Any]):
+        with self._lock:
+            for item in snapshot.get("states", []):
+                self._states[tuple(item["key"])] = IndicatorState.from_dict(item["state"])
+
+    def save(self, path: Optional[str] = None):
+        path = Path(path or os.getenv("INDICATOR_STATE_PATH", DEFAULT_STATE_PATH))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.snapshot()), encoding="utf-8")
+        tmp.replace(path)
+
+    def load(self, path: Optional[str] = None) -> bool:
+        path = Path(path or os.getenv("INDICATOR_STATE_PATH", DEFAULT_STATE_PATH))
+        if not path.exists():
+            return False
+        try:
+            self.restore(json.loads(path.read_text(encoding="utf-8")))
+            return True
+        except Exception as e:
+            print(f"지표 상태 복원 실패: {str(e)}")
+            return False
+
+
+_indicator_engine: Optional[IndicatorEngine] = None
+_indicator_engine_lock = threading.Lock()
+
+
+def get_indicator_engine() -> IndicatorEngine:
+    """프로세스 전역 지표 엔진 (저장된 상태를 복원하고 종료 시 저장)"""
+    global _indicator_engine
+    if _indicator_engine is None:
+        with _indicator_engine_lock:
+            if _indicator_engine is None:
+                engine = IndicatorEngine()
+                engine.load()
+                atexit.register(engine.save)
+                _indicator_engine = engine
+    return _indicator_engine
@@ -0,0 +1,265 @@
+#src/tools/indicator_pipeline.py
+#설명 : 기술적 지표 계산을 이름 있는 단계(rolling/ewm/diff 등)의 작은 DAG로 선언하고, 공유 중간값을 한 번만 필요한 꼬리 구간에 대해서만 계산하는 파이프라인
+
+import time
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+class Op:
+    """
+    파이프라인 단계의 연산
+
+    input_need(n)은 출력의 마지막 n개 값을 만들기 위해 입력에서 필요한 꼬리 길이를 돌려줍니다
+    (None은 전체 구간이 필요함을 뜻합니다).
+    """
+
+    params: Tuple = ()
+
+    def key(self) -> Tuple:
+        return (type(self).__name__,) + tuple(self.params)
+
+    def input_need(self, need: Optional[int]) -> Optional[int]:
+        return need
+
+    def compute(self, need: Optional[int], *inputs: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+
+class Column(Op):
+    """입력 DataFrame의 컬럼 (꼬리 구간만 잘라냄)"""
+
+    def __init__(self, name: str):
+        self.params = (name,)
+
+    def compute(self, need, data: pd.DataFrame) -> np.ndarray:
+        values = data[self.params[0]].values
+        return np.asarray(values[-need:] if need else values, dtype="float64")
+
+
+class RollingMean(Op):
+    """rolling(window).mean() - 창을 채우지 못한 위치는 NaN"""
+
+    def __init__(self, window: int):
+        self.params = (window,)
+
+    def input_need(self, need):
+        return None if need is None else need + self.params[0] - 1
+
+    def compute(self, need, x):
+        return _rolling(x, self.params[0], need, lambda w: w.mean(axis=1))
+
+
+class RollingStd(Op):
+    """rolling(window).std() (표본 표준편차)"""
+
+    def __init__(self, window: int, ddof: int = 1):
+        self.params = (window, ddof)
+
+    def input_need(self, need):
+        return None if need is None else need + self.params[0] - 1
+
+    def compute(self, need, x):
+        return _rolling(x, self.params[0], need, lambda w: w.std(axis=1, ddof=self.params[1]))
+
+
+class Diff(Op):
+    """diff() - 시리즈 첫 값의 변화량은 0 (where(delta > 0, 0)을 거친 pandas 결과와 동일)"""
+
+    def input_need(self, need):
+        return None if need is None else need + 1
+
+    def compute(self, need, x):
+        if need is not None and len(x) > need:
+            delta = np.diff(x[-(need + 1):])
+        else:
+            delta = np.diff(x, prepend=x[:1])
+        delta[np.isnan(delta)] = 0.0
+        return delta
+
+
+class Clip(Op):
+    """sign * x의 양수 부분 (RSI의 상승폭/하락폭)"""
+
+    def __init__(self, sign: int = 1):
+        self.params = (sign,)
+
+    def compute(self, need, x):
+        return np.clip(self.params[0] * _tail(x, need), 0.0, None)
+
+
+class EWM(Op):
+    """ewm(span, adjust=False).mean() - 재귀식이므로 전체 구간이 필요"""
+
+    def __init__(self, span: int):
+        self.params = (span,)
+
+    def input_need(self, need):
+        return None
+
+    def compute(self, need, x):
+        return _tail(pd.Series(x).ewm(span=self.params[0], adjust=False).mean().values, need)
+
+
+class Sub(Op):
+    """a - b"""
+
+    def compute(self, need, a, b):
+        n = min(len(a), len(b), need or len(a))
+        return a[len(a) - n:] - b[len(b) - n:]
+
+
+class Band(Op):
+    """mid + k * std (볼린저 밴드 상단/하단)"""
+
+    def __init__(self, k: float):
+        self.params = (k,)
+
+    def compute(self, need, mid, std):
+        n = min(len(mid), len(std), need or len(mid))
+        return mid[len(mid) - n:] + self.params[0] * std[len(std) - n:]
+
+
+class Rsi(Op):
+    """100 - 100 / (1 + 평균 상승폭 / 평균 하락폭)"""
+
+    def compute(self, need, avg_gain, avg_loss):
+        n = min(len(avg_gain), len(avg_loss), need or len(avg_gain))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return 100 - (100 / (1 + avg_gain[len(avg_gain) - n:] / avg_loss[len(avg_loss) - n:]))
+
+
+def _tail(x: np.ndarray, need: Optional[int]) -> np.ndarray:
+    return x if need is None or len(x) <= need else x[-need:]
+
+
+def _rolling(x: np.ndarray, window: int, need: Optional[int], reduce) -> np.ndarray:
+    """마지막 need개 위치의 rolling 값 (데이터가 모자란 앞쪽은 NaN)"""
+    count = len(x) - window + 1 if need is None else need
+    if need is not None:
+        x = x[-(need + window - 1):]
+    out = np.full(max(count, 0), np.nan)
+    if len(x) >= window and count > 0:
+        values = reduce(sliding_window_view(x, window))
+        values = values[-count:]
+        out[len(out) - len(values):] = values
+    return out
+
+
+class IndicatorPipeline:
+    """
+    이름 있는 단계들의 DAG
+
+    같은 연산/입력을 가진 단계는 한 번만 등록되고 다른 이름은 별칭이 됩니다.
+    run()은 요청한 출력에 필요한 단계만, 각 단계가 실제로 필요한 꼬리 구간만큼만 계산합니다.
+    """
+
+    SOURCE = "__data__"
+
+    def __init__(self):
+        self._stages: Dict[str, Tuple[Op, Tuple[str, ...]]] = {}
+        self._aliases: Dict[str, str] = {}
+        self._by_key: Dict[Tuple, str] = {}
+        self.outputs: List[str] = []
+
+    def add(self, name: str, op: Op, *inputs: str, output: bool = True) -> str:
+        inputs = tuple(self._aliases.get(i, i) for i in inputs) or (self.SOURCE,)
+        for i in inputs:
+            if i != self.SOURCE and i not in self._stages:
+                raise ValueError(f"정의되지 않은 입력 단계입니다: {i}")
+        signature = op.key() + inputs
+        canonical = self._by_key.get(signature)
+        if canonical is None:
+            canonical = name
+            self._stages[name] = (op, inputs)
+            self._by_key[signature] = name
+        self._aliases[name] = canonical
+        if output and name not in self.outputs:
+            self.outputs.append(name)
+        return canonical
+
+    def stages(self) -> List[str]:
+        """실제로 계산되는 (중복 제거된) 단계 이름"""
+        return list(self._stages)
+
+    def plan(self, outputs: Iterable[str]) -> Dict[str, Optional[int]]:
+        """출력별 마지막 값 하나를 만들기 위해 단계마다 필요한 꼬리 길이"""
+        needs: Dict[str, Optional[int]] = {}
+        for name in outputs:
+            needs[self._aliases[name]] = 1
+        for name in reversed(list(self._stages)):
+            if name not in needs:
+                continue
+            op, inputs = self._stages[name]
+            need_in = op.input_need(needs[name])
+            for i in inputs:
+                if i == self.SOURCE:
+                    continue
+                if i not in needs:
+                    needs[i] = need_in
+                elif needs[i] is not None:
+                    needs[i] = None if need_in is None else max(needs[i], need_in)
+        return {name: needs[name] for name in self._stages if name in needs}
+
+    def run(
+        self,
+        data: pd.DataFrame,
+        outputs: Optional[Iterable[str]] = None,
+        timings: Optional[Dict[str, float]] = None,
+    ) -> Dict[str, float]:
+        """
+        출력 이름 -> 마지막 값
+
+        timings에 dict를 넘기면 단계별 계산 시간(마이크로초)을 기록합니다.
+        """
+        outputs = list(outputs or self.outputs)
+        needs = self.plan(outputs)
+        results: Dict[str, np.ndarray] = {}
+        for name, need in needs.items():
+            op, inputs = self._stages[name]
+            args = [data if i == self.SOURCE else results[i] for i in inputs]
+            if timings is None:
+                results[name] = op.compute(need, *args)
+            else:
+                started = time.perf_counter_ns()
+                results[name] = op.compute(need, *args)
+                timings[name] = (time.perf_counter_ns() - started) / 1000
+        values = {}
+        for name in outputs:
+            series = results[self._aliases[name]]
+            values[name] = float(series[-1]) if len(series) else float("nan")
+        return values
+
+
+@lru_cache(maxsize=32)
+def technical_pipeline(rsi_period: int = 14, bb_period: int = 20) -> IndicatorPipeline:
+    """TechnicalAnalysisTool이 보고하는 지표 전체 (IndicatorEngine.values()와 같은 출력 이름)"""
+    p = IndicatorPipeline()
+    p.add("close", Column("Close"))
+    p.add("volume", Column("Volume"))
+    for window in (5, 20, 60, 120):
+        p.add(f"ma{window}", RollingMean(window), "close")
+
+    p.add("bb_middle", RollingMean(bb_period), "close")
+    p.add("bb_std", RollingStd(bb_period), "close", output=False)
+    p.add("bb_upper", Band(2.0), "bb_middle", "bb_std")
+    p.add("bb_lower", Band(-2.0), "bb_middle", "bb_std")
+
+    p.add("delta", Diff(), "close", output=False)
+    p.add("gain", Clip(1), "delta", output=False)
+    p.add("loss", Clip(-1), "delta", output=False)
+    p.add("avg_gain", RollingMean(rsi_period), "gain", output=False)
+    p.add("avg_loss", RollingMean(rsi_period), "loss", output=False)
+    p.add("rsi", Rsi(), "avg_gain", "avg_loss")
+
+    p.add("ema12", EWM(12), "close", output=False)
+    p.add("ema26", EWM(26), "close", output=False)
+    p.add("macd", Sub(), "ema12", "ema26")
+    p.add("macd_signal", EWM(9), "macd")
+
+    p.add("volume_ma5", RollingMean(5), "volume")
+    p.add("volume_ma20", RollingMean(20), "volume")
+    return p
@@ -0,0 +1,267 @@
+#src/tools/market_cache.py
+#설명 : 모든 yfinance 호출이 공유하는 프로세스 전역 TTL 캐시 (LRU 메모리 한도, single-flight 중복 제거)
+
+import os
+import sys
+import time
+import pickle
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional
+import pandas as pd
+import yfinance as yf
+from telemetry import telemetry
+
+# 데이터 종류별 TTL (초)
+DEFAULT_TTLS = {
+    "quote": 15.0,      # 1일 시세 (현재가)
+    "info": 3600.0,     # 기업 기본 정보
+    "history": 300.0,   # 기간별 일봉
+}
+# 빈 결과의 TTL (초) - yfinance는 네트워크 오류에도 빈 DataFrame/dict를 돌려주므로 곧 다시 조회
+EMPTY_TTL = 15.0
+
+
+class _InFlight:
+    """진행 중인 조회 하나를 기다리는 호출자들이 공유하는 상태"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+
+
+class TTLCache:
+    """
+    종류별 TTL과 LRU 메모리 한도를 갖는 스레드 안전 캐시
+
+    같은 키를 동시에 요청하면 첫 호출만 loader를 실행하고 나머지는 그 결과를 기다립니다.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttls: Optional[Dict[str, float]] = None,
+        default_ttl: float = 60.0,
+        name: str = "yahoo",
+    ):
+        self.max_bytes = max_bytes
+        self.name = name  # 조회 구간 이름 접두사 (예: yahoo.quote)
+        self.ttls = dict(ttls or {})
+        self.default_ttl = default_ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (value, expires_at, size, kind)
+        self._inflight: Dict[Hashable, _InFlight] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Any],
+        kind: str = "default",
+        ttl: Optional[float] = None,
+        ttl_for: Optional[Callable[[Any], Optional[float]]] = None,
+    ) -> Any:
+        """
+        캐시된 값을 반환하고, 없거나 만료되었으면 loader로 한 번만 조회
+
+        ttl_for를 주면 조회한 값으로 TTL을 정합니다 (None을 돌려주면 ttl 또는 종류별 TTL, 0 이하이면 저장하지 않음).
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                self._entries.move_to_end(key)
+                self._count(kind, "hits")
+                return entry[0]
+            if entry is not None:
+                self._remove(key)
+                self._count(kind, "expired")
+
+            flight = self._inflight.get(key)
+            if flight is not None:
+                self._count(kind, "coalesced")
+                leader = False
+            else:
+                flight = _InFlight()
+                self._inflight[key] = flight
+                self._count(kind, "misses")
+                leader = True
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            with telemetry.span(f"{self.name}.{kind}", "fetch"):
+                value = loader()
+        except BaseException as e:
+            flight.error = e
+            with self._lock:
+                self._count(kind, "errors")
+                self._inflight.pop(key, None)
+            flight.event.set()
+            raise
+
+        flight.value = value
+        if ttl_for is not None:
+            value_ttl = ttl_for(value)
+            if value_ttl is not None:
+                ttl = value_ttl
+        with self._lock:
+            self._store(key, value, kind, ttl)
+            self._inflight.pop(key, None)
+        flight.event.set()
+        return value
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """종류별 hit/miss 카운터와 현재 사용량"""
+        with self._lock:
+            by_kind = {kind: dict(counts) for kind, counts in self._stats.items()}
+            hits = sum(c.get("hits", 0) for c in by_kind.values())
+            misses = sum(c.get("misses", 0) for c in by_kind.values())
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": round(hits / (hits + misses), 4) if (hits + misses) else 0.0,
+                "by_kind": by_kind,
+            }
+
+    def _store(self, key: Hashable, value: Any, kind: str, ttl: Optional[float]):
+        ttl = ttl if ttl is not None else self.ttls.get(kind, self.default_ttl)
+        if ttl <= 0:
+            return
+        size = _estimate_size(value)
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (value, time.monotonic() + ttl, size, kind)
+        self._bytes += size
+        while self._bytes > self.max_bytes and self._entries:
+            old_key, (_, _, _, old_kind) = next(iter(self._entries.items()))
+            self._remove(old_key)
+            self._count(old_kind, "evictions")
+
+    def _remove(self, key: Hashable):
+        _, _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def _count(self, kind: str, name: str):
+        counts = self._stats.setdefault(kind, {})
+        counts[name] = counts.get(name, 0) + 1
+        telemetry.count_cache(kind, name)
+
+
+def _estimate_size(value: Any) -> int:
+    """캐시 항목의 대략적인 메모리 크기 (바이트)"""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return sys.getsizeof(value)
+
+
+market_cache = TTLCache(
+    max_bytes=int(os.getenv("MARKET_CACHE_MAX_BYTES", 64 * 1024 * 1024)),
+    ttls=DEFAULT_TTLS,
+)
+
+
+def _empty_ttl(value: Any) -> Optional[float]:
+    """빈 결과(조회 실패일 수 있음)는 EMPTY_TTL 동안만 캐시 (ttl_for에 사용)"""
+    if isinstance(value, pd.DataFrame):
+        return EMPTY_TTL if value.empty else None
+    return EMPTY_TTL if not value else None
+
+
+def get_ticker_info(symbol: str) -> Dict[str, Any]:
+    """yf.Ticker(symbol).info (캐시 사용)"""
+    symbol = symbol.upper()
+    return market_cache.get_or_load(
+        ("info", symbol), lambda: yf.Ticker(symbol).info, kind="info", ttl_for=_empty_ttl,
+    )
+
+
+def get_history(
+    symbol: str,
+    period: Optional[str] = None,
+    start: Optional[str] = None,
+    interval: str = "1d",
+) -> pd.DataFrame:
+    """
+    yf.Ticker(symbol).history(...) (캐시 사용)
+
+    반환된 DataFrame은 여러 호출자가 공유하므로 수정하지 않아야 합니다.
+    """
+    symbol = symbol.upper()
+    kind = "quote" if period == "1d" and start is None else "history"
+    kwargs = {"interval": interval}
+    if start is not None:
+        kwargs["start"] = start
+    else:
+        kwargs["period"] = period or "1mo"
+    return market_cache.get_or_load(
+        (kind, symbol, period, start, interval),
+        lambda: yf.Ticker(symbol).history(**kwargs),
+        kind=kind,
+        ttl_for=_empty_ttl,
+    )
+
+
+def get_histories(
+    symbols: Iterable[str],
+    period: str = "1d",
+    interval: str = "1d",
+) -> Dict[str, pd.DataFrame]:
+    """
+    여러 종목의 일봉을 yf.download 한 번으로 조회 (캐시 사용)
+
+    종목 -> DataFrame (데이터가 없는 종목은 빈 DataFrame). 반환된 DataFrame은 수정하지 않아야 합니다.
+    """
+    symbols = tuple(sorted({s.upper() for s in symbols}))
+    kind = "quote" if period == "1d" else "history"
+
+    def load() -> Dict[str, pd.DataFrame]:
+        frame = yf.download(
+            list(symbols), period=period, interval=interval,
+            group_by="ticker", auto_adjust=True, progress=False, threads=True,
+        )
+        result = {}
+        for symbol in symbols:
+            if isinstance(frame.columns, pd.MultiIndex):
+                if symbol not in frame.columns.get_level_values(0):
+                    result[symbol] = pd.DataFrame()
+                    continue
+                sub = frame[symbol]
+            else:
+                sub = frame
+            result[symbol] = sub.dropna(how="all")
+        return result
+
+    # 한 종목이라도 비어 있으면 결과 전체를 짧게 캐시
+    return market_cache.get_or_load(
+        ("download", symbols, period, interval), load, kind=kind,
+        ttl_for=lambda result: EMPTY_TTL if not result or any(frame.empty for frame in result.values()) else None,
+    )
+
+
+def get_cache_stats() -> Dict[str, Any]:
+    """시장 데이터 캐시의 hit/miss 카운터"""
+    return market_cache.stats()
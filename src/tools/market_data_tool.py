@@ -1,80 +1,147 @@
+#src/tools/market_data_tool.py
+#설명 : 주요 시장 지수(설정 가능: 섹터 ETF, VIX, KOSPI 등)를 한 번의 일괄 요청으로 조회하는 도구 (백그라운드 시장 스냅샷이 있으면 조회 없이 반환)
 
-
-import yfinance as yf
+import os
 import pandas as pd
 from datetime import datetime
 from typing import Dict, Any, Optional
 import asyncio
-from aiohttp import ClientSession
-from .news_service import get_market_news
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from .market_cache import get_histories, get_history
+from .market_snapshot import MarketSnapshotRefresher
+from .news_service import fetch_market_news
 from langchain_core.tools import BaseTool
-from typing import Type, Optional
-from pydantic import BaseModel
+from typing import ClassVar, Type, Optional
+from pydantic import BaseModel, Field
 from langchain_core.callbacks import (
     AsyncCallbackManagerForToolRun,
     CallbackManagerForToolRun,
 )
+from telemetry import traced_tool
 
-class MarketData:
-    # 클래스 속성으로 indices 정의
-    INDICES = {
-        '^GSPC': {
-            'name': 'S&P 500',
-            'description': '미국 대형주 500개 기업을 포함하는 대표적인 주가지수'
-        },
-        '^DJI': {
-            'name': '다우존스',
-            'description': '미국 30대 우량 기업을 대표하는 산업평균지수'
-        },
-        '^IXIC': {
-            'name': '나스닥',
-            'description': '기술주 중심의 미국 전자주식시장 지수'
-        }
-    }
+# 기본 조회 지수 (심볼 -> 표시 이름)
+DEFAULT_INDICES = {
+    "^GSPC": "S&P 500",
+    "^IXIC": "NASDAQ",
+    "^DJI": "DOW JONES",
+}
 
-    @staticmethod
-    async def fetch_ticker_data(symbol: str, session: ClientSession) -> tuple:
-        ticker = yf.Ticker(symbol)
-        hist = ticker.history(period='1d')
-        if not hist.empty:
-            current_price = hist['Close'].iloc[-1]
-            prev_price = hist['Open'].iloc[0]
-            day_change = ((current_price - prev_price) / prev_price) * 100
-            return symbol, current_price, day_change
-        return symbol, None, None
-
-    @classmethod
-    async def get_major_indices(cls) -> dict:
-        try:
-            result = {
-                'indices': {},
-                'market_news': await get_market_news()
-            }
-            
-            async with ClientSession() as session:
-                tasks = [cls.fetch_ticker_data(symbol, session) for symbol in cls.INDICES.keys()]
-                ticker_results = await asyncio.gather(*tasks)
-                
-                for symbol, price, change in ticker_results:
-                    if price is not None:
-                        info = cls.INDICES[symbol]
-                        result['indices'][info['name']] = {
-                            'price': price,
-                            'change': change,
-                            'description': info['description']
-                        }
+# MARKET_INDICES에 심볼만 적었을 때 쓰는 표시 이름
+KNOWN_INDICES = {
+    **DEFAULT_INDICES,
+    "^RUT": "Russell 2000",
+    "^VIX": "VIX",
+    "^KS11": "KOSPI",
+    "^KQ11": "KOSDAQ",
+    "XLK": "기술 섹터(XLK)",
+    "XLF": "금융 섹터(XLF)",
+    "XLE": "에너지 섹터(XLE)",
+    "XLV": "헬스케어 섹터(XLV)",
+    "XLY": "경기소비재 섹터(XLY)",
+    "XLI": "산업재 섹터(XLI)",
+}
+
+# 오르면 시장에 부정적인 지수 (변동성 지수)
+INVERSE_INDICES = {"^VIX"}
+
+# 도구 결과에 함께 넣는 시장 뉴스 수
+MARKET_NEWS_LIMIT = 5
+
+
+def load_indices(spec: Optional[str] = None) -> Dict[str, str]:
+    """
+    조회할 지수 목록
+
+    spec(기본: MARKET_INDICES 환경 변수)은 "^GSPC,^VIX,XLK=기술주 ETF"처럼 쉼표로 구분한 심볼이며,
+    '=' 뒤에 표시 이름을 줄 수 있습니다. 비어 있으면 DEFAULT_INDICES를 사용합니다.
+    """
+    spec = spec if spec is not None else os.getenv("MARKET_INDICES", "")
+    indices = {}
+    for item in spec.split(","):
+        symbol, _, name = item.strip().partition("=")
+        symbol = symbol.strip().upper()
+        if symbol:
+            indices[symbol] = name.strip() or KNOWN_INDICES.get(symbol, symbol)
+    return indices or dict(DEFAULT_INDICES)
 
-            return result
-        except Exception as e:
-            return {'indices': {}, 'market_news': []}
 
 class MarketDataInput(BaseModel):
     pass  # 입력 파라미터가 필요 없음
 
 class MarketDataTool(BaseTool):
     name: str = "get_market_data"
-    description: str = "주요 시장 지수(S&P 500, NASDAQ, DOW)3대지수의 현재 상태를 조회합니다."
-    
+    description: str = "주요 시장 지수(S&P 500, NASDAQ, DOW 등 설정된 지수, 섹터 ETF, VIX)의 현재 상태를 조회합니다."
+    # 조회할 지수 (심볼 -> 표시 이름, MARKET_INDICES로 변경 가능)
+    indices: Dict[str, str] = Field(default_factory=load_indices)
+    # 일괄 조회에서 빠진 지수를 개별 조회할 때의 동시 실행 수
+    fallback_concurrency: ClassVar[int] = 8
+
+    def fetch_histories(self) -> Dict[str, pd.DataFrame]:
+        """
+        모든 지수의 1일 시세를 yf.download 한 번으로 조회
+
+        일괄 조회가 실패하거나 일부 지수가 빠지면 그 지수만 동시에 개별 조회합니다.
+        """
+        try:
+            histories = dict(get_histories(self.indices, period="1d"))
+        except Exception as e:
+            print(f"지수 일괄 조회 실패: {str(e)}")
+            histories = {}
+
+        missing = [s for s in self.indices if histories.get(s) is None or histories[s].empty]
+        if missing:
+            with ThreadPoolExecutor(max_workers=min(len(missing), self.fallback_concurrency)) as pool:
+                for symbol, hist in zip(missing, pool.map(self._fetch_one, missing)):
+                    histories[symbol] = hist
+        return histories
+
+    @staticmethod
+    def _fetch_one(symbol: str) -> pd.DataFrame:
+        try:
+            return get_history(symbol, period="1d")
+        except Exception:
+            return pd.DataFrame()
+
+    def from_snapshot(self) -> Optional[Dict[str, Any]]:
+        """
+        백그라운드 시장 스냅샷으로 결과 구성 - 조회 없이 바로 반환
+
+        스냅샷이 아직 없거나 지수 구성이 다르면 None. 갱신 스레드가 돌지 않는데 스냅샷이 갱신 주기보다
+        오래되었어도 None (current()가 동기 조회로 새로 고침).
+        """
+        refresher = get_market_refresher()
+        snapshot = refresher.snapshot
+        if snapshot is None or snapshot.symbols != tuple(self.indices):
+            return None
+        if not refresher.running and snapshot.age() > refresher.interval:
+            return None
+        return self._snapshot_result(snapshot, refresher)
+
+    def current(self) -> Dict[str, Any]:
+        """스냅샷이 있으면 스냅샷에서, 콜드 스타트이거나 스냅샷이 오래되었으면 동기 조회로 결과 구성"""
+        result = self.from_snapshot()
+        if result is not None:
+            return result
+        refresher = get_market_refresher()
+        if refresher.symbols == tuple(self.indices):
+            # 콜드 스타트(또는 갱신 스레드 없이 오래된 스냅샷) - 조회 결과를 스냅샷으로 저장해 다음 요청부터 재사용
+            return self._snapshot_result(refresher.get(), refresher)
+        # 기본 구성과 다른 지수를 지정한 도구는 직접 조회
+        return self.build_result(self.fetch_histories())
+
+    @staticmethod
+    def _snapshot_result(snapshot, refresher: MarketSnapshotRefresher) -> Dict[str, Any]:
+        result = dict(snapshot.indices)
+        if snapshot.news:
+            result["market_news"] = [
+                {key: article.get(key) for key in ("title", "media", "date", "link")}
+                for article in snapshot.news[:MARKET_NEWS_LIMIT]
+            ]
+        result["snapshot"] = snapshot.metadata(refresher.max_age)
+        return result
+
+    @traced_tool
     def _run(
         self,
         run_manager: Optional[CallbackManagerForToolRun] = None,
@@ -82,50 +149,75 @@ class MarketDataTool(BaseTool):
     ) -> Dict[str, Any]:
         """동기 실행을 위한 메서드"""
         try:
-            # 주요 지수 심볼
-            indices = {
-                "^GSPC": "S&P 500",
-                "^IXIC": "NASDAQ",
-                "^DJI": "DOW JONES"
-            }
-            
-            result = {}
-            for symbol, name in indices.items():
-                ticker = yf.Ticker(symbol)
-                hist = ticker.history(period="1d")
-                
-                if hist.empty:
-                    result[name] = {"error": f"{name} 데이터를 가져올 수 없습니다."}
-                    continue
-                
-                current_price = float(hist['Close'].iloc[-1])
-                open_price = float(hist['Open'].iloc[-1])
-                day_change = ((current_price - open_price) / open_price) * 100
-                
-                result[name] = {
-                    "current": current_price,
-                    "open": open_price,
-                    "high": float(hist['High'].iloc[-1]),
-                    "low": float(hist['Low'].iloc[-1]),
-                    "volume": int(hist['Volume'].iloc[-1]),
-                    "day_change": float(day_change),
-                    "timestamp": datetime.now().isoformat()
-                }
-            
-            return result
+            return self.current()
         except Exception as e:
             return {"error": f"시장 데이터 조회 중 오류 발생: {str(e)}"}
 
+    def build_result(self, histories: Dict[str, pd.DataFrame]) -> Dict[str, Any]:
+        """지수별 일봉(심볼 -> DataFrame)으로 결과 구성 - 다른 도구가 이미 받은 데이터를 재사용할 때도 사용"""
+        result = {}
+        for symbol, name in self.indices.items():
+            hist = histories.get(symbol)
+
+            if hist is None or hist.empty:
+                result[name] = {"error": f"{name} 데이터를 가져올 수 없습니다."}
+                continue
+
+            current_price = float(hist['Close'].iloc[-1])
+            open_price = float(hist['Open'].iloc[-1])
+            day_change = ((current_price - open_price) / open_price) * 100
+            volume = hist['Volume'].iloc[-1]
+
+            result[name] = {
+                "symbol": symbol,
+                "current": current_price,
+                "open": open_price,
+                "high": float(hist['High'].iloc[-1]),
+                "low": float(hist['Low'].iloc[-1]),
+                # VIX처럼 거래량이 없는 지수는 0
+                "volume": int(volume) if pd.notna(volume) else 0,
+                "day_change": float(day_change),
+                "timestamp": datetime.now().isoformat()
+            }
+
+        return result
+
+    @traced_tool
     async def _arun(
         self,
         run_manager: Optional[AsyncCallbackManagerForToolRun] = None,
         **kwargs: Any,  # 추가 파라미터 허용
     ) -> Dict[str, Any]:
         """비동기 실행을 위한 메서드"""
+        # 스냅샷이 있으면 스레드 전환 없이 바로 반환
+        result = self.from_snapshot()
+        if result is not None:
+            return result
         # run_manager를 제외하고 _run 메서드 호출
-        return await asyncio.get_event_loop().run_in_executor(
-            None, 
+        return await asyncio.to_thread(
             lambda: self._run(**kwargs)  # run_manager 제외
         )
 
 
+_refresher: Optional[MarketSnapshotRefresher] = None
+_refresher_lock = threading.Lock()
+
+
+def get_market_refresher() -> MarketSnapshotRefresher:
+    """
+    프로세스 전역 시장 스냅샷 갱신기 (MARKET_INDICES의 지수 + 시장 뉴스)
+
+    갱신 주기는 MARKET_SNAPSHOT_INTERVAL(초, 기본 60)이며, 갱신 스레드는 start()를 호출해야 돕니다.
+    """
+    global _refresher
+    if _refresher is None:
+        with _refresher_lock:
+            if _refresher is None:
+                tool = MarketDataTool()
+                _refresher = MarketSnapshotRefresher(
+                    symbols=tuple(tool.indices),
+                    fetch_indices=lambda: tool.build_result(tool.fetch_histories()),
+                    fetch_news=fetch_market_news,
+                    interval=float(os.getenv("MARKET_SNAPSHOT_INTERVAL", "60")),
+                )
+    return _refresher
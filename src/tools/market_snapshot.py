@@ -0,0 +1,176 @@
+#src/tools/market_snapshot.py
+#설명 : 모든 사용자가 공유하는 시장 스냅샷(주요 지수 + 시장 뉴스)을 백그라운드 스레드에서 주기적으로 갱신
+
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+from telemetry import telemetry
+
+
+class MarketSnapshot(NamedTuple):
+    """한 시점의 시장 데이터 (갱신될 때마다 version 증가, 교체만 하고 수정하지 않음)"""
+
+    version: int
+    symbols: Tuple[str, ...]      # 스냅샷을 만든 지수 심볼 (도구의 지수 구성과 비교용)
+    indices: Dict[str, Any]       # 지수 표시 이름 -> MarketDataTool.build_result 항목
+    news: List[dict]
+    updated_at: float             # 모든 부분을 마지막으로 조회에 성공한 시각 (epoch 초, 실패한 갱신에서는 이전 값 유지)
+    errors: Dict[str, str]        # 마지막 갱신에서 실패한 부분 (실패한 부분은 이전 값을 유지)
+
+    def age(self) -> float:
+        return max(0.0, time.time() - self.updated_at)
+
+    def metadata(self, max_age: Optional[float] = None) -> Dict[str, Any]:
+        """응답에 붙이는 버전/갱신 시각/경과 시간"""
+        age = self.age()
+        return {
+            "version": self.version,
+            "updated_at": datetime.fromtimestamp(self.updated_at).isoformat(),
+            "age_seconds": round(age, 1),
+            "stale": max_age is not None and age > max_age,
+            "errors": dict(self.errors),
+        }
+
+
+class MarketSnapshotRefresher:
+    """
+    interval초마다 지수와 시장 뉴스를 조회해 스냅샷을 교체하는 백그라운드 갱신기
+
+    조회는 갱신 스레드에서만 하므로 요청은 현재 스냅샷을 바로 읽습니다. 스냅샷이 아직 없으면(콜드 스타트)
+    또는 갱신 스레드가 돌지 않는데 스냅샷이 interval보다 오래되었으면 get()이 한 번 동기 조회합니다
+    (동시에 들어온 요청은 같은 조회를 기다림). 일부 지수나 뉴스 조회가 실패하면 그 부분은 이전 값을 유지하고
+    updated_at도 이전 시각으로 두므로, 조회가 계속 실패하면 max_age가 지난 뒤 stale로 표시됩니다.
+    """
+
+    def __init__(
+        self,
+        symbols: Tuple[str, ...],
+        fetch_indices: Callable[[], Dict[str, Any]],
+        fetch_news: Optional[Callable[[], List[dict]]] = None,
+        interval: float = 60.0,
+        max_age: Optional[float] = None,
+    ):
+        self.symbols = tuple(symbols)
+        self.fetch_indices = fetch_indices
+        self.fetch_news = fetch_news
+        self.interval = interval
+        # 이 시간(초)보다 오래된 스냅샷은 stale로 표시 (기본: 갱신 주기의 3배)
+        self.max_age = max_age if max_age is not None else interval * 3
+        self._snapshot: Optional[MarketSnapshot] = None
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def snapshot(self) -> Optional[MarketSnapshot]:
+        """현재 스냅샷 (조회하지 않음)"""
+        return self._snapshot
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def get(self) -> MarketSnapshot:
+        """현재 스냅샷 - 콜드 스타트이거나 갱신 스레드 없이 오래된 경우에만 동기 조회"""
+        snapshot = self._snapshot
+        if snapshot is not None and (self.running or snapshot.age() <= self.interval):
+            return snapshot
+        version = snapshot.version if snapshot is not None else 0
+        with self._refresh_lock:
+            # 락을 기다리는 동안 다른 호출이 이미 갱신했으면 그 결과를 사용
+            if self._snapshot is not None and self._snapshot.version != version:
+                return self._snapshot
+            return self._refresh_locked()
+
+    def refresh(self) -> MarketSnapshot:
+        """지수와 뉴스를 조회해 새 스냅샷으로 교체"""
+        with self._refresh_lock:
+            return self._refresh_locked()
+
+    def start(self):
+        """갱신 스레드 시작 (interval이 0 이하이면 시작하지 않음, 이미 실행 중이면 무시)"""
+        if self.interval <= 0 or self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="market-snapshot", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def clear(self):
+        """스냅샷 삭제 (다음 get()은 콜드 스타트처럼 동기 조회)"""
+        with self._refresh_lock:
+            self._snapshot = None
+
+    def status(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        status = {"running": self.running, "interval": self.interval}
+        if snapshot is not None:
+            status.update(snapshot.metadata(self.max_age))
+        return status
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"시장 스냅샷 갱신 실패: {str(e)}")
+            self._stop.wait(self.interval)
+
+    def _refresh_locked(self) -> MarketSnapshot:
+        previous = self._snapshot
+        errors = {}
+        # 이전 값을 다시 쓴 부분이 있으면 updated_at을 옮기지 않음
+        reused = False
+        with telemetry.span("market_snapshot.refresh", "fetch"):
+            try:
+                indices, kept = self._merge_indices(previous, self.fetch_indices())
+                if kept:
+                    errors["indices"] = "조회 실패: " + ", ".join(kept)
+                    reused = True
+            except Exception as e:
+                errors["indices"] = str(e)
+                indices = previous.indices if previous is not None else {}
+                reused = True
+            news = previous.news if previous is not None else []
+            if self.fetch_news is not None:
+                try:
+                    fetched = self.fetch_news()
+                    # 뉴스 조회는 실패해도 빈 목록을 돌려줄 수 있음
+                    reused = reused or (not fetched and bool(news))
+                    news = fetched or news
+                except Exception as e:
+                    errors["news"] = str(e)
+                    reused = True
+
+        snapshot = MarketSnapshot(
+            version=(previous.version if previous is not None else 0) + 1,
+            symbols=self.symbols,
+            indices=indices,
+            news=news,
+            updated_at=previous.updated_at if reused and previous is not None else time.time(),
+            errors=errors,
+        )
+        self._snapshot = snapshot
+        telemetry.metrics.set("market_snapshot_version", snapshot.version)
+        telemetry.metrics.inc("market_snapshot_refresh_total", result="error" if errors else "ok")
+        return snapshot
+
+    @staticmethod
+    def _merge_indices(previous: Optional[MarketSnapshot], indices: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
+        """이번 조회에서 실패한 지수는 이전 스냅샷의 값을 유지 - (병합 결과, 이전 값을 유지한 지수 이름)"""
+        if previous is None:
+            return indices, []
+        merged = dict(indices)
+        kept = []
+        for name, data in indices.items():
+            old = previous.indices.get(name)
+            if isinstance(data, dict) and "error" in data and isinstance(old, dict) and "error" not in old:
+                merged[name] = old
+                kept.append(name)
+        return merged, kept
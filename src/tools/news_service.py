@@ -1,24 +1,315 @@
-#src/function/news_service.py
-#설명 : 뉴스를 가져오는 함수
+#src/tools/news_service.py
+#설명 : 뉴스 조회 서비스 - 검색어별 TTL 캐시, 새로 고침 사이의 URL/제목 중복 제거,
+#       여러 종목 뉴스의 동시 조회(초당 검색 수 제한), 오프라인 테스트용 고정 백엔드
 
 from GoogleNews import GoogleNews
 import asyncio
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+from .market_cache import TTLCache
+from telemetry import telemetry
+
+# 시장 뉴스 검색어
+MARKET_NEWS_QUERY = "US stock market"
+
+_SPACES = re.compile(r"\s+")
+_PUNCTUATION = re.compile(r"[^\w\s]")
+
+
+class GoogleNewsBackend:
+    """
+    GoogleNews 검색
+
+    GoogleNews 객체는 결과를 내부에 쌓으므로 스레드 간에 공유하지 않고, 스레드마다 하나를 만들어 재사용합니다.
+    """
+
+    def __init__(self, lang: str = "en", period: str = "1d"):
+        self.lang = lang
+        self.period = period
+        self._local = threading.local()
+
+    def search(self, query: str, limit: int) -> List[dict]:
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = GoogleNews(lang=self.lang, period=self.period)
+        client.clear()
+        try:
+            client.search(query)
+            return client.results()[:limit]
+        finally:
+            client.clear()
+
+
+class StaticNewsBackend:
+    """
+    오프라인 테스트용 백엔드 (네트워크 없음)
+
+    articles에 있는 검색어는 그 기사를, 나머지는 검색어로 만든 고정 기사 count개를 돌려줍니다.
+    """
+
+    def __init__(self, articles: Optional[Dict[str, List[dict]]] = None, count: int = 10, latency: float = 0.0):
+        self.articles = articles or {}
+        self.count = count
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def search(self, query: str, limit: int) -> List[dict]:
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if query in self.articles:
+            return [dict(article) for article in self.articles[query][:limit]]
+        slug = _PUNCTUATION.sub("", query.lower()).replace(" ", "-")
+        return [
+            {
+                "title": f"{query} headline {i}",
+                "media": "Offline Wire",
+                "date": "1 hour ago",
+                "desc": f"Offline news article {i} about {query}.",
+                "link": f"https://example.com/{slug}/{i}",
+            }
+            for i in range(min(self.count, limit))
+        ]
+
+
+class RateLimiter:
+    """초당 rate회, 최대 burst회까지 몰아서 허용하는 토큰 버킷 (스레드 안전, rate가 0 이하이면 제한 없음)"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            telemetry.metrics.inc("news_rate_limited_total")
+            time.sleep(wait)
+
+
+def _url_key(link: Optional[str]) -> Optional[str]:
+    """추적 파라미터(&ved= 등)와 fragment, 끝의 /를 뺀 URL"""
+    if not link:
+        return None
+    parts = urlsplit(link.split("&ved=")[0])
+    query = f"?{parts.query}" if parts.query else ""
+    return f"{parts.netloc.lower()}{parts.path.rstrip('/')}{query}"
+
+
+def _title_key(title: Optional[str]) -> Optional[str]:
+    if not title:
+        return None
+    return _SPACES.sub(" ", _PUNCTUATION.sub("", title.lower())).strip() or None
+
+
+def dedupe_articles(articles: Iterable[dict]) -> List[dict]:
+    """URL이나 제목이 앞의 기사와 같은 기사를 뺀 목록 (순서 유지)"""
+    seen = set()
+    result = []
+    for article in articles:
+        keys = {("url", _url_key(article.get("link"))), ("title", _title_key(article.get("title")))}
+        keys = {key for key in keys if key[1] is not None}
+        if keys & seen:
+            continue
+        seen |= keys
+        result.append(article)
+    return result
+
+
+class NewsService:
+    """
+    검색어별 뉴스 조회 (TTL 캐시 + 새로 고침 사이 중복 제거 + 초당 검색 수 제한)
+
+    TTL이 지나 다시 검색하면 새 기사를 앞에, 이전 결과 중 이번 검색에 없는 기사를 뒤에 붙여 limit개까지 돌려줍니다.
+    검색이 실패하거나 기사를 하나도 받지 못하면 결과를 empty_ttl 동안만 캐시해 곧 다시 검색합니다.
+    같은 기사(URL이나 제목이 같음)는 한 번만 들어가고, 처음 본 시각(first_seen)은 새로 고침 후에도 유지됩니다.
+    반환된 목록은 여러 호출자가 공유하므로 수정하지 않아야 합니다.
+    """
+
+    def __init__(
+        self,
+        backend=None,
+        ttl: float = 600.0,
+        limit: int = 10,
+        max_concurrency: int = 4,
+        rate: float = 2.0,
+        burst: int = 2,
+        max_queries: int = 256,
+        empty_ttl: float = 30.0,
+    ):
+        self.backend = backend if backend is not None else GoogleNewsBackend()
+        self.limit = limit
+        self.max_concurrency = max_concurrency
+        self.max_queries = max_queries
+        self.empty_ttl = empty_ttl
+        self.rate_limiter = RateLimiter(rate, burst)
+        self._cache = TTLCache(max_bytes=8 * 1024 * 1024, ttls={"query": ttl}, name="news")
+        # 검색어 -> 직전 결과 (새로 고침할 때 병합/중복 제거용, LRU로 max_queries개까지)
+        self._previous: "OrderedDict[str, List[dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # 여러 검색어를 동시에 조회하는 스레드 풀 (GoogleNewsBackend가 스레드별 클라이언트를 재사용하도록 유지)
+        self._pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="news-search")
+
+    def search(self, query: str) -> List[dict]:
+        """검색어 하나의 뉴스 (캐시 사용, 같은 검색어를 동시에 요청하면 한 번만 검색)"""
+        key = _SPACES.sub(" ", query.strip().lower())
+        fetched = {}
+
+        def load() -> List[dict]:
+            articles, fetched["count"] = self._refresh(key, query)
+            return articles
+
+        return self._cache.get_or_load(
+            ("news", key), load, kind="query",
+            ttl_for=lambda articles: self.empty_ttl if not fetched.get("count") else None,
+        )
+
+    def search_many(self, queries: Iterable[str]) -> Dict[str, List[dict]]:
+        """
+        여러 검색어의 뉴스를 동시에 조회 (동시 실행 수는 max_concurrency, 검색 속도는 rate로 제한)
+
+        실패한 검색어는 빈 목록.
+        """
+        queries = list(dict.fromkeys(queries))
+        if not queries:
+            return {}
+
+        def search(query: str) -> List[dict]:
+            try:
+                return self.search(query)
+            except Exception as e:
+                print(f"뉴스 조회 실패 ({query}): {str(e)}")
+                return []
+
+        return dict(zip(queries, self._pool.map(search, queries)))
+
+    def market_news(self) -> List[dict]:
+        return self.search(MARKET_NEWS_QUERY)
+
+    def company_news(self, symbols: Iterable[str]) -> Dict[str, List[dict]]:
+        """종목별 뉴스 (종목 -> 기사 목록)"""
+        symbols = [symbol.upper() for symbol in symbols]
+        results = self.search_many(company_query(symbol) for symbol in symbols)
+        return {symbol: results.get(company_query(symbol), []) for symbol in symbols}
+
+    def clear(self):
+        self._cache.clear()
+        with self._lock:
+            self._previous.clear()
+
+    def close(self):
+        """검색 스레드 풀 종료"""
+        self._pool.shutdown(wait=False)
+
+    def stats(self):
+        return self._cache.stats()
+
+    def _refresh(self, key: str, query: str) -> Tuple[List[dict], int]:
+        """다시 검색해 이전 결과와 합친 기사 목록과 이번에 받은 기사 수"""
+        self.rate_limiter.acquire()
+        fresh = self.backend.search(query, self.limit)
+        now = datetime.now().isoformat()
+        with self._lock:
+            previous = self._previous.pop(key, [])
+            first_seen = {}
+            for article in previous:
+                for article_key in (_url_key(article.get("link")), _title_key(article.get("title"))):
+                    if article_key is not None:
+                        first_seen[article_key] = article.get("first_seen")
+            fresh = [
+                {**article, "first_seen": first_seen.get(_url_key(article.get("link")))
+                 or first_seen.get(_title_key(article.get("title"))) or now}
+                for article in fresh
+            ]
+            merged = dedupe_articles(fresh + previous)[:self.limit]
+            self._previous[key] = merged
+            while len(self._previous) > self.max_queries:
+                self._previous.popitem(last=False)
+        telemetry.metrics.inc("news_fetches_total")
+        if not fresh:
+            telemetry.metrics.inc("news_empty_fetches_total")
+        return merged, len(fresh)
+
+
+def company_query(symbol: str) -> str:
+    """종목 뉴스 검색어"""
+    return f"{symbol.upper()} stock"
+
+
+def create_news_service() -> NewsService:
+    """
+    환경 변수로 설정한 뉴스 서비스
+
+    NEWS_BACKEND(google/static), NEWS_CACHE_TTL(초), NEWS_MAX_CONCURRENCY, NEWS_RATE_LIMIT(초당 검색 수)
+    """
+    backend = StaticNewsBackend() if os.getenv("NEWS_BACKEND", "google") == "static" else GoogleNewsBackend()
+    return NewsService(
+        backend=backend,
+        ttl=float(os.getenv("NEWS_CACHE_TTL", "600")),
+        max_concurrency=int(os.getenv("NEWS_MAX_CONCURRENCY", "4")),
+        rate=float(os.getenv("NEWS_RATE_LIMIT", "2")),
+    )
+
+
+_news_service: Optional[NewsService] = None
+_news_service_lock = threading.Lock()
+
+
+def get_news_service() -> NewsService:
+    """프로세스 전역 뉴스 서비스"""
+    global _news_service
+    if _news_service is None:
+        with _news_service_lock:
+            if _news_service is None:
+                _news_service = create_news_service()
+    return _news_service
+
+
+def set_news_service(service: Optional[NewsService]):
+    """프로세스 전역 뉴스 서비스 교체 (None이면 다음 호출에서 환경 변수로 다시 생성)"""
+    global _news_service
+    with _news_service_lock:
+        previous, _news_service = _news_service, service
+    if previous is not None and previous is not service:
+        previous.close()
+
+
+def fetch_market_news() -> List[dict]:
+    """시장 뉴스 동기 조회 (시장 스냅샷 갱신 스레드에서 사용, 실패하면 예외)"""
+    return get_news_service().market_news()
+
 
 async def get_market_news():
     try:
-        # GoogleNews 작업을 별도 스레드에서 실행
-        def fetch_news():
-            googlenews = GoogleNews(lang='en', period='1d')
-            market_keywords = "US stock market"
-            googlenews.search(market_keywords)
-            news = googlenews.results()[:10]
-            googlenews.clear()
-            return news
-            
         # 동기 작업을 비동기적으로 실행
-        market_news = await asyncio.to_thread(fetch_news)
+        market_news = await asyncio.to_thread(fetch_market_news)
         return market_news
     except Exception as e:
         print(f"주식 뉴스 조회 실패: {str(e)}")
         return []
-    
\ No newline at end of file
+
+
+async def get_company_news(symbols: Iterable[str]) -> Dict[str, List[dict]]:
+    """종목별 뉴스 (캐시에 없는 종목만 동시에 검색)"""
+    symbols = list(symbols)
+    return await asyncio.to_thread(get_news_service().company_news, symbols)
@@ -0,0 +1,279 @@
+#src/tools/price_store.py
+#설명 : timescale/ CSV를 컬럼형 메모리 맵 저장소로 적재하고, 저장된 마지막 날짜 이후의 봉만 Yahoo에서 보충하는 가격 데이터 소스
+
+import os
+import json
+import time
+import threading
+from collections import defaultdict
+from pathlib import Path
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+from .market_cache import get_history
+
+# 저장소에 보관하는 컬럼 (yfinance history와 동일한 이름)
+COLUMNS = ("Open", "High", "Low", "Close", "Volume")
+
+DEFAULT_CSV_DIR = Path(__file__).resolve().parents[2] / "timescale"
+DEFAULT_STORE_DIR = DEFAULT_CSV_DIR / ".store"
+
+# yfinance period 문자열을 달력 기준 일수로 변환 (None은 전체 기간)
+PERIOD_DAYS = {
+    "1d": 0,
+    "5d": 7,
+    "1mo": 31,
+    "3mo": 92,
+    "6mo": 183,
+    "1y": 366,
+    "2y": 731,
+    "5y": 1827,
+    "max": None,
+}
+
+
+def period_for_days(period_days: int) -> str:
+    """조회 기간(일)을 yfinance에서 지원하는 period 문자열로 변환"""
+    if period_days <= 7:
+        return '1d'
+    elif period_days <= 30:
+        return '1mo'
+    elif period_days <= 90:
+        return '3mo'
+    elif period_days <= 180:
+        return '6mo'
+    elif period_days <= 365:
+        return '1y'
+    return 'max'
+
+
+class PriceHistoryStore:
+    """
+    종목별 OHLCV 배열과 날짜 인덱스를 .npy 파일로 저장하고 메모리 맵으로 읽는 저장소
+
+    디렉터리 구조: {store_dir}/{SYMBOL}/{dates,open,high,low,close,volume}.npy + meta.json
+    """
+
+    def __init__(self, csv_dir: Optional[str] = None, store_dir: Optional[str] = None):
+        self.csv_dir = Path(csv_dir or os.getenv("PRICE_CSV_DIR", DEFAULT_CSV_DIR))
+        self.store_dir = Path(store_dir or os.getenv("PRICE_STORE_DIR", DEFAULT_STORE_DIR))
+        self._arrays: Dict[str, Dict[str, np.ndarray]] = {}
+        self._lock = threading.Lock()
+
+    def ingest(self, force: bool = False) -> List[str]:
+        """CSV 파일을 저장소로 적재 (이미 최신이면 건너뜀)"""
+        ingested = []
+        for csv_path in sorted(self.csv_dir.glob("*_5years_daily.csv")):
+            symbol = csv_path.name.split("_")[0].upper()
+            meta = self._read_meta(symbol)
+            if not force and meta and meta.get("source_mtime", 0) >= csv_path.stat().st_mtime:
+                continue
+            df = pd.read_csv(csv_path)
+            dates = pd.to_datetime(df["Date"], utc=True).dt.tz_localize(None).dt.normalize()
+            frame = df[list(COLUMNS)].astype("float64")
+            frame.index = pd.DatetimeIndex(dates)
+            with self._lock:
+                self._write(symbol, frame, source_mtime=csv_path.stat().st_mtime)
+            ingested.append(symbol)
+        return ingested
+
+    def symbols(self) -> List[str]:
+        """저장된 종목 목록"""
+        if not self.store_dir.exists():
+            return []
+        return sorted(p.name for p in self.store_dir.iterdir() if (p / "meta.json").exists())
+
+    def has(self, symbol: str) -> bool:
+        return (self.store_dir / symbol.upper() / "meta.json").exists()
+
+    def arrays(self, symbol: str) -> Dict[str, np.ndarray]:
+        """종목의 컬럼 배열 (읽기 전용 메모리 맵)"""
+        symbol = symbol.upper()
+        arrays = self._arrays.get(symbol)
+        if arrays is None:
+            with self._lock:
+                arrays = self._arrays.get(symbol)
+                if arrays is None:
+                    arrays = self._load(symbol)
+                    self._arrays[symbol] = arrays
+        return arrays
+
+    def last_date(self, symbol: str) -> Optional[pd.Timestamp]:
+        dates = self.arrays(symbol)["dates"]
+        if len(dates) == 0:
+            return None
+        return pd.Timestamp(dates[-1])
+
+    def slice(self, symbol: str, start: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        """start 이후의 봉을 DataFrame으로 반환 (날짜 인덱스 이진 탐색)"""
+        arrays = self.arrays(symbol)
+        dates = arrays["dates"]
+        i = 0 if start is None else int(np.searchsorted(dates, np.datetime64(start, "D"), side="left"))
+        return pd.DataFrame(
+            {col: arrays[col.lower()][i:] for col in COLUMNS},
+            index=pd.DatetimeIndex(dates[i:].astype("datetime64[ns]"), name="Date"),
+        )
+
+    def extend(self, symbol: str, bars: pd.DataFrame):
+        """저장된 마지막 날짜 이후의 확정된 봉을 저장소에 추가"""
+        symbol = symbol.upper()
+        bars = _normalize_bars(bars)
+        last = self.last_date(symbol)
+        if last is not None:
+            bars = bars[bars.index > last]
+        if bars.empty:
+            return
+        merged = pd.concat([self.slice(symbol), bars])
+        with self._lock:
+            meta = self._read_meta(symbol) or {}
+            self._write(symbol, merged, source_mtime=meta.get("source_mtime", 0))
+
+    def _write(self, symbol: str, frame: pd.DataFrame, source_mtime: float):
+        """
+        임시 파일에 모두 쓴 뒤 os.replace로 교체하고 메모리 맵을 새 파일로 바꿈 (self._lock을 잡고 호출)
+
+        이전 배열을 메모리 맵으로 읽고 있는 호출자는 교체 전 파일(inode)을 계속 읽으므로 잘린 데이터를 보지 않습니다.
+        """
+        path = self.store_dir / symbol
+        path.mkdir(parents=True, exist_ok=True)
+        columns = {"dates": frame.index.values.astype("datetime64[D]")}
+        for col in COLUMNS:
+            columns[col.lower()] = np.ascontiguousarray(frame[col].values, dtype="float64")
+        for name, values in columns.items():
+            with open(path / f"{name}.npy.tmp", "wb") as f:
+                np.save(f, values)
+        for name in columns:
+            os.replace(path / f"{name}.npy.tmp", path / f"{name}.npy")
+        self._arrays[symbol] = self._load(symbol)
+        meta = {
+            "symbol": symbol,
+            "rows": int(len(frame)),
+            "first_date": str(frame.index[0].date()) if len(frame) else None,
+            "last_date": str(frame.index[-1].date()) if len(frame) else None,
+            "source_mtime": source_mtime,
+            "updated_at": datetime.now().isoformat(),
+        }
+        (path / "meta.json.tmp").write_text(json.dumps(meta), encoding="utf-8")
+        os.replace(path / "meta.json.tmp", path / "meta.json")
+
+    def _load(self, symbol: str) -> Dict[str, np.ndarray]:
+        path = self.store_dir / symbol
+        arrays = {"dates": np.load(path / "dates.npy", mmap_mode="r")}
+        for col in COLUMNS:
+            arrays[col.lower()] = np.load(path / f"{col.lower()}.npy", mmap_mode="r")
+        return arrays
+
+    def _read_meta(self, symbol: str) -> Optional[dict]:
+        path = self.store_dir / symbol / "meta.json"
+        if not path.exists():
+            return None
+        return json.loads(path.read_text(encoding="utf-8"))
+
+
+class PriceDataSource:
+    """
+    도구들이 사용하는 가격 데이터 소스
+
+    로컬 저장소를 먼저 읽고, 저장된 마지막 날짜 이후의 봉만 Yahoo에서 가져옵니다.
+    Yahoo가 돌려준 마지막 봉은 진행 중일 수 있으므로 메모리에만 두고, 그보다 앞선 봉만 확정으로 저장소에 추가합니다
+    (서버와 거래소의 시간대가 달라도 장중 봉이 확정으로 저장되지 않음).
+    네트워크를 사용할 수 없으면 저장된 데이터만으로 응답하고, 결과의 attrs["stale"]을 True로 표시합니다.
+    """
+
+    def __init__(self, store: Optional[PriceHistoryStore] = None, sync_interval: float = 60.0):
+        self.store = store or PriceHistoryStore()
+        self.sync_interval = sync_interval
+        self._live_bars: Dict[str, pd.DataFrame] = {}
+        self._last_sync: Dict[str, float] = {}
+        self._sync_failed: Dict[str, bool] = {}
+        self._sync_locks: Dict[str, threading.Lock] = defaultdict(threading.Lock)
+        self.store.ingest()
+
+    def get_history(self, symbol: str, period: str = "6mo") -> pd.DataFrame:
+        """yfinance Ticker.history(period=...)와 같은 형태의 일봉 데이터"""
+        symbol = symbol.upper()
+        if not self.store.has(symbol):
+            return _normalize_bars(get_history(symbol, period=period))
+
+        self._sync(symbol)
+        live = self._live_bars.get(symbol)
+        last = self.store.last_date(symbol)
+        if live is not None and not live.empty:
+            last = live.index[-1]
+        if last is None:
+            # 종목 디렉터리만 있고 저장된 봉이 없음
+            return _normalize_bars(get_history(symbol, period=period))
+
+        days = PERIOD_DAYS.get(period)
+        start = None if days is None else last.normalize() - timedelta(days=days)
+        hist = self.store.slice(symbol, start)
+        if live is not None and not live.empty:
+            hist = pd.concat([hist, live[live.index >= start] if start is not None else live])
+        if self._sync_failed.get(symbol) and (live is None or live.empty):
+            # Yahoo에서 보충하지 못해 마지막 봉이 현재 시세가 아닐 수 있음
+            hist.attrs["stale"] = True
+            hist.attrs["as_of"] = str(last.date())
+        return hist
+
+    def _sync(self, symbol: str):
+        """마지막 저장 날짜 이후의 봉을 Yahoo에서 보충 (sync_interval 이내에는 생략)"""
+        now = time.monotonic()
+        if now - self._last_sync.get(symbol, float("-inf")) < self.sync_interval:
+            return
+        with self._sync_locks[symbol]:
+            if now - self._last_sync.get(symbol, float("-inf")) < self.sync_interval:
+                return
+            self._last_sync[symbol] = now
+            last = self.store.last_date(symbol)
+            start = (last + timedelta(days=1)).date() if last is not None else None
+            # 거래소 현지 날짜는 UTC 날짜보다 하루 이상 앞서지 않음
+            if start is not None and start > (datetime.utcnow() + timedelta(days=1)).date():
+                return
+            try:
+                bars = _normalize_bars(get_history(symbol, period=None if start else "max", start=start.isoformat() if start else None))
+            except Exception as e:
+                print(f"가격 데이터 보충 실패 ({symbol}): {str(e)}")
+                self._sync_failed[symbol] = True
+                return
+            if last is not None:
+                bars = bars[bars.index > last]
+            if bars.empty:
+                # yfinance는 네트워크 오류에도 예외 대신 빈 DataFrame을 돌려줌 - 이미 끝난 거래일의 봉이 없으면 실패로 봄
+                self._sync_failed[symbol] = last is None or last < _last_session_before(datetime.utcnow())
+                return
+            self._sync_failed[symbol] = False
+            # 봉 날짜는 거래소 현지 날짜 - 마지막 봉만 미확정으로 보고 나머지는 확정으로 저장
+            self.store.extend(symbol, bars.iloc[:-1])
+            self._live_bars[symbol] = bars.iloc[-1:]
+
+
+def _last_session_before(now: datetime) -> pd.Timestamp:
+    """now(UTC) 날짜 이전의 마지막 평일 - 거래소 시간대와 관계없이 이미 끝난 거래일 (휴장일은 고려하지 않음)"""
+    return pd.Timestamp(now.date()) - pd.offsets.BDay(1)
+
+
+def _normalize_bars(bars: pd.DataFrame) -> pd.DataFrame:
+    """yfinance 결과를 tz 없는 일자 인덱스와 OHLCV 컬럼으로 정규화"""
+    if bars is None or bars.empty:
+        return pd.DataFrame(columns=list(COLUMNS), index=pd.DatetimeIndex([], name="Date"))
+    bars = bars[list(COLUMNS)].astype("float64")
+    index = pd.DatetimeIndex(bars.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    bars.index = index.normalize().rename("Date")
+    return bars[~bars.index.duplicated(keep="last")]
+
+
+_price_source: Optional[PriceDataSource] = None
+_price_source_lock = threading.Lock()
+
+
+def get_price_source() -> PriceDataSource:
+    """프로세스 전역 가격 데이터 소스 (최초 호출 시 CSV 적재)"""
+    global _price_source
+    if _price_source is None:
+        with _price_source_lock:
+            if _price_source is None:
+                _price_source = PriceDataSource()
+    return _price_source
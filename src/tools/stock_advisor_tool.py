@@ -1,20 +1,46 @@
 from langchain_core.tools import BaseTool
-from typing import Type, Optional, Dict, Any
+from typing import Type, Optional, Dict, Any, List
 from pydantic import BaseModel, Field
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 import asyncio
+import contextvars
+import math
+import os
+import time
 from .company_data_tool import CompanyDataTool
-from .market_data_tool import MarketDataTool
+from .market_data_tool import INVERSE_INDICES, MarketDataTool
 from .technical_tool import TechnicalAnalysisTool
+from .market_cache import get_ticker_info
+from .price_store import get_price_source, period_for_days
 from langchain_core.callbacks import (
     AsyncCallbackManagerForToolRun,
     CallbackManagerForToolRun,
 )
+from telemetry import telemetry, traced_tool
 
 class StockAdvisorInput(BaseModel):
     symbol: str = Field(..., description="분석할 주식 심볼 (예: AAPL)")
     company_name: str = Field(default="", description="회사명 (선택사항)")
 
+# 기술적 분석에 필요한 가장 긴 기간 (기업 정보의 1일 시세는 이 일봉의 마지막 봉을 사용)
+ADVISOR_HISTORY_DAYS = 180
+
+# 데이터 소스별 기본 제한 시간 (초)
+DEFAULT_SOURCE_TIMEOUTS = {
+    "company_info": 3.0,     # 기업 기본 정보
+    "price_history": 5.0,    # 종목 일봉 (기업 시세 + 기술적 분석)
+    "market_indices": 3.0,   # 주요 지수
+}
+
+# 소스가 빠졌을 때 확신도에서 깎는 비율 (일봉은 기업 시세와 기술적 지표에 모두 쓰여 비중이 큼)
+SOURCE_WEIGHTS = {
+    "company_info": 0.2,
+    "price_history": 0.6,
+    "market_indices": 0.2,
+}
+
+
 class StockAdvisorTool(BaseTool):
     name: str = "stock_advisor"
     description: str = """종합적인 투자 분석 및 추천을 제공하는 도구입니다. 투자 문의 매수/매도 의견 투자결정에 질문에 대해 사용합니다."""
@@ -24,58 +50,97 @@ class StockAdvisorTool(BaseTool):
     market_tool: MarketDataTool = Field(default_factory=MarketDataTool)
     technical_tool: TechnicalAnalysisTool = Field(default_factory=TechnicalAnalysisTool)
     args_schema: Type[BaseModel] = StockAdvisorInput
+    # 요청 전체의 지연 시간 예산(초)과 소스별 제한 시간 - 기한 안에 도착한 데이터만으로 추천
+    latency_budget: float = Field(default_factory=lambda: float(os.getenv("ADVISOR_LATENCY_BUDGET", "6")))
+    source_timeouts: Dict[str, float] = Field(default_factory=lambda: dict(DEFAULT_SOURCE_TIMEOUTS))
 
     def __init__(self, **data):
         super().__init__(**data)
         # __init__에서 도구들을 직접 초기화하지 않음
 
-    def _analyze_market_condition(self, market_data: Dict) -> Dict[str, Any]:
-        """시장 전반적인 상황 분석"""
+    def _analyze_market_condition(self, market_data: Optional[Dict] = None) -> Dict[str, Any]:
+        """
+        시장 전반적인 상황 분석
+
+        market_data를 주지 않으면 백그라운드 시장 스냅샷을 읽습니다 (콜드 스타트이거나 갱신 스레드 없이 오래된 경우에만 동기 조회).
+        """
+        if market_data is None:
+            market_data = self.market_tool.current()
         market_sentiment = "neutral"
         market_strength = 0
-        
+        counted = 0
+
         for index, data in market_data.items():
             if isinstance(data, dict) and "day_change" in data:
                 change = data["day_change"]
+                # VIX처럼 시장과 반대로 움직이는 지수는 부호를 뒤집어 반영
+                if data.get("symbol") in INVERSE_INDICES:
+                    change = -change
+                counted += 1
                 if change > 0:
                     market_strength += 1
                 elif change < 0:
                     market_strength -= 1
-        
-        if market_strength >= 2:
+
+        # 조회한 지수의 2/3 이상이 같은 방향일 때 추세로 판단 (기본 3개 지수면 2개)
+        threshold = max(2, math.ceil(counted * 2 / 3))
+        if market_strength >= threshold:
             market_sentiment = "bullish"
-        elif market_strength <= -2:
+        elif market_strength <= -threshold:
             market_sentiment = "bearish"
             
         return {
             "sentiment": market_sentiment,
             "strength": market_strength,
+            # 스냅샷 버전/갱신 시각/경과 시간 (직접 조회한 경우 None)
+            "as_of": market_data.get("snapshot"),
             "details": market_data
         }
 
     def _analyze_company_fundamentals(self, company_data: Dict) -> Dict[str, Any]:
-        """기업 기본 정보 분석"""
+        """기업 기본 정보 분석 (일봉이 없어 시세가 비어 있으면 가격/거래량 신호는 '정보 없음')"""
         stock_data = company_data.get("stock_data", {})
         financial = company_data.get("financial_metrics", {})
         
+        pe_ratio = financial.get("pe_ratio", 15)
+        if isinstance(pe_ratio, (int, float)):
+            pe_status = "적정" if 10 <= pe_ratio <= 30 else "주의"
+        else:
+            # 기업 정보가 없거나 PER이 'N/A'인 경우
+            pe_status = "정보 없음"
+        
+        if not stock_data:
+            price_trend = volume_status = "정보 없음"
+        else:
+            price_trend = "상승" if stock_data.get("day_change", 0) > 0 else "하락"
+            volume_status = "활발" if stock_data.get("volume", 0) > 0 else "부진"
+
         return {
-            "price_trend": "상승" if stock_data.get("day_change", 0) > 0 else "하락",
-            "volume_status": "활발" if stock_data.get("volume", 0) > 0 else "부진",
-            "pe_status": "적정" if 10 <= financial.get("pe_ratio", 15) <= 30 else "주의",
+            "price_trend": price_trend,
+            "volume_status": volume_status,
+            "pe_status": pe_status,
             "details": company_data
         }
 
     def _generate_recommendation(self, 
-                               market_analysis: Dict,
-                               company_analysis: Dict,
-                               technical_analysis: Dict) -> Dict[str, Any]:
-        """투자 추천 생성"""
+                               market_analysis: Optional[Dict],
+                               company_analysis: Optional[Dict],
+                               technical_analysis: Optional[Dict],
+                               missing_inputs: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        투자 추천 생성
+
+        분석이 None이면 해당 신호는 건너뛰고, missing_inputs의 비중만큼 확신도를 낮춥니다.
+        """
         buy_signals = 0
         sell_signals = 0
         reasons = []
+        missing_inputs = missing_inputs or []
         
         # 시장 상황 분석
-        if market_analysis["sentiment"] == "bullish":
+        if market_analysis is None:
+            pass
+        elif market_analysis["sentiment"] == "bullish":
             buy_signals += 1
             reasons.append("시장 전반적으로 상승세")
         elif market_analysis["sentiment"] == "bearish":
@@ -83,32 +148,36 @@ class StockAdvisorTool(BaseTool):
             reasons.append("시장 전반적으로 하락세")
             
         # 기업 기본 정보 분석
-        if company_analysis["price_trend"] == "상승":
-            buy_signals += 1
-            reasons.append("주가 상승 추세")
-        if company_analysis["volume_status"] == "활발":
-            buy_signals += 1
-            reasons.append("거래량 활발")
+        if company_analysis is not None:
+            if company_analysis["price_trend"] == "상승":
+                buy_signals += 1
+                reasons.append("주가 상승 추세")
+            if company_analysis["volume_status"] == "활발":
+                buy_signals += 1
+                reasons.append("거래량 활발")
             
         # 기술적 지표 분석
-        tech_summary = technical_analysis.get("analysis_summary", {})
-        
-        if tech_summary.get("rsi_analysis") == "과매도":
-            buy_signals += 1
-            reasons.append("RSI 과매도 구간 (매수 기회)")
-        elif tech_summary.get("rsi_analysis") == "과매수":
-            sell_signals += 1
-            reasons.append("RSI 과매수 구간")
+        if technical_analysis is not None:
+            tech_summary = technical_analysis.get("analysis_summary", {})
             
-        if tech_summary.get("macd_analysis") == "상승신호":
-            buy_signals += 1
-            reasons.append("MACD 상승 신호")
-        else:
-            sell_signals += 1
-            reasons.append("MACD 하락 신호")
+            if tech_summary.get("rsi_analysis") == "과매도":
+                buy_signals += 1
+                reasons.append("RSI 과매도 구간 (매수 기회)")
+            elif tech_summary.get("rsi_analysis") == "과매수":
+                sell_signals += 1
+                reasons.append("RSI 과매수 구간")
+                
+            if tech_summary.get("macd_analysis") == "상승신호":
+                buy_signals += 1
+                reasons.append("MACD 상승 신호")
+            else:
+                sell_signals += 1
+                reasons.append("MACD 하락 신호")
             
-        # 최종 추천
+        # 최종 추천 (빠진 데이터 소스의 비중만큼 확신도를 낮춤)
         confidence = (buy_signals / (buy_signals + sell_signals)) * 100 if (buy_signals + sell_signals) > 0 else 50
+        coverage = max(0.0, 1.0 - sum(SOURCE_WEIGHTS.get(source, 0.0) for source in missing_inputs))
+        confidence *= coverage
         
         if buy_signals > sell_signals:
             recommendation = "매수"
@@ -123,9 +192,28 @@ class StockAdvisorTool(BaseTool):
             "reasons": reasons,
             "buy_signals": buy_signals,
             "sell_signals": sell_signals,
+            "data_coverage": round(coverage, 2),
+            "missing_inputs": list(missing_inputs),
             "timestamp": datetime.now().isoformat()
         }
 
+    async def _fetch(self, source: str, timeout: float, func, *args, **kwargs):
+        """
+        데이터 소스 하나를 제한 시간 안에 조회 - (값, 실패 사유)
+
+        제한 시간이 지나면 기다리지 않고 넘어갑니다. 스레드에서 계속 진행된 조회 결과는
+        시장 데이터 캐시에 들어가 다음 요청에서 재사용됩니다.
+        """
+        try:
+            return await asyncio.wait_for(asyncio.to_thread(func, *args, **kwargs), timeout=max(timeout, 0.0)), None
+        except asyncio.TimeoutError:
+            reason = "timeout"
+        except Exception as e:
+            reason = f"error: {str(e)}"
+        telemetry.metrics.inc("advisor_missing_inputs_total", source=source, reason=reason.split(":")[0])
+        return None, reason
+
+    @traced_tool
     async def _arun(
         self,
         symbol: str,
@@ -134,25 +222,59 @@ class StockAdvisorTool(BaseTool):
     ) -> Dict[str, Any]:
         """비동기 실행을 위한 메서드"""
         try:
-            # 세 도구를 동시에 비동기로 실행
-            tasks = [
-                self.company_tool._arun(symbol=symbol, company_name=company_name),
-                self.market_tool._arun(),
-                self.technical_tool._arun(symbol=symbol)
-            ]
-            
-            # 모든 태스크를 동시에 실행하고 결과를 기다림
-            company_data, market_data, technical_data = await asyncio.gather(*tasks)
+            started = time.monotonic()
+            # 지연 시간 예산은 요청 시작부터의 기한 - 소스마다 남은 시간과 소스별 제한 시간 중 짧은 쪽 적용
+            deadline = started + self.latency_budget
+
+            def timeout(source: str) -> float:
+                remaining = deadline - time.monotonic()
+                return min(self.source_timeouts.get(source, self.latency_budget), remaining)
+
+            # 시장 지수/뉴스는 모든 사용자가 공유하는 백그라운드 스냅샷에서 바로 읽음
+            market_data = self.market_tool.from_snapshot()
+
+            async def fetch_market():
+                if market_data is not None:
+                    return market_data, None
+                # 콜드 스타트 또는 오래된 스냅샷 - 기한 안에서 동기 조회 (결과는 스냅샷으로 저장됨)
+                return await self._fetch("market_indices", timeout("market_indices"), self.market_tool.current)
+
+            # 1. 종목 데이터 묶음 조회 (일봉 1회, 기업 정보 1회를 동시에, 소스별 기한 적용)
+            (info, info_error), (hist, hist_error), (market_data, index_error) = await asyncio.gather(
+                self._fetch("company_info", timeout("company_info"), get_ticker_info, symbol),
+                self._fetch(
+                    "price_history", timeout("price_history"),
+                    get_price_source().get_history, symbol, period=period_for_days(ADVISOR_HISTORY_DAYS)
+                ),
+                fetch_market(),
+            )
+            if hist is not None and hist.empty:
+                hist, hist_error = None, "empty"
+            errors = {"company_info": info_error, "price_history": hist_error, "market_indices": index_error}
+            missing = {source: reason for source, reason in errors.items() if reason is not None}
+            if len(missing) == len(errors):
+                return {"error": "투자 분석에 필요한 데이터를 가져오지 못했습니다.", "missing_inputs": missing}
+
+            # 각 도구의 결과는 같은 묶음에서 계산 (도구별 재조회 없음, 도착하지 않은 데이터는 건너뜀)
+            # 일봉만 빠졌으면 기업 정보만으로 기본 정보를 구성
+            company_data = (
+                self.company_tool.build_result(symbol, company_name, info or {}, hist)
+                if hist is not None or info is not None else None
+            )
+            technical_data = self.technical_tool.build_result(symbol, hist) if hist is not None else None
             
             # 2. 각 측면 분석
-            market_analysis = self._analyze_market_condition(market_data)
-            company_analysis = self._analyze_company_fundamentals(company_data)
+            market_analysis = self._analyze_market_condition(market_data) if market_data is not None else None
+            company_analysis = self._analyze_company_fundamentals(company_data) if company_data is not None else None
+            if technical_data is not None and "error" in technical_data:
+                technical_data = None
             
             # 3. 종합 분석 및 추천 생성
             recommendation = self._generate_recommendation(
                 market_analysis,
                 company_analysis,
-                technical_data
+                technical_data,
+                list(missing)
             )
             
             return {
@@ -160,11 +282,14 @@ class StockAdvisorTool(BaseTool):
                 "market_analysis": market_analysis,
                 "company_analysis": company_analysis,
                 "technical_analysis": technical_data,
+                "missing_inputs": missing,
+                "elapsed_ms": round((time.monotonic() - started) * 1000, 1),
             }
                 
         except Exception as e:
             return {"error": f"투자 분석 중 오류 발생: {str(e)}"}
 
+    @traced_tool
     def _run(
         self,
         symbol: str,
@@ -172,4 +297,11 @@ class StockAdvisorTool(BaseTool):
         run_manager: Optional[CallbackManagerForToolRun] = None,
     ) -> Dict[str, Any]:
         """동기 실행을 위한 메서드"""
-        return asyncio.run(self._arun(symbol, company_name, run_manager))
\ No newline at end of file
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self._arun(symbol, company_name))
+        # 이미 실행 중인 이벤트 루프 안(그래프 실행 중 동기 호출 등)이면 별도 스레드의 새 루프에서 실행
+        context = contextvars.copy_context()
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            return pool.submit(context.run, asyncio.run, self._arun(symbol, company_name)).result()
@@ -7,6 +7,7 @@ from ta.volatility import BollingerBands
 from ta.trend import MACD
 import aiohttp
 import asyncio
+import time
 import pandas as pd
 from typing import Dict, Any, Optional, List
 from datetime import datetime, timedelta
@@ -17,6 +18,10 @@ from langchain_core.callbacks import (
     AsyncCallbackManagerForToolRun,
     CallbackManagerForToolRun,
 )
+from .price_store import get_price_source, period_for_days
+from .indicator_engine import get_indicator_engine
+from .indicator_pipeline import technical_pipeline
+from telemetry import traced_tool
 
 class TechnicalAnalysisInput(BaseModel):
     symbol: str = Field(..., description="분석할 주식 심볼 (예: AAPL)")
@@ -168,70 +173,109 @@ class TechnicalAnalysisTool(BaseTool):
     name: str = "get_technical_analysis"
     description: str = "��� RSI, 볼린저 밴드, MACD 등 기술적 지표를 분석합니다."
     args_schema: Type[BaseModel] = TechnicalAnalysisInput
+    # True이면 종목별 지표 상태에 새 봉만 추가해 계산 (False이면 지표 파이프라인으로 전체 재계산)
+    incremental: bool = True
+    # True이면 결과에 단계별 계산 시간(마이크로초)을 포함
+    profile: bool = False
     
+    def _pipeline_values(
+        self,
+        data: pd.DataFrame,
+        rsi_period: int = 14,
+        bb_period: int = 20,
+        outputs: Optional[List[str]] = None,
+        timings: Optional[Dict[str, float]] = None,
+    ) -> Dict[str, float]:
+        """지표 파이프라인 실행 (outputs에 필요한 단계만 계산)"""
+        return technical_pipeline(rsi_period, bb_period).run(data, outputs=outputs, timings=timings)
+
     def _calculate_moving_averages(self, data: pd.DataFrame) -> Dict[str, float]:
         """이동평균선 계산"""
-        close_prices = data['Close']
+        values = self._pipeline_values(data, outputs=["ma5", "ma20", "ma60", "ma120"])
         return {
-            "MA5": float(close_prices.rolling(window=5).mean().iloc[-1]),
-            "MA20": float(close_prices.rolling(window=20).mean().iloc[-1]),
-            "MA60": float(close_prices.rolling(window=60).mean().iloc[-1]),
-            "MA120": float(close_prices.rolling(window=120).mean().iloc[-1])
+            "MA5": values["ma5"],
+            "MA20": values["ma20"],
+            "MA60": values["ma60"],
+            "MA120": values["ma120"]
         }
 
     def _calculate_rsi(self, data: pd.DataFrame, period: int = 14) -> float:
         """RSI 계산"""
-        delta = data['Close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
-        return float(rsi.iloc[-1])
+        return self._pipeline_values(data, rsi_period=period, outputs=["rsi"])["rsi"]
 
     def _calculate_macd(self, data: pd.DataFrame) -> Dict[str, float]:
         """MACD 계산"""
-        exp1 = data['Close'].ewm(span=12, adjust=False).mean()
-        exp2 = data['Close'].ewm(span=26, adjust=False).mean()
-        macd = exp1 - exp2
-        signal = macd.ewm(span=9, adjust=False).mean()
+        values = self._pipeline_values(data, outputs=["macd", "macd_signal"])
         return {
-            "macd": float(macd.iloc[-1]),
-            "signal": float(signal.iloc[-1]),
-            "histogram": float(macd.iloc[-1] - signal.iloc[-1])
+            "macd": values["macd"],
+            "signal": values["macd_signal"],
+            "histogram": values["macd"] - values["macd_signal"]
         }
 
     def _calculate_bollinger_bands(self, data: pd.DataFrame, period: int = 20) -> Dict[str, float]:
         """볼린저 밴드 계산"""
-        ma = data['Close'].rolling(window=period).mean()
-        std = data['Close'].rolling(window=period).std()
+        values = self._pipeline_values(data, bb_period=period, outputs=["bb_upper", "bb_middle", "bb_lower"])
         return {
-            "upper": float(ma.iloc[-1] + (std.iloc[-1] * 2)),
-            "middle": float(ma.iloc[-1]),
-            "lower": float(ma.iloc[-1] - (std.iloc[-1] * 2))
+            "upper": values["bb_upper"],
+            "middle": values["bb_middle"],
+            "lower": values["bb_lower"]
         }
 
     def _analyze_volume(self, data: pd.DataFrame) -> Dict[str, Any]:
         """거래량 분석"""
-        return {
-            "current_volume": int(data['Volume'].iloc[-1]),
-            "avg_volume_5d": float(data['Volume'].rolling(window=5).mean().iloc[-1]),
-            "avg_volume_20d": float(data['Volume'].rolling(window=20).mean().iloc[-1]),
-            "volume_trend": "상승" if data['Volume'].iloc[-1] > data['Volume'].rolling(window=5).mean().iloc[-1] else "하락"
-        }
+        return self._volume_analysis(
+            self._pipeline_values(data, outputs=["volume", "volume_ma5", "volume_ma20"])
+        )
 
     def _analyze_trend(self, data: pd.DataFrame) -> Dict[str, str]:
         """추세 분석"""
-        current_price = data['Close'].iloc[-1]
-        ma20 = data['Close'].rolling(window=20).mean().iloc[-1]
-        ma60 = data['Close'].rolling(window=60).mean().iloc[-1]
-        
-        trend = {
+        return self._trend_analysis(self._pipeline_values(data, outputs=["close", "ma20", "ma60"]))
+
+    def _volume_analysis(self, values: Dict[str, float]) -> Dict[str, Any]:
+        return {
+            "current_volume": int(values["volume"]),
+            "avg_volume_5d": values["volume_ma5"],
+            "avg_volume_20d": values["volume_ma20"],
+            "volume_trend": "상승" if values["volume"] > values["volume_ma5"] else "하락"
+        }
+
+    def _trend_analysis(self, values: Dict[str, float]) -> Dict[str, str]:
+        current_price, ma20, ma60 = values["close"], values["ma20"], values["ma60"]
+        return {
             "short_term": "상승" if current_price > ma20 else "하락",
             "medium_term": "상승" if current_price > ma60 else "하락",
             "momentum": "강세" if current_price > ma20 > ma60 else "약세"
         }
-        return trend
 
+    def _build_analysis(self, values: Dict[str, float]) -> Dict[str, Any]:
+        """지표 값(파이프라인 또는 증분 엔진 출력)을 직렬화 가능한 결과로 변환"""
+        return {
+            "moving_averages": {
+                "MA5": values["ma5"],
+                "MA20": values["ma20"],
+                "MA60": values["ma60"],
+                "MA120": values["ma120"]
+            },
+            "rsi": values["rsi"],
+            "macd": {
+                "macd": values["macd"],
+                "signal": values["macd_signal"],
+                "histogram": values["macd"] - values["macd_signal"]
+            },
+            "bollinger_bands": {
+                "upper": values["bb_upper"],
+                "middle": values["bb_middle"],
+                "lower": values["bb_lower"]
+            },
+            "volume_analysis": {
+                k: float(v) if isinstance(v, (int, float)) else v
+                for k, v in self._volume_analysis(values).items()
+            },
+            "trend_analysis": self._trend_analysis(values),
+            "timestamp": datetime.now().isoformat()
+        }
+
+    @traced_tool
     def _run(
         self,
         symbol: str,
@@ -244,57 +288,40 @@ class TechnicalAnalysisTool(BaseTool):
         """동기 실행을 위한 메서드"""
         try:
             # period_days를 yfinance에서 지원하는 형식으로 변환
-            if period_days <= 7:
-                period = '1d'
-            elif period_days <= 30:
-                period = '1mo'
-            elif period_days <= 90:
-                period = '3mo'
-            elif period_days <= 180:
-                period = '6mo'
-            elif period_days <= 365:
-                period = '1y'
-            else:
-                period = 'max'
-            
-            ticker = yf.Ticker(symbol)
-            hist = ticker.history(period=period)
-            
-            if hist.empty:
-                return {"error": "기술적 분석을 위한 데이터를 가져올 수 없습니다."}
-            
-            # 직렬화 가능한 형태로 데이터 변환
-            technical_data = {
-                "moving_averages": {
-                    k: float(v) for k, v in self._calculate_moving_averages(hist).items()
-                },
-                "rsi": float(self._calculate_rsi(hist, period=rsi_period)),
-                "macd": {
-                    k: float(v) for k, v in self._calculate_macd(hist).items()
-                },
-                "bollinger_bands": {
-                    k: float(v) for k, v in self._calculate_bollinger_bands(hist, period=bb_period).items()
-                },
-                "volume_analysis": {
-                    k: float(v) if isinstance(v, (int, float)) else v 
-                    for k, v in self._analyze_volume(hist).items()
-                },
-                "trend_analysis": self._analyze_trend(hist),
-                "timestamp": datetime.now().isoformat()
-            }
-            
-            # 분석 결과에 대한 요약 추가
-            analysis_summary = {
-                "rsi_analysis": "과매수" if technical_data["rsi"] > 70 else "과매도" if technical_data["rsi"] < 30 else "중립",
-                "macd_analysis": "상승신호" if technical_data["macd"]["histogram"] > 0 else "하락신호",
-                "trend_summary": technical_data["trend_analysis"]["momentum"]
-            }
-            technical_data["analysis_summary"] = analysis_summary
-            
-            return technical_data
+            period = period_for_days(period_days)
+            hist = get_price_source().get_history(symbol, period=period)
+            return self.build_result(symbol, hist, rsi_period, bb_period)
         except Exception as e:
             return {"error": f"기술적 분석 중 오류 발생: {str(e)}"}
 
+    def build_result(self, symbol: str, hist: pd.DataFrame, rsi_period: int = 14, bb_period: int = 20) -> Dict[str, Any]:
+        """조회한 일봉으로 기술적 지표 결과 구성 - 다른 도구가 이미 받은 데이터를 재사용할 때도 사용"""
+        if hist.empty:
+            return {"error": "기술적 분석을 위한 데이터를 가져올 수 없습니다."}
+
+        timings = {} if self.profile else None
+        if self.incremental:
+            started = time.perf_counter_ns()
+            values = get_indicator_engine().compute(symbol, hist, rsi_period=rsi_period, bb_period=bb_period)
+            if timings is not None:
+                timings["indicator_engine"] = (time.perf_counter_ns() - started) / 1000
+        else:
+            values = self._pipeline_values(hist, rsi_period, bb_period, timings=timings)
+        technical_data = self._build_analysis(values)
+
+        # 분석 결과에 대한 요약 추가
+        analysis_summary = {
+            "rsi_analysis": "과매수" if technical_data["rsi"] > 70 else "과매도" if technical_data["rsi"] < 30 else "중립",
+            "macd_analysis": "상승신호" if technical_data["macd"]["histogram"] > 0 else "하락신호",
+            "trend_summary": technical_data["trend_analysis"]["momentum"]
+        }
+        technical_data["analysis_summary"] = analysis_summary
+        if timings is not None:
+            technical_data["profile"] = {"bars": len(hist), "stages_us": timings}
+
+        return technical_data
+
+    @traced_tool
     async def _arun(
         self,
         symbol: str,
@@ -305,8 +332,7 @@ class TechnicalAnalysisTool(BaseTool):
         run_manager: Optional[AsyncCallbackManagerForToolRun] = None,
     ) -> Dict[str, Any]:
         """비동기 실행을 위한 메서드"""
-        return await asyncio.get_event_loop().run_in_executor(
-            None, 
+        return await asyncio.to_thread(
             lambda: self._run(
                 symbol=symbol,
                 period_days=period_days,
@@ -0,0 +1,12 @@
+import sys
+from pathlib import Path
+
+# src 모듈은 패키지가 아닌 경로 기준으로 import (main.py, server.py와 동일)
+SRC = Path(__file__).resolve().parents[1] / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+# 오프라인 대체물(가짜 LLM, CSV 시세, 고정 뉴스)은 벤치마크와 공유
+BENCHMARKS = Path(__file__).resolve().parents[1] / "benchmarks"
+if str(BENCHMARKS) not in sys.path:
+    sys.path.insert(0, str(BENCHMARKS))
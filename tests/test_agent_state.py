@@ -0,0 +1,27 @@
+from langchain_core.agents import AgentAction
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import END, StateGraph
+
+from graph.agent_state import AgentState, CLEAR_INTERMEDIATE_STEPS
+
+
+def test_intermediate_steps_reset_each_turn():
+    def action(state):
+        return {"intermediate_steps": [(AgentAction("tool", state["input"], ""), "ok")]}
+
+    def agent(state):
+        # 같은 턴 안에서는 앞 단계의 결과가 쌓임
+        return {"intermediate_steps": [(AgentAction("tool", "again", ""), "ok")]}
+
+    workflow = StateGraph(AgentState)
+    workflow.add_node("action", action)
+    workflow.add_node("agent", agent)
+    workflow.set_entry_point("action")
+    workflow.add_edge("action", "agent")
+    workflow.add_edge("agent", END)
+    app = workflow.compile(checkpointer=MemorySaver())
+    config = {"configurable": {"thread_id": "t1"}}
+
+    for query in ("first", "second"):
+        result = app.invoke({"input": query, "intermediate_steps": CLEAR_INTERMEDIATE_STEPS}, config)
+        assert [step[0].tool_input for step in result["intermediate_steps"]] == [query, "again"]
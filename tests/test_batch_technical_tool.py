@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import tools.batch_technical_tool as batch_technical_tool
+from tools.batch_technical_tool import batch_technical_analysis
+
+
+class Source:
+    """종목별로 정해 둔 일봉을 돌려주는 가격 소스"""
+
+    def __init__(self, frames):
+        self.frames = frames
+
+    def get_history(self, symbol, period=None):
+        return self.frames[symbol]
+
+
+def bars(dates, seed):
+    close = 100 + np.random.default_rng(seed).normal(0, 1, len(dates)).cumsum()
+    return pd.DataFrame({"Close": close, "Volume": 1000.0 + np.arange(len(dates))}, index=pd.DatetimeIndex(dates))
+
+
+@pytest.fixture
+def frames(monkeypatch):
+    days = pd.bdate_range("2024-01-01", periods=150)
+    frames = {
+        # 휴장일이 다른 두 시장과 상장한 지 얼마 안 된 종목
+        "US": bars(days.delete([10, 40, 90]), 1),
+        "KR": bars(days.delete([20, 55, 56, 120]), 2),
+        "NEW": bars(days[-30:], 3),
+    }
+    monkeypatch.setattr(batch_technical_tool, "get_price_source", lambda: Source(frames))
+    return frames
+
+
+def test_each_symbol_matches_its_own_series(frames):
+    together = batch_technical_analysis(list(frames))
+    rows = {row[0]: row for row in together["rows"]}
+    for symbol in frames:
+        alone = batch_technical_analysis([symbol])["rows"][0]
+        np.testing.assert_allclose(rows[symbol][1:16], alone[1:16], equal_nan=True)
+        assert rows[symbol][1] == frames[symbol]["Close"].iloc[-1]
+
+
+def test_short_history_leaves_long_windows_empty(frames):
+    row = batch_technical_analysis(["NEW", "US"])["rows"][0]
+    columns = batch_technical_analysis(["NEW"])["columns"]
+    values = dict(zip(columns, row))
+    assert not np.isnan(values["MA20"])
+    assert np.isnan(values["MA60"]) and np.isnan(values["MA120"])
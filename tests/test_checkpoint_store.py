@@ -0,0 +1,170 @@
+import asyncio
+import operator
+import sqlite3
+import time
+from typing import Annotated, List, TypedDict
+
+import pytest
+from langgraph.checkpoint.base import empty_checkpoint
+from langgraph.graph import END, START, StateGraph
+
+from graph.checkpoint_store import SQLiteCheckpointSaver
+
+
+@pytest.fixture
+def make_saver(tmp_path):
+    savers = []
+
+    def make(**kwargs):
+        saver = SQLiteCheckpointSaver(path=str(tmp_path / "checkpoints.sqlite"), **kwargs)
+        savers.append(saver)
+        return saver
+
+    yield make
+    for saver in savers:
+        saver.close()
+
+
+def put_turn(saver, config, history, version):
+    """chat_history에 한 턴을 추가한 체크포인트 저장 - 다음 호출에 넘길 config 반환"""
+    checkpoint = empty_checkpoint()
+    checkpoint["channel_values"] = {"chat_history": list(history)}
+    checkpoint["channel_versions"] = {"chat_history": version}
+    return saver.put(config, checkpoint, {"step": version}, {"chat_history": version})
+
+
+def run_turns(saver, turns, thread_id="t1"):
+    config = {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+    history = []
+    for turn in range(1, turns + 1):
+        history.append(f"message {turn}")
+        config = put_turn(saver, config, history, turn)
+    return config, history
+
+
+def stored_blobs(saver, thread_id="t1"):
+    saver.flush()
+    with sqlite3.connect(saver.path) as conn:
+        return conn.execute(
+            "SELECT version, base_version FROM blobs WHERE thread_id = ? ORDER BY version", (thread_id,)
+        ).fetchall()
+
+
+def stored_bytes(saver, thread_id="t1"):
+    saver.flush()
+    with sqlite3.connect(saver.path) as conn:
+        rows = conn.execute(
+            "SELECT version, base_version, length(blob) FROM blobs WHERE thread_id = ?", (thread_id,)
+        ).fetchall()
+    return {int(version): (base, size) for version, base, size in rows}
+
+
+def test_conformance(make_saver):
+    conformance = pytest.importorskip("langgraph.checkpoint.conformance")
+
+    @conformance.checkpointer_test(name="SQLiteCheckpointSaver")
+    async def saver():
+        yield make_saver(keep_last=1000)
+
+    report = asyncio.run(conformance.validate(saver))
+    assert report.passed_all_base()
+
+
+def test_pruned_checkpoints_release_delta_chain(make_saver):
+    saver = make_saver(keep_last=3, max_delta_ratio=0.5)
+    config, history = run_turns(saver, 60)
+
+    # 남은 3개 체크포인트가 닿는 기준 값과 추가분만 남음 (남은 체크포인트 사이에서 새 기준이 생겼으면 이전 체인까지)
+    full = len(saver.serde.dumps_typed(history)[1])
+    assert sum(size for _, size in stored_bytes(saver).values()) <= full * (2 + saver.max_delta_ratio)
+    restored = make_saver(keep_last=3).get_tuple(config)
+    assert restored.checkpoint["channel_values"]["chat_history"] == history
+
+
+def test_delta_chain_is_rebased_by_size(make_saver):
+    saver = make_saver(keep_last=1000, max_delta_ratio=1.0)
+    config, history = run_turns(saver, 300)
+
+    blobs = stored_bytes(saver)
+    bases = sorted(version for version, (base, _) in blobs.items() if base is None)
+    # 추가분 합이 기준 값 크기를 넘을 때만 다시 저장 - 기준 값은 매번 약 2배가 되어 전체 저장 횟수는 턴 수의 로그
+    assert 3 <= len(bases) <= 10
+    for start, end in zip(bases, bases[1:] + [301]):
+        deltas = sum(blobs[version][1] for version in range(start + 1, end))
+        assert deltas <= blobs[start][1] * saver.max_delta_ratio
+    # 전체 값을 다시 쓴 비용을 나눠도 턴당 저장 바이트는 추가분의 몇 배 이내
+    last_delta = blobs[300][1] if blobs[300][0] is not None else blobs[299][1]
+    assert sum(size for _, size in blobs.values()) / 300 <= last_delta * 4
+    assert saver.get_tuple(config).checkpoint["channel_values"]["chat_history"] == history
+
+
+def test_rewritten_prefix_is_stored_in_full(make_saver):
+    saver = make_saver()
+    config = {"configurable": {"thread_id": "t1", "checkpoint_ns": ""}}
+    config = put_turn(saver, config, ["a", "b", "c"], 1)
+    # 마지막 원소는 같지만 앞부분이 바뀐 값은 추가분으로 저장하면 안 됨
+    config = put_turn(saver, config, ["x", "b", "c", "d"], 2)
+
+    assert stored_blobs(saver)[-1] == ("2", None)
+    restored = make_saver().get_tuple(config)
+    assert restored.checkpoint["channel_values"]["chat_history"] == ["x", "b", "c", "d"]
+
+
+def test_idle_threads_are_evicted_without_miss(make_saver):
+    saver = make_saver(idle_ttl=0.01)
+    run_turns(saver, 2, thread_id="idle")
+    time.sleep(0.02)
+
+    # 다른 쓰레드를 읽기만 해도 유휴 쓰레드는 내려감
+    run_turns(saver, 1, thread_id="active")
+    assert saver.stats()["threads_in_memory"] == 1
+
+
+def test_put_after_close_raises(make_saver):
+    saver = make_saver()
+    saver.close()
+    with pytest.raises(RuntimeError):
+        run_turns(saver, 1)
+
+
+def test_special_writes_use_fixed_index(make_saver):
+    saver = make_saver()
+    config, _ = run_turns(saver, 1)
+
+    saver.put_writes(config, [("value", 1)], "task")
+    saver.put_writes(config, [("value", 2)], "task")
+    saver.put_writes(config, [("__error__", "first")], "task")
+    saver.put_writes(config, [("__error__", "second")], "task")
+
+    writes = saver.get_tuple(config).pending_writes
+    assert ("task", "value", 1) in writes
+    assert ("task", "value", 2) not in writes
+    assert ("task", "__error__", "second") in writes
+    assert ("task", "__error__", "first") not in writes
+
+
+class State(TypedDict):
+    chat_history: Annotated[List[str], operator.add]
+
+
+def test_graph_resumes_from_sqlite(make_saver):
+    def reply(state: State):
+        return {"chat_history": [f"reply {len(state['chat_history'])}"]}
+
+    builder = StateGraph(State)
+    builder.add_node("reply", reply)
+    builder.add_edge(START, "reply")
+    builder.add_edge("reply", END)
+    config = {"configurable": {"thread_id": "graph"}}
+
+    saver = make_saver(max_delta_ratio=0.5)
+    graph = builder.compile(checkpointer=saver)
+    for turn in range(5):
+        graph.invoke({"chat_history": [f"question {turn}"]}, config)
+    expected = graph.get_state(config).values["chat_history"]
+    assert len(expected) == 10
+    saver.flush()
+
+    # 새 체크포인터(빈 메모리 계층)에서도 같은 대화를 복원
+    resumed = builder.compile(checkpointer=make_saver())
+    assert resumed.get_state(config).values["chat_history"] == expected
@@ -0,0 +1,47 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+from tools.indicator_engine import IndicatorEngine
+
+
+def bars(periods):
+    index = pd.bdate_range(end="2024-06-28", periods=periods)
+    close = 100 + np.random.default_rng(0).normal(0, 1, 200).cumsum()[-periods:]
+    return pd.DataFrame({"Close": close, "Volume": 1000.0}, index=index)
+
+
+def test_short_first_call_is_reseeded_from_longer_history():
+    engine = IndicatorEngine()
+    short = engine.compute("AAPL", bars(30))
+    assert math.isnan(short["ma60"]) and math.isnan(short["ma120"])
+
+    # 이후 긴 기간으로 호출하면 앞선 봉까지 반영해 긴 이동평균도 계산
+    values = engine.compute("AAPL", bars(180))
+    expected = IndicatorEngine().compute("AAPL", bars(180))
+    assert values == expected
+    assert not math.isnan(values["ma120"])
+
+
+def test_warm_state_resumes_without_reseeding():
+    engine = IndicatorEngine()
+    engine.compute("AAPL", bars(180))
+    state = engine._states[("AAPL", 14, 20)]
+    count = state.count
+
+    engine.compute("AAPL", bars(180))
+    assert engine._states[("AAPL", 14, 20)] is state
+    assert state.count == count
+
+
+def test_warm_engine_matches_fresh_engine_on_shorter_window():
+    engine = IndicatorEngine()
+    engine.compute("AAPL", bars(130))
+
+    # 다른 시작 날짜의 창으로 만든 상태를 이어 쓰지 않음 - 결과는 입력만으로 정해짐
+    values = engine.compute("AAPL", bars(21))
+    expected = IndicatorEngine().compute("AAPL", bars(21))
+    assert values.keys() == expected.keys()
+    for name, value in values.items():
+        assert value == expected[name] or (math.isnan(value) and math.isnan(expected[name])), name
@@ -0,0 +1,54 @@
+import time
+
+import pandas as pd
+import pytest
+
+import tools.market_cache as market_cache
+from tools.market_cache import DEFAULT_TTLS, EMPTY_TTL, TTLCache
+
+
+class Ticker:
+    """yf.Ticker 대체 - responses에 넣은 값을 돌려줌"""
+
+    responses = {}
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+
+    def history(self, **kwargs):
+        return self.responses["history"]
+
+    @property
+    def info(self):
+        return self.responses["info"]
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = TTLCache(ttls=DEFAULT_TTLS)
+    monkeypatch.setattr(market_cache, "market_cache", cache)
+    monkeypatch.setattr(market_cache.yf, "Ticker", Ticker)
+    return cache
+
+
+def expires_in(cache, key):
+    return cache._entries[key][1] - time.monotonic()
+
+
+def test_empty_results_are_cached_briefly(cache):
+    # yfinance는 네트워크 오류에도 예외 대신 빈 결과를 돌려줌
+    Ticker.responses = {"history": pd.DataFrame(), "info": {}}
+    market_cache.get_history("AAPL", period="6mo")
+    market_cache.get_ticker_info("AAPL")
+
+    assert expires_in(cache, ("history", "AAPL", "6mo", None, "1d")) <= EMPTY_TTL
+    assert expires_in(cache, ("info", "AAPL")) <= EMPTY_TTL
+
+
+def test_results_use_kind_ttl(cache):
+    Ticker.responses = {"history": pd.DataFrame({"Close": [1.0]}), "info": {"longName": "Apple"}}
+    market_cache.get_history("AAPL", period="6mo")
+    market_cache.get_ticker_info("AAPL")
+
+    assert expires_in(cache, ("history", "AAPL", "6mo", None, "1d")) > EMPTY_TTL
+    assert expires_in(cache, ("info", "AAPL")) > DEFAULT_TTLS["history"]
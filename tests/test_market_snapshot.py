@@ -0,0 +1,114 @@
+import time
+
+import pytest
+
+import tools.market_data_tool as market_data_tool
+from tools.market_data_tool import MarketDataTool
+from tools.market_snapshot import MarketSnapshotRefresher
+
+
+class Source:
+    """호출할 때마다 값이 바뀌는 지수/뉴스 조회 함수"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def indices(self):
+        self.calls += 1
+        return {"S&P 500": {"symbol": "^GSPC", "day_change": 1.0, "call": self.calls}}
+
+    def news(self):
+        return [{"title": f"news {self.calls}", "link": f"https://example.com/{self.calls}"}]
+
+
+@pytest.fixture
+def source():
+    return Source()
+
+
+@pytest.fixture
+def refresher(source, monkeypatch):
+    refresher = MarketSnapshotRefresher(("^GSPC",), source.indices, source.news, interval=0.05)
+    monkeypatch.setattr(market_data_tool, "_refresher", refresher)
+    yield refresher
+    refresher.stop()
+
+
+@pytest.fixture
+def tool():
+    return MarketDataTool(indices={"^GSPC": "S&P 500"})
+
+
+def test_cold_start_fetches_once(refresher, source):
+    first = refresher.get()
+    assert first.version == 1
+    assert refresher.get() is first
+    assert source.calls == 1
+
+
+def test_stale_snapshot_is_refreshed_without_refresher_thread(refresher, source, tool):
+    assert tool.current()["S&P 500"]["call"] == 1
+    assert tool.from_snapshot()["S&P 500"]["call"] == 1
+
+    time.sleep(0.06)
+    # 갱신 스레드가 없으면 오래된 스냅샷을 바로 돌려주지 않고 동기 조회
+    assert not refresher.running
+    assert tool.from_snapshot() is None
+    result = tool.current()
+    assert result["S&P 500"]["call"] == 2
+    assert result["snapshot"]["version"] == 2
+    assert source.calls == 2
+
+
+def test_running_refresher_serves_snapshot_without_fetch(refresher, source, tool):
+    refresher.start()
+    deadline = time.monotonic() + 2
+    while refresher.snapshot is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    calls = source.calls
+    result = tool.from_snapshot()
+    assert result is not None
+    assert result["market_news"][0]["title"].startswith("news")
+    assert source.calls == calls
+
+
+def test_failed_index_keeps_previous_value(refresher, source):
+    refresher.refresh()
+    refresher.fetch_indices = lambda: {"S&P 500": {"error": "조회 실패"}}
+    snapshot = refresher.refresh()
+    assert snapshot.version == 2
+    assert snapshot.indices["S&P 500"]["call"] == 1
+
+
+def test_repeated_failures_become_stale(refresher, source):
+    first = refresher.refresh()
+    refresher.fetch_indices = lambda: {"S&P 500": {"error": "조회 실패"}}
+
+    # 실패한 갱신은 updated_at을 옮기지 않으므로 max_age가 지나면 stale
+    deadline = time.time() + refresher.max_age * 2
+    while time.time() < deadline:
+        snapshot = refresher.refresh()
+        time.sleep(0.01)
+    assert snapshot.updated_at == first.updated_at
+    assert snapshot.errors == {"indices": "조회 실패: S&P 500"}
+    assert snapshot.metadata(refresher.max_age)["stale"] is True
+
+
+def test_news_error_is_recorded(refresher, source):
+    refresher.refresh()
+
+    def fail():
+        raise RuntimeError("news down")
+
+    refresher.fetch_news = fail
+    snapshot = refresher.refresh()
+    assert snapshot.errors == {"news": "news down"}
+    assert snapshot.news[0]["title"] == "news 1"
+
+
+def test_other_index_set_fetches_directly(refresher, source, monkeypatch):
+    tool = MarketDataTool(indices={"^VIX": "VIX"})
+    monkeypatch.setattr(MarketDataTool, "fetch_histories", lambda self: {})
+    result = tool.current()
+    assert result == {"VIX": {"error": "VIX 데이터를 가져올 수 없습니다."}}
+    assert source.calls == 0
@@ -0,0 +1,54 @@
+import threading
+import time
+
+import pytest
+
+from tools.news_service import NewsService, StaticNewsBackend
+
+
+class ThreadRecordingBackend(StaticNewsBackend):
+    """검색을 실행한 스레드를 기록"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.threads = set()
+
+    def search(self, query, limit):
+        self.threads.add(threading.get_ident())
+        return super().search(query, limit)
+
+
+@pytest.fixture
+def backend():
+    return ThreadRecordingBackend(articles={"EMPTY stock": []})
+
+
+@pytest.fixture
+def service(backend):
+    service = NewsService(backend=backend, rate=0, empty_ttl=0.05, max_concurrency=2)
+    yield service
+    service.close()
+
+
+def test_empty_result_is_cached_briefly(service, backend):
+    assert service.company_news(["EMPTY"]) == {"EMPTY": []}
+    assert service.company_news(["EMPTY"]) == {"EMPTY": []}
+    assert backend.calls == 1
+
+    time.sleep(0.06)
+    service.company_news(["EMPTY"])
+    assert backend.calls == 2
+
+
+def test_articles_use_full_ttl(service, backend):
+    service.search("AAPL stock")
+    time.sleep(0.06)
+    service.search("AAPL stock")
+    assert backend.calls == 1
+
+
+def test_search_many_reuses_pool_threads(service, backend):
+    for batch in range(5):
+        service.search_many([f"Q{batch}-{i}" for i in range(4)])
+    assert backend.calls == 20
+    assert len(backend.threads) <= 2
@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import tools.price_store as price_store
+from tools.price_store import PriceDataSource, PriceHistoryStore
+
+
+def bars(dates, start_price=100.0):
+    index = pd.DatetimeIndex(pd.to_datetime(dates), name="Date")
+    close = start_price + np.arange(len(index), dtype="float64")
+    return pd.DataFrame(
+        {"Open": close - 1, "High": close + 1, "Low": close - 2, "Close": close, "Volume": 1000.0},
+        index=index,
+    )
+
+
+@pytest.fixture
+def store(tmp_path):
+    csv_dir = tmp_path / "csv"
+    csv_dir.mkdir()
+    frame = bars(pd.bdate_range("2024-01-01", "2024-06-28"))
+    frame.index = frame.index.tz_localize("America/New_York")
+    frame.reset_index().to_csv(csv_dir / "AAPL_5years_daily.csv", index=False)
+    return PriceHistoryStore(csv_dir=str(csv_dir), store_dir=str(tmp_path / "store"))
+
+
+@pytest.fixture
+def yahoo(monkeypatch):
+    """price_store가 호출하는 Yahoo 조회 대체 (responses에 넣은 DataFrame 또는 예외를 돌려줌)"""
+    calls = []
+    state = {"response": bars([])}
+
+    def get_history(symbol, period=None, start=None, interval="1d"):
+        calls.append((symbol, period, start))
+        if isinstance(state["response"], Exception):
+            raise state["response"]
+        return state["response"]
+
+    monkeypatch.setattr(price_store, "get_history", get_history)
+    state["calls"] = calls
+    return state
+
+
+def test_only_bars_before_last_returned_bar_are_saved(store, yahoo):
+    # 거래소 날짜 기준 06-28 다음 봉들 - 마지막 봉(07-03)은 장중일 수 있음
+    yahoo["response"] = bars(["2024-07-01", "2024-07-02", "2024-07-03"], start_price=200)
+    source = PriceDataSource(store=store, sync_interval=0)
+
+    hist = source.get_history("AAPL", period="1d")
+
+    assert store.last_date("AAPL") == pd.Timestamp("2024-07-02")
+    assert hist.index[-1] == pd.Timestamp("2024-07-03")
+    assert not hist.attrs.get("stale")
+
+    # 다음 보충에서 장중 봉이 바뀌어도 저장소에는 확정된 값만 남음
+    yahoo["response"] = bars(["2024-07-03", "2024-07-05"], start_price=300)
+    hist = source.get_history("AAPL", period="5d")
+    assert store.last_date("AAPL") == pd.Timestamp("2024-07-03")
+    assert store.slice("AAPL")["Close"].iloc[-1] == 300
+    assert list(hist.index[-2:]) == [pd.Timestamp("2024-07-03"), pd.Timestamp("2024-07-05")]
+
+
+def test_offline_result_is_marked_stale(store, yahoo):
+    yahoo["response"] = ConnectionError("offline")
+    source = PriceDataSource(store=store, sync_interval=0)
+
+    hist = source.get_history("AAPL", period="1d")
+
+    assert hist.index[-1] == pd.Timestamp("2024-06-28")
+    assert hist.attrs["stale"] is True
+    assert hist.attrs["as_of"] == "2024-06-28"
+
+
+def test_empty_fetch_behind_last_session_is_marked_stale(store, yahoo):
+    # yfinance는 네트워크 오류 시 예외 대신 빈 DataFrame을 돌려줌
+    yahoo["response"] = bars([])
+    source = PriceDataSource(store=store, sync_interval=0)
+
+    hist = source.get_history("AAPL", period="1d")
+
+    assert hist.index[-1] == pd.Timestamp("2024-06-28")
+    assert hist.attrs["stale"] is True
+    assert hist.attrs["as_of"] == "2024-06-28"
+
+
+def test_extend_keeps_existing_memory_maps_readable(store):
+    store.ingest()
+    before = store.arrays("AAPL")
+    rows = len(before["close"])
+    last_close = float(before["close"][-1])
+
+    store.extend("AAPL", bars(["2024-07-01", "2024-07-02"], start_price=500))
+
+    # 교체 전 배열은 이전 파일을 그대로 읽고, 새 배열은 늘어난 파일을 읽음
+    assert len(before["close"]) == rows
+    assert float(before["close"][-1]) == last_close
+    after = store.arrays("AAPL")
+    assert len(after["close"]) == rows + 2
+    assert len(after["dates"]) == len(after["close"])
+    assert not list((store.store_dir / "AAPL").glob("*.tmp"))
+
+
+def test_symbol_without_rows_falls_back_to_yahoo(store, yahoo):
+    store.ingest()
+    store._write("EMPTY", bars([]), source_mtime=0)
+    source = PriceDataSource(store=store, sync_interval=0)
+
+    # 보충할 봉도 없으면 빈 DataFrame (저장된 마지막 날짜가 없어도 실패하지 않음)
+    assert source.get_history("EMPTY", period="1d").empty
+    assert yahoo["calls"][-1] == ("EMPTY", "1d", None)
@@ -0,0 +1,29 @@
+import pytest
+
+from graph.query_classifier import LocalQueryClassifier, QueryClassifier
+
+
+@pytest.fixture
+def classifier():
+    return LocalQueryClassifier()
+
+
+@pytest.mark.parametrize("query", ["애플 주가 어때?", "애플의 실적", "테슬라주식 살까", "Is Intel a buy?", "$MSFT"])
+def test_company_and_ticker_queries(classifier, query):
+    result = classifier.classify(query)
+    assert result.is_stock_related and result.tier == "dictionary"
+
+
+@pytest.mark.parametrize(
+    "query", ["artificial intelligence 설명해줘", "pineapple 피자 레시피", "메타버스가 뭐야?", "MS Word 단축키", "MA 학위 과정"]
+)
+def test_words_containing_names_are_not_matched(classifier, query):
+    assert classifier.classify(query).tier != "dictionary"
+
+
+def test_single_keyword_is_left_to_llm(classifier):
+    local = classifier.classify("체질량지수 계산법")
+    assert local.confidence < QueryClassifier(llm=None).confidence_threshold
+
+    result = classifier.classify("나스닥 지수 전망")
+    assert result.is_stock_related and result.confidence >= 0.8
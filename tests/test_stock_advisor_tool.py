@@ -0,0 +1,61 @@
+import asyncio
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import tools.stock_advisor_tool as stock_advisor_tool
+from tools.stock_advisor_tool import StockAdvisorTool
+
+INFO = {"sector": "Technology", "trailingPE": 25.0}
+MARKET = {"S&P 500": {"symbol": "^GSPC", "day_change": 1.0}}
+
+
+class Source:
+    def __init__(self, delay=0.0, error=None):
+        self.delay, self.error = delay, error
+
+    def get_history(self, symbol, period=None):
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        close = 100 + np.arange(180, dtype="float64")
+        index = pd.bdate_range(end="2024-06-28", periods=180)
+        return pd.DataFrame({"Open": close - 1, "High": close + 1, "Low": close - 2, "Close": close, "Volume": 1000.0}, index=index)
+
+
+@pytest.fixture
+def advisor(monkeypatch):
+    monkeypatch.setattr(stock_advisor_tool, "get_ticker_info", lambda symbol: INFO)
+    tool = StockAdvisorTool(latency_budget=2.0)
+    monkeypatch.setattr(tool.market_tool.__class__, "from_snapshot", lambda self: MARKET)
+    return tool
+
+
+def test_missing_price_history_keeps_fundamentals(advisor, monkeypatch):
+    monkeypatch.setattr(stock_advisor_tool, "get_price_source", lambda: Source(error=ConnectionError("offline")))
+
+    result = asyncio.run(advisor._arun("AAPL"))
+
+    assert list(result["missing_inputs"]) == ["price_history"]
+    company = result["company_analysis"]
+    assert company["pe_status"] == "적정"
+    assert company["price_trend"] == company["volume_status"] == "정보 없음"
+    assert result["technical_analysis"] is None
+
+
+def test_latency_budget_is_a_deadline(advisor, monkeypatch):
+    # 스냅샷을 읽는 데 예산 대부분을 쓰면 남은 시간 안에 오지 않는 일봉은 기다리지 않음
+    def slow_snapshot(self):
+        time.sleep(0.15)
+        return MARKET
+
+    monkeypatch.setattr(advisor.market_tool.__class__, "from_snapshot", slow_snapshot)
+    monkeypatch.setattr(stock_advisor_tool, "get_price_source", lambda: Source(delay=0.2))
+    advisor.latency_budget = 0.25
+
+    result = asyncio.run(advisor._arun("AAPL"))
+
+    assert result["missing_inputs"]["price_history"] == "timeout"
+    assert result["elapsed_ms"] < 300
@@ -0,0 +1,61 @@
+from langchain_core.agents import AgentAction, AgentFinish
+from langchain_core.messages import AIMessageChunk
+
+from graph.stock_analysis_graph import StockAnalysisGraph
+
+
+def node_event(kind, node, output=None):
+    return {"event": kind, "name": node, "metadata": {"langgraph_node": node}, "data": {"output": output}}
+
+
+def token_event(node, chunk):
+    return {"event": "on_chat_model_stream", "name": "model", "metadata": {"langgraph_node": node}, "data": {"chunk": chunk}}
+
+
+def progress(events):
+    graph = StockAnalysisGraph.__new__(StockAnalysisGraph)
+    step = {}
+    return [p for event in events for p in graph._progress_events(event, step)]
+
+
+def test_agent_tokens_stream_before_step_finishes():
+    finish = AgentFinish({"output": "분석 결과"}, "")
+    graph = StockAnalysisGraph.__new__(StockAnalysisGraph)
+    step = {}
+    for event in [node_event("on_chain_start", "agent"), token_event("agent", AIMessageChunk(content="분석 "))]:
+        emitted = list(graph._progress_events(event, step))
+    # 단계가 끝나기(on_chain_end) 전에 첫 답변 토큰이 나감
+    assert emitted == [{"type": "token", "node": "agent", "content": "분석 "}]
+    end = node_event("on_chain_end", "agent", {"agent_outcome": finish, "chat_history": []})
+    assert list(graph._progress_events(end, step)) == []
+
+
+def test_tool_step_tokens_are_reset():
+    action = AgentAction("get_technical_analysis", {"symbol": "NVDA"}, "")
+    events = [
+        node_event("on_chain_start", "agent"),
+        token_event("agent", AIMessageChunk(content="조회해 보겠습니다.")),
+        token_event("agent", AIMessageChunk(content="", tool_call_chunks=[{"name": "x", "args": '{"sy', "id": "1", "index": 0}])),
+        token_event("agent", AIMessageChunk(content="더 조회", tool_call_chunks=[{"args": 'mbol"', "index": 0}])),
+        node_event("on_chain_end", "agent", {"agent_outcome": [action]}),
+    ]
+    # 머리말은 바로 나가고, 도구 호출로 밝혀지면 한 번만 취소 - 도구 인자 조각은 토큰으로 나가지 않음
+    assert [p["type"] for p in progress(events)] == ["node", "token", "reset"]
+
+
+def test_tool_step_without_call_chunks_is_reset_at_end():
+    action = AgentAction("get_technical_analysis", {"symbol": "NVDA"}, "")
+    events = [
+        node_event("on_chain_start", "agent"),
+        token_event("agent", AIMessageChunk(content="조회해 보겠습니다.")),
+        node_event("on_chain_end", "agent", {"agent_outcome": [action]}),
+    ]
+    assert progress(events)[-1] == {"type": "reset", "node": "agent"}
+
+
+def test_general_response_streams_immediately():
+    events = [
+        node_event("on_chain_start", "general_response"),
+        token_event("general_response", AIMessageChunk(content="안녕하세요")),
+    ]
+    assert progress(events)[-1] == {"type": "token", "node": "general_response", "content": "안녕하세요"}
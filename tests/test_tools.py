@@ -0,0 +1,31 @@
+import asyncio
+
+import pytest
+from langchain_core.agents import AgentAction
+from langgraph.prebuilt.tool_executor import ToolExecutor
+
+from offline import offline_environment
+
+# 필수 인자 이름별 예시 값
+REQUIRED_VALUES = {"symbol": "AAPL", "symbols": ["AAPL", "MSFT"]}
+
+
+@pytest.fixture(scope="module")
+def toolkit():
+    with offline_environment():
+        from graph.stock_analysis_graph import create_toolkit
+
+        yield create_toolkit()
+
+
+def required_args(tool):
+    schema = tool.get_input_schema()
+    fields = schema.model_fields if hasattr(schema, "model_fields") else schema.__fields__
+    return {name: REQUIRED_VALUES[name] for name, field in fields.items() if field.is_required()}
+
+
+def test_every_tool_runs_with_required_args_only(toolkit):
+    executor = ToolExecutor(toolkit)
+    for tool in toolkit:
+        output = asyncio.run(executor.ainvoke(AgentAction(tool.name, required_args(tool), "")))
+        assert isinstance(output, dict) and "error" not in output, (tool.name, output)